@@ -0,0 +1,322 @@
+# Package imports
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import scipy
+from numpy.typing import NDArray
+
+# Custom imports
+import util.simulation as sm
+import util.solution as sl
+import util.bracket as br
+import util.integrator as itg
+import util.core as core
+import util.memo as memo
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+infinite = importlib.import_module("simulations.well.infinite.main")
+finite = importlib.import_module("simulations.well.finite.main")
+morse = importlib.import_module("simulations.morse.main")
+
+# Grid steps every benchmark is run for, from coarse to fine
+xSteps: tuple[float, ...] = (0.01, 0.005, 0.001, 0.0005)
+# Smaller set of grid steps for quick runs
+quickSteps: tuple[float, ...] = (0.01, 0.005)
+# Numbers of states solved per bracket benchmark
+stateCounts: tuple[int, ...] = (1, 3, 5)
+# Finite well depths, giving 1, 4, 6, 9 and 32 bound states
+z0Values: tuple[float, ...] = (1, 5, 8, 14, 50)
+
+# Modules whose import time is measured in a fresh interpreter
+startupModules: tuple[str, ...] = ("util", "util.simulation", "simulations.harmonic-oscillator.main", "simulations.well.finite.main", "simulations.morse.main")
+# Heavy packages a compute-only import must not load
+heavyModules: tuple[str, ...] = ("matplotlib", "scipy.integrate", "scipy.optimize", "scipy.linalg")
+
+# Refinement settings of the bracket benchmarks
+iterationCount: int = 60
+approximatation: float = 1e-10
+
+# Largest accepted eigenvalue error for every grid step (4th order solvers and a tail cut at xMax for the oscillator)
+errorTolerance: float = 1e-4
+
+class Case:
+    """
+        Benchmarked model setup.
+
+        Class variables:
+         #   name: str                   - short model name used in the results
+         #   model: ModelSystem          - model system being benchmarked
+         #   xMin: float                 - start of the integration grid
+         #   xMax: float                 - end of the integration grid
+         #   spectrum: function          - analytic eigenvalue of state n (0 for the ground state), None when unknown
+         #   parity: function            - parity of state n
+    """
+
+    def __init__(self, name: str, model: sm.ModelSystem, xMin: float, xMax: float, spectrum=None, parity=None):
+        self.name = name
+        self.model = model
+        self.xMin = xMin
+        self.xMax = xMax
+        self.spectrum = spectrum
+        self.parity = parity
+
+    def grid(self, xStep: float) -> NDArray:
+        """`grid` builds the integration grid for `xStep` the same way `Simulation.modifyGrid` does."""
+
+        simulation: sm.Simulation = sm.Simulation()
+        simulation.modifyGrid(self.xMin, self.xMax, xStep)
+
+        return simulation.xValues
+
+# Symmetric models alternate even and odd states, starting with an even ground state
+def stateParity(n: int) -> str:
+    """`stateParity` returns the parity of the `n`-th state of a symmetric model."""
+
+    return "even" if n % 2 == 0 else "odd"
+
+# Build the benchmarked models.
+def buildCases(solver: str = "") -> list[Case]:
+    """`buildCases` creates the infinite well, harmonic oscillator, finite well and Morse cases, optionally forcing their `solver`."""
+
+    cases: list[Case] = [
+        Case("infinite", infinite.InfiniteWellPotential(), infinite.xMin, infinite.xMax, lambda n: (n + 1)**2, stateParity),
+        Case("harmonic", harmonic.HarmonicOscillator(), harmonic.xMin, harmonic.xMax, lambda n: n + 0.5, stateParity),
+        Case("finite", finite.FiniteWellPotential(), finite.xMin, finite.xMax),
+        Case("morse", morse.MorsePotential(morse.depth), morse.xMin, morse.xMax, lambda n: morse.exactEnergy(morse.depth, n), lambda n: "full")
+    ]
+
+    for case in cases:
+        if solver != "":
+            case.model.solver = solver
+
+        case.model.iterationCount = iterationCount
+        case.model.approximatation = approximatation
+
+    return cases
+
+# Time a function.
+def measure(function, repeat: int) -> tuple[dict, object]:
+    """`measure` runs `function` `repeat` times on a cold in-memory cache, returning the timings and the last result."""
+
+    timings: list[float] = []
+    result = None
+
+    for i in range(repeat):
+        # Every repetition must compute, not read the results of the previous one
+        memo.solutionCache.clear()
+
+        start: float = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+
+    return {"best": min(timings), "mean": sum(timings) / len(timings), "repeat": repeat}, result
+
+# Benchmark computing single solutions.
+def benchGetSolution(case: Case, xStep: float, repeat: int) -> dict:
+    """`benchGetSolution` times `getSolution` for the normalised ground state of the `case`."""
+
+    xValues: NDArray = case.grid(xStep)
+    epsilon: float = case.spectrum(0) if case.spectrum is not None else 1
+    parity: str = case.parity(0) if case.parity is not None else "even"
+
+    timing, solution = measure(lambda: sl.getSolution(case.model, xValues, epsilon, True, parity), repeat)
+
+    return dict(timing, points=xValues.size)
+
+# Benchmark normalisation.
+def benchNormalise(case: Case, xStep: float, repeat: int) -> dict:
+    """`benchNormalise` times `normaliseSolution` of a computed solution with the model quadrature."""
+
+    xValues: NDArray = case.grid(xStep)
+    epsilon: float = case.spectrum(0) if case.spectrum is not None else 1
+    parity: str = case.parity(0) if case.parity is not None else "even"
+    solution: sl.Solution = sl.getSolution(case.model, xValues, epsilon, False, parity)
+    quadrature: str = sl.getQuadrature(case.model)
+
+    # Normalisation is cheap, so it is repeated within one timing to rise above the timer resolution
+    timing, result = measure(lambda: [sl.normaliseSolution(xValues, solution.result, quadrature, None, parity != "full") for i in range(100)], repeat)
+    timing["best"] /= 100
+    timing["mean"] /= 100
+
+    return dict(timing, points=xValues.size)
+
+# Benchmark bracket refinement.
+def benchSolveBracket(case: Case, xStep: float, states: int, repeat: int) -> dict:
+    """`benchSolveBracket` times `solveBracket` on brackets around the first `states` analytic eigenvalues and checks the error of the roots."""
+
+    xValues: NDArray = case.grid(xStep)
+    refinement: str = br.refinementSettings(case.model)[2]
+
+    exact: list[float] = [case.spectrum(n) for n in range(states)]
+
+    # Brackets reach a quarter of the level spacing to both sides, so each holds exactly one state
+    brackets: list[br.Bracket] = []
+    for n in range(states):
+        spacing: float = case.spectrum(n + 1) - case.spectrum(n)
+        brackets.append(br.Bracket(exact[n] - spacing / 4, exact[n] + spacing / 4, case.parity(n)))
+
+    timing, roots = measure(lambda: [br.solveBracket(case.model, bracket, xValues, iterationCount, approximatation, refinement) for bracket in brackets], repeat)
+
+    maxError: float = float(max(abs(root - value) for root, value in zip(roots, exact)))
+
+    return dict(timing, points=xValues.size, iterations=sum(bracket.iterations for bracket in brackets), evaluations=sum(bracket.evaluations for bracket in brackets), maxError=maxError, accurate=bool(maxError < errorTolerance))
+
+# Benchmark the uniform bracket sweep of the harmonic oscillator.
+def benchFindSolutionBrackets(case: Case, xStep: float, states: int, repeat: int) -> dict:
+    """`benchFindSolutionBrackets` times `findSolutionBrackets` over an epsilon range holding the first `states` states of both parities."""
+
+    xValues: NDArray = case.grid(xStep)
+    epsilonRange: NDArray = np.linspace(0, states, 100 * states)
+
+    def sweep() -> list[br.Bracket]:
+        return harmonic.findSolutionBrackets(case.model, xValues, epsilonRange, "even") + harmonic.findSolutionBrackets(case.model, xValues, epsilonRange, "odd")
+
+    timing, brackets = measure(sweep, repeat)
+
+    # Every analytic eigenvalue in the range has to be inside exactly one bracket
+    exact: list[float] = [case.spectrum(n) for n in range(states)]
+    found: bool = all(sum(bracket.low <= value <= bracket.high for bracket in brackets) == 1 for value in exact)
+
+    return dict(timing, points=xValues.size, brackets=len(brackets), accurate=found)
+
+# Benchmark the transcendental root finder.
+def benchFindRoots(z0: float, repeat: int) -> dict:
+    """`benchFindRoots` times `findRoots` for both parities of the finite well with depth `z0` and checks the roots."""
+
+    def roots() -> list[float]:
+        return core.findRoots(finite.evenModel, z0, finite.evenOffset) + core.findRoots(finite.oddModel, z0, finite.oddOffset)
+
+    timing, result = measure(roots, repeat)
+
+    # A root solves its own parity equation, the first roots of the list are the even ones
+    evenCount: int = len(core.findRoots(finite.evenModel, z0, finite.evenOffset))
+    residual: float = max([abs(finite.evenModel(z, z0)) for z in result[:evenCount]] + [abs(finite.oddModel(z, z0)) for z in result[evenCount:]])
+
+    return dict(timing, roots=len(result), residual=float(residual), accurate=bool(residual < 1e-8))
+
+# Benchmark the startup of a module.
+def benchStartup(module: str, repeat: int) -> dict:
+    """`benchStartup` times importing `module` in a fresh interpreter, as every worker process and batch job does, and checks
+        that no plotting or optional solver package is loaded by the import.
+    """
+
+    script: str = "import importlib, sys, time\nstart = time.perf_counter()\nimportlib.import_module(%r)\nprint(time.perf_counter() - start)\nprint(','.join(name for name in %r if name in sys.modules))" % (module, heavyModules)
+
+    timings: list[float] = []
+    loaded: str = ""
+    for i in range(repeat):
+        output: list[str] = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.split("\n")
+
+        timings.append(float(output[0]))
+        loaded = output[1]
+
+    return {"best": min(timings), "mean": sum(timings) / len(timings), "repeat": repeat, "loaded": loaded, "accurate": loaded == ""}
+
+# Run every benchmark.
+def runBenchmarks(steps: tuple[float, ...], counts: tuple[int, ...], repeat: int, solver: str = "") -> list[dict]:
+    """`runBenchmarks` runs every benchmark for the grid `steps` and state `counts`, printing each result as it completes."""
+
+    results: list[dict] = []
+
+    def record(name: str, model: str, parameters: dict, result: dict) -> None:
+        entry: dict = dict(name=name, model=model, **parameters, **result)
+        results.append(entry)
+
+        accuracy: str = "" if "accurate" not in entry else (" ok" if entry["accurate"] else " INACCURATE")
+        print("%-20s %-9s %-28s %10.3f ms%s" % (name, model, ", ".join("%s=%s" % item for item in parameters.items()), entry["best"] * 1e3, accuracy))
+
+    for module in startupModules:
+        record("startup", module.split(".")[-2] if module.endswith(".main") else module, dict(), benchStartup(module, repeat))
+
+    cases: list[Case] = buildCases(solver)
+
+    for case in cases:
+        for xStep in steps:
+            parameters: dict = dict(solver=case.model.solver, xStep=xStep)
+
+            record("getSolution", case.name, parameters, benchGetSolution(case, xStep, repeat))
+            record("normaliseSolution", case.name, parameters, benchNormalise(case, xStep, repeat))
+
+            if case.spectrum is None:
+                continue
+
+            # Both shooting modes refine the same brackets, so their iterations and accuracy can be compared
+            shooting: str = itg.getShooting(case.model)
+            for states in counts:
+                for mode in itg.shootingModes:
+                    case.model.shooting = mode
+                    record("solveBracket", case.name, dict(parameters, states=states, shooting=mode), benchSolveBracket(case, xStep, states, repeat))
+
+                case.model.shooting = shooting
+
+                if case.name == "harmonic":
+                    record("findSolutionBrackets", case.name, dict(parameters, states=states), benchFindSolutionBrackets(case, xStep, states, repeat))
+
+    for z0 in z0Values:
+        record("findRoots", "finite", dict(z0=z0), benchFindRoots(z0, repeat))
+
+    return results
+
+# Compare results with an earlier run.
+def compareResults(results: list[dict], baseline: list[dict]) -> None:
+    """`compareResults` prints the best time ratio of every benchmark also present in the `baseline` run (above 1 means slower now)."""
+
+    def identify(entry: dict) -> tuple:
+        return tuple(sorted((name, entry[name]) for name in ("name", "model", "solver", "xStep", "states", "shooting", "z0") if name in entry))
+
+    previous: dict = {identify(entry): entry for entry in baseline}
+
+    print("\nComparison with the baseline (current / baseline):")
+    for entry in results:
+        old: dict = previous.get(identify(entry))
+
+        if old is None:
+            continue
+
+        ratio: float = entry["best"] / old["best"]
+        flag: str = " SLOWER" if ratio > 1.1 else (" faster" if ratio < 0.9 else "")
+
+        print("%-20s %-9s %-40s %6.2fx%s" % (entry["name"], entry["model"], ", ".join("%s=%s" % item for item in identify(entry)[2:] if item[0] not in ("name", "model")), ratio, flag))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the shooting, bracketing and normalisation hot paths.")
+    parser.add_argument("--output", default="benchmarks/results/latest.json", help="JSON file the results are written to")
+    parser.add_argument("--compare", default="", help="earlier results JSON file to compare against")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per benchmark, the best time is reported")
+    parser.add_argument("--solver", default="", help="integration engine forced onto every model (default keeps the model own)")
+    parser.add_argument("--quick", action="store_true", help="only run the coarse grids")
+    arguments = parser.parse_args()
+
+    results: list[dict] = runBenchmarks(quickSteps if arguments.quick else xSteps, stateCounts, arguments.repeat, arguments.solver)
+
+    report: dict = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "results": results
+    }
+
+    os.makedirs(os.path.dirname(arguments.output) or ".", exist_ok=True)
+    with open(arguments.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print("\nResults written to %s." % arguments.output)
+
+    if arguments.compare != "":
+        with open(arguments.compare) as file:
+            compareResults(results, json.load(file)["results"])
+
+    if not all(entry.get("accurate", True) for entry in results):
+        print("Warning: some benchmarks did not reach the expected accuracy.")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ import util.simulation as sm
 import util.solution as sl
 import util.core as core
 import util.bracket as br
+import util.integrator as itg
+import util.scan as scan
+import util.instrument as ins
 
 # Creating a class for the harmonic oscillator model
 class HarmonicOscillator(sm.ModelSystem):
@@ -14,24 +17,31 @@ class HarmonicOscillator(sm.ModelSystem):
         #   label: str              - name of the model system
         #   initialConditions: dict - model system initial conditions
         #   dataPath: str           - path to simulation data
+        #   solver: str             - integration engine used by the simulation
+        #   energyScale: float      - factor in front of (V(x) - epsilon) in the model equation
     """
 
     # Harmonic Oscillator model constructor
     def __init__(self) -> None:
         self.label: str = "Harmonic Oscillator"
         self.dataPath: str = "simulations/harmonic-oscillator/data"
+        self.solver: str = "numerov" # Fixed-step solver lets the bracket search sweep every epsilon in one pass
+        self.energyScale: float = 1
         self.initialConditions: dict = {
             "odd": [0, 1],
             "even": [1, 0]
         }
 
-    # Defining the model system function as per the differential equations provided
-    @staticmethod # Just instruct the class to not inject 'self' as function argument
-    def system(y, x, epsilon: float) -> list:
+    # Defining the model potential as per the differential equation provided: psi'' = (x^2 / 4 - epsilon) * psi
+    def potential(self, x: NDArray) -> NDArray:
+        """Harmonic Oscillator potential."""
 
-        y1 , y2 = y # Unpacking psi and psi'
+        return 0.25 * (x**2)
 
-        return[y2, (0.25 * (x**2) - epsilon) * y1] # Returns rhs values of the system differential equations for psi' and psi''
+    def potentialScalar(self, x: float) -> float:
+        """Harmonic Oscillator potential for a single `x`, without NumPy overhead."""
+
+        return 0.25 * x * x
     
 # Defining a function to find the epsilon brackets that we can use to find the valid solutions
 def findSolutionBrackets(model: sm.ModelSystem, xValues: NDArray, epsilonRange: NDArray, parity: str) -> dict[tuple[float, float], str]:
@@ -40,19 +50,12 @@ def findSolutionBrackets(model: sm.ModelSystem, xValues: NDArray, epsilonRange:
         epsilon bracket ranges where solutions of a given `parity` may be found, paired with the parity.
     """
 
-    # From the epsilon range compute a new epsilon list full of epsilon objects
-    epsilonList: list = []
-    for epsilon in epsilonRange:
-        epsilonList.append(core.Epsilon(epsilon, parity))
-    
-    # Solutions for all epsilons in list
-    solutions: list[sl.Solution] = core.solveEpsilonList(model, xValues, epsilonList)
+    # Solving the wavefunction for all sampled epsilons at once assuming initial conditions according to parity, and keeping only the endpoint values
+    # With a fixed-step batched solver the whole sweep is a single pass over the grid
+    yEndpoints: NDArray = itg.integrateBatch(model, xValues, epsilonRange, parity)[-1]
 
-    # Initialising list of endpoints of sampled solutions
-    yEndpoints: list = []
-    # Solving the wavefunction for the sampled epsilons assuming initial conditions according to parity, and storing the endpoint values in a list
-    for solution in solutions:
-        yEndpoints.append(solution.result[-1])
+    # Bracket refinement starts from these epsilons, so keep their endpoints for it
+    br.memoiseEndpoints(model, xValues, epsilonRange, parity, yEndpoints)
 
     # Computed brackets
     solutionBrackets: [br.Bracket] = []
@@ -70,7 +73,6 @@ def findSolutionBrackets(model: sm.ModelSystem, xValues: NDArray, epsilonRange:
 xMin: float = 0
 xMax: float = 7
 xStep: float = 0.005
-xValues: NDArray = np.linspace(xMin, xMax, int(xMax/xStep))
 
 # Specifying epsilon range and step
 epsilonMin: float = 0
@@ -78,6 +80,9 @@ epsilonMax: float = 5
 epsilonStep: float = 0.01
 epsilonRange: NDArray = np.linspace(epsilonMin, epsilonMax, int(epsilonMax/epsilonStep))
 
+# Available to the command line runner as `python -m util harmonic`
+sm.registerModel("harmonic", HarmonicOscillator, xMin, xMax, xStep)
+
 def main() -> None:
     # Defining HarmonicOscillator modelSystem
     model : HarmonicOscillator = HarmonicOscillator()
@@ -89,13 +94,20 @@ def main() -> None:
     # Specifying simulation parameters, particularly for the bracketEnergyState() function
     model.iterationCount = 32
     model.approximation = 1e-16
+    model.refinement = "brent" # Superlinear refinement needs far fewer integrations than bisection
+
+    # Record where the run time goes, the report is saved next to the plot
+    simulation.modifyReport(True, ("json", "trace"))
 
     # Combining the odd and even solution backets into one dictionary
     solutionBrackets: list[br.Bracket] = []
 
     # Finding the odd and even solution brackets
-    evenBrackets: list[br.Bracket] = findSolutionBrackets(model, xValues, epsilonRange, "even")
-    oddBrackets: list[br.Bracket] = findSolutionBrackets(model, xValues, epsilonRange, "odd")
+    # The adaptive scan only subdivides epsilon intervals that contain a solution, unlike the uniform `findSolutionBrackets` sweep
+    # It runs on the simulation grid, so refining the brackets reuses the memoised endpoints of the scan
+    with ins.stage("discovery"):
+        evenBrackets: list[br.Bracket] = scan.scanBrackets(model, simulation.xValues, epsilonMin, epsilonMax, "even")
+        oddBrackets: list[br.Bracket] = scan.scanBrackets(model, simulation.xValues, epsilonMin, epsilonMax, "odd")
     
     solutionBrackets.extend(evenBrackets)
     solutionBrackets.extend(oddBrackets)
@@ -106,8 +118,11 @@ def main() -> None:
     # Running the bracket simulation for the solution brackets found
     sm.bracketSimulation(simulation, model, solutionBrackets, plot=True)
 
+    print(simulation.report)
+
     print("Done running the %s simulation." % model.label)
 
     return
 
-main()   
+if __name__ == "__main__":
+    main()
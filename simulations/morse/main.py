@@ -0,0 +1,81 @@
+# Package imports
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.simulation as sm
+import util.solution as sl
+
+class MorsePotential(sm.PotentialModel):
+    """Morse potential model: psi'' = (V(x) - epsilon) * psi with V(x) = lambda^2 * (e^(-2x) - 2 * e^(-x)). \n
+       The potential is asymmetric, so the states are shot over the whole grid with the full domain initial conditions.
+
+       Class variables:
+        #   label: str              - name of the model system
+        #   initialConditions: dict - model system initial conditions
+        #   dataPath: str           - path to simulation data
+        #   solver: str             - integration engine used by the simulation
+        #   energyScale: float      - factor in front of (V(x) - epsilon) in the model equation
+        #   depth: float            - lambda, the well is lambda^2 deep and holds the states n < lambda - 1/2
+        #   shooting: str           - shooting mode used by the bracket refinement
+    """
+
+    # Morse potential model constructor
+    def __init__(self, depth: float = 6.0) -> None:
+        super().__init__(self.morse, "Morse Potential", "simulations/morse/data", 1, False)
+
+        self.depth: float = depth
+        # The tails of the shallow states decay slowly and blow up when shot outward: with odeint the n = 5 state is off by 0.13
+        # outward and by 2e-7 matched, for 228 instead of 184 odeint calls
+        self.shooting: str = "matched"
+
+    def morse(self, x: NDArray) -> NDArray:
+        """Morse potential of the model `depth`."""
+
+        return self.depth**2 * (np.exp(-2 * x) - 2 * np.exp(-x))
+
+# Analytic bound state energies.
+def exactEnergy(depth: float, n: int) -> float:
+    """`exactEnergy` returns the energy of the `n`-th bound state of the Morse well: epsilon_n = -(lambda - n - 1/2)^2."""
+
+    return -(depth - n - 0.5)**2
+
+# Count the bound states.
+def boundStates(depth: float) -> int:
+    """`boundStates` returns the number of bound states of the Morse well, the states n with n < lambda - 1/2."""
+
+    return int(np.ceil(depth - 0.5))
+
+# The start value of integration, where the repulsive wall has long made the wavefunction vanish
+xMin: float = -2
+# The end value of integration, far enough for the weakest bound state to decay
+xMax: float = 30
+# The step value
+xStep: float = 0.005
+# Well depth parameter lambda
+depth: float = 6.0
+
+# Available to the command line runner as `python -m util morse`
+sm.registerModel("morse", MorsePotential, xMin, xMax, xStep, states=boundStates(depth), epsilonMin=-depth**2)
+
+def main() -> None:
+    model: MorsePotential = MorsePotential(depth)
+
+    simulation: sm.Simulation = sm.Simulation("%s Simulation for lambda = %g" % (model.label, depth))
+    simulation.modifyGrid(xMin, xMax, xStep, xLabel="Position x (Dimensionless)", yLabel="Wavefunction values")
+    simulation.modifyModel(model)
+
+    # Every bound state is located by counting nodes, starting from the bottom of the well
+    solutions: sl.SolutionSet = simulation.runStates(0, boundStates(depth) - 1, epsilonMin=-depth**2)
+
+    for n, solution in enumerate(solutions):
+        print("n = %d: epsilon = %.6f, exact %.6f" % (n, solution.epsilon, exactEnergy(depth, n)))
+
+    simulation.plot()
+
+    print("Done running the %s simulation." % model.label)
+
+    return
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
 # Package imports
 import numpy as np
-from scipy.constants import pi
+from math import pi
 from numpy.typing import NDArray
-import math
 
 # Custom imports
 import util.simulation as sm
 import util.core as core
-import util.plot as plot
+import util.solution as sl
 import util.bracket as br
 
 class FiniteWellPotential(sm.ModelSystem):
@@ -17,34 +16,40 @@ class FiniteWellPotential(sm.ModelSystem):
         #   label: str              - name of the model system
         #   initialConditions: dict - model system initial conditions
         #   dataPath: str           - path to simulation data
+        #   solver: str             - integration engine used by the simulation
+        #   energyScale: float      - factor in front of (V(x) - epsilon) in the model equation
+        #   v0: float               - potential depth outside the well
     """
 
-    # Infinite well potential model constructor
-    def __init__(self) -> None:
+    # Finite well potential model constructor
+    def __init__(self, v0: float = 8.0) -> None:
         self.label: str = "Finite Well Potential"
         self.dataPath: str = "simulations/well/finite/data"
+        self.solver: str = "odeint"
+        self.energyScale: float = pi**2
+        self.v0: float = v0
         self.initialConditions: dict = {
             "odd": [0, 1],
             "even": [1, 0]
         }
 
-    @staticmethod # Just instruct the class to not inject 'self' as function argument
-    def system(y, x, epsilon: float) -> list:
-        """Finite Well Potential model system structure."""
+    def potential(self, x: NDArray) -> NDArray:
+        """Finite Well Potential model potential."""
 
-        psi, dpsi = y # psi and psi derivative
+        return computeV(x, self.v0)
 
-        v = computeV(x) # potential
+    def potentialScalar(self, x: float) -> float:
+        """Finite Well Potential for a single `x`, without the `np.piecewise` call of `computeV`."""
 
-        return [dpsi, pi**2 * (v - epsilon) * psi]
+        return self.v0 if abs(x) > wellWall else 0.0
 
 V0: float = 8.0 # Some debug potential outside the well
 
 # Computes the potential.
-def computeV(x: float) -> NDArray:
-    """`computeV` returns piecewise smoothed function values based on `x`."""
+def computeV(x: float, v0: float = V0) -> NDArray:
+    """`computeV` returns piecewise smoothed function values based on `x` for the depth `v0`."""
     
-    return np.piecewise(x, [np.abs(x) <= wellWall, np.abs(x) > wellWall], [0, V0])
+    return np.piecewise(x, [np.abs(x) <= wellWall, np.abs(x) > wellWall], [0, v0])
 
 # Model for even solutions.
 def evenModel(z, z0) -> NDArray:
@@ -53,26 +58,6 @@ def evenModel(z, z0) -> NDArray:
     # sqrt(z0**2 + z**2) = z * tan(z)
     return np.sqrt(z0**2 - z**2) - z * np.tan(z)
 
-# Guesses for even solutions (n = 1,3,5,…).
-def evenGuesses(z0: float) -> list[float]:
-    """`evenGuesses` computes all approximate estimates for even solutions."""
-    
-    guesses: list[float] = []
-    
-    # Generate (2k−1)*π/2 up through the last half-π before z0
-    kMax: int = math.ceil(z0 / pi)
-    for k in range(1, kMax + 1):
-        guess: float = (2*k - 1) * pi / 2
-    
-        if guess < z0:
-            guesses.append(guess)
-
-    # ensure at least one for very shallow wells
-    if not guesses and z0 > 0:
-        guesses.append(z0 / 2)
-    
-    return guesses
-
 # Model for odd solutions.
 def oddModel(z, z0) -> NDArray:
     """`oddModel` returns odd model solutions for z values."""
@@ -81,36 +66,42 @@ def oddModel(z, z0) -> NDArray:
         # sqrt(z0**2 + z**2) = -z / tan(z)
         return np.sqrt(z0**2 - z**2) + z / np.tan(z)
 
-# Guesses for odd solutions (n = 2,4,6,…).
-def oddGuesses(z0: float) -> list[float]:
-    """`oddGuesses` computes all approximate estimates for odd solutions."""
-    
-    guesses: list[float] = []
-    
-    # Generate k*π up through the last π before z0
-    kMax: int = math.ceil(z0 / pi)
-    for k in range(1, kMax + 1):
-        guess: float = k * pi
+# Branch offsets: even roots lie in [k*pi, k*pi + pi/2], odd roots in [k*pi + pi/2, (k + 1)*pi]
+evenOffset: float = 0
+oddOffset: float = pi / 2
 
-        if guess < z0:
-            guesses.append(guess)
+# Bound state table column layout.
+depthTableType: np.dtype = np.dtype([("z0", float), ("v0", float), ("state", int), ("parity", "U4"), ("z", float), ("epsilon", float)])
 
-    return guesses
+# Computes the bound states of many well depths at once.
+def sweepDepths(z0Values: NDArray) -> NDArray:
+    """`sweepDepths` solves the even and odd transcendental equations for every depth in `z0Values` in one vectorized pass. \n
+        Returns a structured table with one row per bound state: z0, v0, state index, parity, z and epsilon, sorted by depth and state.
+    """
 
-# Computes the epsilon energy brackets for simulation.
-def findEnergy(model: "sm.ModelSystem", z0: float, xValues: NDArray) -> dict[tuple[float, float], str]:
-    """`findEnergy` computes all even and odd epsilon energy brackets for a given `z0` and `model`."""
-    
-    evenRoots: list[float] = core.findRoots(evenModel, evenGuesses(z0), z0)    
-    oddRoots: list[float] = core.findRoots(oddModel, oddGuesses(z0), z0)
+    z0Values = np.atleast_1d(np.asarray(z0Values, dtype=float))
+
+    if z0Values.size == 0:
+        return np.empty(0, dtype=depthTableType)
 
-    print("len of bound states for z0: ", len(evenRoots+oddRoots))
+    rows: list[NDArray] = []
+    for parity, function, offset, stateOffset in (("even", evenModel, evenOffset, 0), ("odd", oddModel, oddOffset, 1)):
+        # A branch only holds a bound state when it starts below z0, the root then lies below z0 as well
+        lows, highs, z0Valid, branches = core.branchIntervals(z0Values, offset)
 
-    # Even though we found the roots, it would be better to bracket through and approxiamte the solution even further
-    evenBrackets: list[br.Bracket] = br.computeBrackets(evenRoots, "even")
-    oddBrackets: list[br.Bracket] = br.computeBrackets(oddRoots, "odd")
+        roots: NDArray = core.bisectRoots(function, lows, highs, (z0Valid,))
 
-    return evenBrackets + oddBrackets
+        table: NDArray = np.empty(roots.size, dtype=depthTableType)
+        table["z0"] = z0Valid
+        table["v0"] = (2 * z0Valid / pi)**2
+        table["state"] = 2 * branches + stateOffset
+        table["parity"] = parity
+        table["z"] = roots
+        table["epsilon"] = (2 * roots / pi)**2
+
+        rows.append(table)
+
+    return np.sort(np.concatenate(rows), order=["z0", "state"])
 
 # The start value of integration
 xMin: float = 0
@@ -123,40 +114,46 @@ xStep: float = 0.005
 # Initial z0 list
 z0List: list[float] = [1, 5, 8, 14]
 
+# Available to the command line runner as `python -m util finite`, the default depth v0 = 8 holds 3 bound states
+sm.registerModel("finite", FiniteWellPotential, xMin, xMax, xStep, wellWall, 3)
+
 def main() -> None:
     # Initial finite well potential model used for the simulation
     model: FiniteWellPotential = FiniteWellPotential()
 
     # Simulation object with default/specified configuration
-    simulation: sm.Simulation = sm.Simulation("%s Simulation for V0 = %.1f" % (model.label, V0))
+    simulation: sm.Simulation = sm.Simulation("%s Simulation for z0 = %s" % (model.label, ", ".join("%g" % z0 for z0 in z0List)))
     simulation.modifyGrid(xMin, xMax, xStep, wellWall, "v0 (Dimensionless)", "Wavefunction values")
-    
-    # List for holding computed brackets, which will be used to approximate bounding state solutions
-    bracketList: list[br.Bracket] = []
+    simulation.modifyModel(model)
+
+    # Bound state energies for every depth, found in one vectorized sweep
+    depthTable: NDArray = sweepDepths(np.array(z0List))
+
+    # Solutions of every depth
+    solutions: sl.SolutionSet = sl.SolutionSet(simulation.xValues)
 
-    # Compute all epsilon brackets from initial z0
     for z0 in z0List:
-        print("z0 = ", z0)
-        newStates: list[br.Bracket] = findEnergy(model, z0, simulation.xValues)
+        states: NDArray = depthTable[depthTable["z0"] == z0]
+        v0: float = (2 * z0 / pi)**2
 
-        # Problem asks for 2 specific v0
-        if len(newStates) == 1 or len(newStates) == 2 or len(newStates) == 4:
-            v0 = (2 * z0 / pi)**2
+        print("z0 = ", z0)
+        print("v0 = %.2f has %d bounding states." % (v0, states.size))
 
-            print("v0 = %.2f has %d bounding states." % (v0 , len(newStates)))
+        # Every depth is simulated with its own potential
+        model.v0 = v0
 
-        bracketList.extend(newStates)
+        # Even though we found the roots, it would be better to bracket through and approxiamte the solution even further
+        evenBrackets: list[br.Bracket] = br.computeBrackets(states["z"][states["parity"] == "even"], "even")
+        oddBrackets: list[br.Bracket] = br.computeBrackets(states["z"][states["parity"] == "odd"], "odd")
 
-    # sm.bracketSimulation(simulation, model, bracketList, True)
-    simulation.modifyModel(model)
-    solutions = simulation.runBracket(bracketList, False)
+        solutions.extend(simulation.runBracket(evenBrackets + oddBrackets, False))
 
-    # Since solution object initializations are adapted for epsilons, need to hard change the labels into z0 here
+    # Since solution object initializations are adapted for epsilons, need to hard change the labels into z here
     # Although could leave the epsilons as well, but would be more obscure.
     for solution in solutions:
-        z0: float = pi / 2 * np.sqrt(solution.epsilon)
+        z: float = pi / 2 * np.sqrt(solution.epsilon)
 
-        solution.label = "z0 = %.2f" % z0
+        solution.label = "z = %.2f" % z
 
     simulation.solutions = solutions
 
@@ -166,4 +163,5 @@ def main() -> None:
 
     return  
 
-main()
+if __name__ == "__main__":
+    main()
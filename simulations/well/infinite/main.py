@@ -1,5 +1,5 @@
 # Package imports
-from scipy.constants import pi
+from math import pi
 import math
 
 # Custom imports
@@ -14,24 +14,30 @@ class InfiniteWellPotential(sm.ModelSystem):
         #   label: str              - name of the model system
         #   initialConditions: dict - model system initial conditions
         #   dataPath: str           - path to simulation data
+        #   solver: str             - integration engine used by the simulation
+        #   energyScale: float      - factor in front of (V(x) - epsilon) in the model equation
     """
 
     # Infinite well potential model constructor
     def __init__(self) -> None:
         self.label: str = "Infinite Well Potential"
         self.dataPath: str = "simulations/well/infinite/data"
+        self.solver: str = "odeint"
+        self.energyScale: float = pi**2
         self.initialConditions: dict = {
             "odd": [0, 1],
             "even": [1, 0]
         }
 
-    @staticmethod # Just instruct the class to not inject 'self' as function argument
-    def system(y, x, epsilon: float) -> list:
-        """Infinite Well Potential model system structure."""
+    def potential(self, x: float) -> float:
+        """Infinite Well Potential inside the well, where psi'' = -pi^2 * epsilon * psi."""
 
-        y1, y2 = y # psi and psi derivative
+        return 0 * x
 
-        return [y2, -pi**2 * epsilon * y1] # dy1dx and dy2dx
+    def potentialScalar(self, x: float) -> float:
+        """Infinite Well Potential for a single `x`."""
+
+        return 0.0
 
 # Determine the wavefunction type: odd or even.
 def checkWavefunctionEvenOdd(epsilon: float) -> str:
@@ -66,6 +72,9 @@ bracketMax: float = 1.1
 modelIteration: int = 25
 modelAppriximation: float = 1e-6
 
+# Available to the command line runner as `python -m util infinite`
+sm.registerModel("infinite", InfiniteWellPotential, xMin, xMax, xStep, wellWall)
+
 def main() -> None:
     model: InfiniteWellPotential = InfiniteWellPotential()
 
@@ -101,4 +110,5 @@ def main() -> None:
 
     return
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
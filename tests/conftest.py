@@ -0,0 +1,21 @@
+# Package imports
+import os
+import sys
+import pytest
+
+# The tests import `util` and the simulations from the repository root, wherever pytest is started from
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Custom imports
+import util.memo as memo
+
+# Start every test on an empty in-memory cache.
+@pytest.fixture(autouse=True)
+def clearMemo():
+    """`clearMemo` empties the shared solution cache, so no test is served the solutions of another."""
+
+    memo.solutionCache.clear()
+
+    yield
+
+    memo.solutionCache.clear()
@@ -0,0 +1,75 @@
+# Package imports
+import importlib
+import os
+import numpy as np
+
+# Custom imports
+import util.simulation as sm
+import util.memo as memo
+import util.cache as ch
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+morse = importlib.import_module("simulations.morse.main")
+
+# Build a cached Morse simulation.
+def buildMorse(depth: float, dataPath: str) -> sm.Simulation:
+    """`buildMorse` returns a simulation of the Morse well of `depth` with its persistent cache under `dataPath`."""
+
+    model: morse.MorsePotential = morse.MorsePotential(depth)
+    model.dataPath = dataPath
+
+    simulation: sm.Simulation = sm.Simulation("Test cached Morse")
+    simulation.modifyGrid(morse.xMin, morse.xMax, 0.01)
+    simulation.modifyModel(model)
+    simulation.modifyCache(16 * 1024**2)
+
+    return simulation
+
+def testEigenCacheHitsAndInvalidation(tmp_path):
+    simulation: sm.Simulation = buildMorse(6, str(tmp_path))
+    first = simulation.runStates(0, 2, epsilonMin=-36)
+
+    assert simulation.cache.hits == 0
+    assert simulation.cache.misses == 3
+
+    # A new simulation of the same model loads every state, without refining any bracket
+    memo.solutionCache.clear()
+    simulation = buildMorse(6, str(tmp_path))
+    second = simulation.runStates(0, 2, epsilonMin=-36)
+
+    assert simulation.cache.hits == 3
+    assert simulation.cache.misses == 0
+    assert np.array_equal(first.epsilons, second.epsilons)
+    assert np.allclose(first.normalised, second.normalised)
+
+    # A changed model parameter misses the cache and finds the states of the new well
+    simulation = buildMorse(5, str(tmp_path))
+    third = simulation.runStates(0, 2, epsilonMin=-25)
+
+    assert simulation.cache.hits == 0
+    assert simulation.cache.misses == 3
+    assert np.allclose(third.epsilons, [morse.exactEnergy(5, n) for n in range(3)], atol=1e-4)
+
+def testEigenCacheEvictsLeastRecentlyUsed(tmp_path):
+    xValues = np.linspace(0, 1, 1001)
+    cache: ch.EigenCache = ch.EigenCache(str(tmp_path))
+
+    for n in range(4):
+        cache.store("entry%d" % n, result=np.full(xValues.size, float(n)))
+        os.utime(cache.filename("entry%d" % n), (n, n))
+
+    # Shrinking the budget to two entries keeps the two most recently used ones
+    cache.maxBytes = 2 * os.path.getsize(cache.filename("entry0"))
+    cache.evict()
+
+    assert sorted(os.path.basename(filename) for filename in cache.entries()) == ["entry2.npz", "entry3.npz"]
+    assert cache.size() <= cache.maxBytes
+
+def testEigenCacheSkipsDamagedEntries(tmp_path):
+    cache: ch.EigenCache = ch.EigenCache(str(tmp_path))
+
+    with open(cache.filename("damaged"), "wb") as file:
+        file.write(b"not an npz file")
+
+    assert cache.load("damaged") is None
+    assert cache.misses == 1
@@ -0,0 +1,45 @@
+# Package imports
+import importlib
+import numpy as np
+from math import pi
+
+# Custom imports
+import util.simulation as sm
+import util.eigen as eigen
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+finite = importlib.import_module("simulations.well.finite.main")
+
+def testEigenSolver():
+    simulation: sm.Simulation = sm.Simulation("Test eigen solver")
+    simulation.modifyGrid(harmonic.xMin, harmonic.xMax, harmonic.xStep)
+    simulation.modifyModel(harmonic.HarmonicOscillator())
+
+    solutions = simulation.runEigen(0, 4)
+
+    assert np.allclose(solutions.epsilons, np.arange(5) + 0.5, atol=1e-3)
+
+    # States of the energy window are sorted by energy
+    window = simulation.runEigen(epsilonWindow=(1, 4))
+
+    assert np.allclose(window.epsilons, [1.5, 2.5, 3.5], atol=1e-3)
+
+def testEigenFiniteWellConvergence():
+    z0: float = 14
+    model: finite.FiniteWellPotential = finite.FiniteWellPotential((2 * z0 / pi)**2)
+    table = finite.sweepDepths(np.array([z0]))
+
+    for parity in ("even", "odd"):
+        exact = np.sort(table["epsilon"][table["parity"] == parity])
+        errors: list[np.ndarray] = []
+
+        for xStep in (0.005, 0.0025):
+            xValues = np.linspace(finite.xMin, finite.xMax, round((finite.xMax - finite.xMin) / xStep) + 1)
+            solutions = eigen.solveEigen(model, xValues, parity, (0, exact.size - 1))
+
+            errors.append(np.abs([solution.epsilon for solution in solutions] - exact))
+
+        # The jump of the potential at the wall keeps the second order of the differences
+        assert errors[1].max() < 2e-2
+        assert np.all(errors[0] / errors[1] > 3.5)
@@ -0,0 +1,99 @@
+# Package imports
+import importlib
+import numpy as np
+import pytest
+from math import pi
+
+# Custom imports
+import util.simulation as sm
+import util.grid as grid
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+morse = importlib.import_module("simulations.morse.main")
+finite = importlib.import_module("simulations.well.finite.main")
+
+def testUniformGridEndsOnMax():
+    xValues = grid.uniformGrid(0, 1, 0.3)
+
+    assert xValues[0] == 0 and xValues[-1] == 1
+    assert grid.isUniform(xValues)
+
+    with pytest.raises(ValueError):
+        grid.uniformGrid(1, 0, 0.1)
+
+def testGradedGridSpacing():
+    model: morse.MorsePotential = morse.MorsePotential(morse.depth)
+    xStep: float = 0.01
+
+    xValues = grid.gradedGrid(model, morse.xMin, morse.xMax, xStep, -0.25)
+    steps = np.diff(xValues)
+
+    assert xValues[0] == morse.xMin and xValues[-1] == morse.xMax
+    assert not grid.isUniform(xValues)
+    assert steps[:-1].max() <= 10 * xStep * (1 + 1e-9)
+
+    # The last step is stretched by at most half a step to end on xMax
+    assert steps[-1] <= 1.5 * 10 * xStep
+
+    # Inside the classically allowed region the step stays xStep
+    allowed = model.tabulatePotential(xValues[:-1]) <= -0.25
+    assert np.allclose(steps[allowed][:-1], xStep)
+
+    # Most of the Morse grid is the slowly decaying tail, which needs far fewer points
+    assert xValues.size < grid.uniformGrid(morse.xMin, morse.xMax, xStep).size / 2
+
+def testGradedMatchesUniform():
+    energies: dict[str, np.ndarray] = {}
+
+    for spacing in grid.spacings:
+        model: morse.MorsePotential = morse.MorsePotential(morse.depth)
+        model.approximatation = 1e-12
+        model.iterationCount = 80
+
+        simulation: sm.Simulation = sm.Simulation("Test %s grid" % spacing)
+        simulation.modifyGrid(morse.xMin, morse.xMax, 0.005, spacing=spacing, epsilonMax=-0.25)
+        simulation.modifyModel(model)
+
+        energies[spacing] = simulation.runStates(0, 5, epsilonMin=-36).epsilons
+
+    exact = [morse.exactEnergy(morse.depth, n) for n in range(6)]
+
+    assert np.allclose(energies["graded"], energies["uniform"], atol=1e-6)
+    assert np.allclose(energies["graded"], exact, atol=1e-6)
+
+def testAdaptGrid():
+    model: harmonic.HarmonicOscillator = harmonic.HarmonicOscillator()
+    model.approximatation = 1e-12
+    model.iterationCount = 80
+
+    simulation: sm.Simulation = sm.Simulation("Test adaptive grid")
+    simulation.modifyGrid(harmonic.xMin, harmonic.xMax, 0.1, spacing="graded")
+    simulation.modifyModel(model)
+
+    error: float = simulation.adaptGrid(1e-6, 0, 3)
+
+    assert error < 1e-6
+    assert simulation.xStep < 0.1
+    assert np.allclose(simulation.estimateEnergies(simulation.xValues, 0, 3), np.arange(4) + 0.5, atol=1e-5)
+
+    # No state can be found above the top of the grid
+    with pytest.raises(ValueError):
+        simulation.adaptGrid(1e-6, 40, 41, 1000)
+
+def testAdaptGridObservedOrder():
+    # The jump of the finite well potential makes Numerov converge slower than its 4th order
+    model: finite.FiniteWellPotential = finite.FiniteWellPotential()
+    model.solver = "numerov"
+
+    simulation: sm.Simulation = sm.Simulation("Test adaptive grid order")
+    simulation.modifyGrid(finite.xMin, finite.xMax, 0.05)
+    simulation.modifyModel(model)
+
+    error: float = simulation.adaptGrid(3e-3, 0, 2)
+
+    table = finite.sweepDepths(np.array([pi / 2 * np.sqrt(model.v0)]))
+    energies = simulation.estimateEnergies(simulation.xValues, 0, 2, 0, "shooting", 1e-6)
+
+    assert error < 3e-3
+    assert np.all(np.abs(energies - np.sort(table["epsilon"])) < 3e-3)
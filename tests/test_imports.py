@@ -0,0 +1,29 @@
+# Package imports
+import os
+import subprocess
+import sys
+import pytest
+
+# Custom imports
+import util
+
+# Repository root, the working directory of the fresh interpreters
+root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import a statement in a fresh interpreter.
+def importFresh(statement: str) -> subprocess.CompletedProcess:
+    """`importFresh` runs `statement` in a new interpreter, so no module is loaded before it."""
+
+    return subprocess.run([sys.executable, "-c", statement], cwd=root, capture_output=True, text=True)
+
+@pytest.mark.parametrize("module", util.submodules)
+def testSubmoduleImportsAlone(module: str):
+    result = importFresh("import util.%s" % module)
+
+    assert result.returncode == 0, result.stderr
+
+@pytest.mark.parametrize("name", list(util.exports))
+def testExportsLoadOnAccess(name: str):
+    result = importFresh("import util; util.%s; from util import %s" % (name, name))
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,26 @@
+# Package imports
+import importlib
+import warnings
+import numpy as np
+
+# Custom imports
+import util.simulation as sm
+import util.integrator as itg
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+morse = importlib.import_module("simulations.morse.main")
+
+def testOdeintEndpointCoversLongGrids():
+    model: morse.MorsePotential = morse.MorsePotential(morse.depth)
+    model.solver = "odeint"
+
+    xValues = np.linspace(morse.xMin, morse.xMax, round((morse.xMax - morse.xMin) / morse.xStep) + 1)
+    epsilonValues = np.array([morse.exactEnergy(morse.depth, n) + 0.1 for n in range(3)])
+
+    # Requesting only the endpoint must not run out of internal odeint steps on the long Morse grid
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+
+        endpoints = itg.integrateBatch(model, xValues, epsilonValues, "even", endpointOnly=True)
+
+    assert np.allclose(endpoints, itg.integrateBatch(model, xValues, epsilonValues, "even")[-1], rtol=1e-4)
@@ -0,0 +1,62 @@
+# Package imports
+import importlib
+import numpy as np
+
+# Custom imports
+import util.simulation as sm
+import util.solution as sl
+import util.memo as memo
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+morse = importlib.import_module("simulations.morse.main")
+
+def testMemoHitsOnRepeatedRun():
+    simulation: sm.Simulation = sm.Simulation("Test memo")
+    simulation.modifyGrid(harmonic.xMin, harmonic.xMax, harmonic.xStep)
+    simulation.modifyModel(harmonic.HarmonicOscillator())
+
+    first = simulation.runStates(0, 3)
+    misses: int = memo.solutionCache.misses
+
+    second = simulation.runStates(0, 3)
+
+    # The repeated run is served from the memo entirely
+    assert memo.solutionCache.misses == misses
+    assert memo.solutionCache.hits > 0
+    assert np.array_equal(first.epsilons, second.epsilons)
+
+def testMemoKeyFollowsModelParameters():
+    model: morse.MorsePotential = morse.MorsePotential(6)
+    xValues = np.linspace(morse.xMin, morse.xMax, 101)
+
+    context: tuple = memo.contextKey(model, xValues)
+
+    assert memo.contextKey(morse.MorsePotential(6), xValues) == context
+
+    model.depth = 5
+
+    assert memo.contextKey(model, xValues) != context
+
+    # Potential functions sharing a name are told apart by their code
+    assert memo.contextKey(sm.PotentialModel(lambda x: x**2), xValues) != memo.contextKey(sm.PotentialModel(lambda x: x**4), xValues)
+
+def testMemoByteBudget():
+    xValues = np.linspace(0, 1, 1001)
+    cache: memo.SolutionCache = memo.SolutionCache(maxBytes=10 * 2 * xValues.nbytes)
+
+    for n in range(20):
+        solution: sl.Solution = sl.createSolution(xValues, np.sin((n + 1) * np.pi * xValues), n, "even", True)
+        cache.put(("solution", n), solution)
+        cache.put(("endpoint", n), 0.0)
+
+    # Every solution holds its raw and normalised wavefunction, the least recently used ones are evicted to stay in budget
+    assert cache.bytes <= cache.maxBytes
+    assert cache.bytes == sum(memo.valueBytes(value) for value in cache.entries.values())
+    assert cache.get(("solution", 19)) is not None
+    assert cache.get(("solution", 0)) is None
+
+    # Replacing an entry does not count its old arrays twice
+    cache.put(("solution", 19), cache.get(("solution", 19)))
+
+    assert cache.bytes == sum(memo.valueBytes(value) for value in cache.entries.values())
@@ -0,0 +1,37 @@
+# Package imports
+import importlib
+import os
+import numpy as np
+
+# Custom imports
+import util.simulation as sm
+import util.solution as sl
+import util.results as rs
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+
+def testResultsRoundTrip(tmp_path):
+    model: harmonic.HarmonicOscillator = harmonic.HarmonicOscillator()
+    model.dataPath = str(tmp_path)
+
+    simulation: sm.Simulation = sm.Simulation("Test results")
+    simulation.modifyGrid(harmonic.xMin, harmonic.xMax, harmonic.xStep)
+    simulation.modifyModel(model)
+    simulation.modifyResults("npy")
+
+    solutions = simulation.runStates(0, 3)
+    simulation.closeResults()
+
+    stored: sl.SolutionSet = rs.openResults(os.path.join(str(tmp_path), "results", simulation.title))
+
+    assert len(stored) == len(solutions)
+    assert np.array_equal(stored.epsilons, solutions.epsilons)
+    assert np.array_equal(stored.parities, solutions.parities)
+    assert np.array_equal(stored.xValues, simulation.xValues)
+    assert np.allclose(stored.normalised, solutions.normalised)
+
+    # Single states are light views over the stored rows
+    assert stored[2].epsilon == solutions[2].epsilon
+    assert stored[2].type == "even"
+    assert np.allclose(stored[2].normalised, solutions[2].normalised)
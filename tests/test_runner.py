@@ -0,0 +1,32 @@
+# Package imports
+import pytest
+
+# Custom imports
+import util.runner as runner
+
+runner.discoverModels()
+
+@pytest.mark.parametrize("name, value", [("method", "foo"), ("spacing", "foo"), ("solver", "foo"), ("refinement", "foo"), ("shooting", "foo"), ("results", "foo")])
+def testBuildPointsRejectsUnknownSettings(name: str, value: str):
+    with pytest.raises(ValueError):
+        runner.buildPoints([{"model": "harmonic", name: value}], {})
+
+def testBuildPointsRejectsUnknownParameters():
+    with pytest.raises(ValueError):
+        runner.buildPoints([{"model": "harmonic", "parameters": {"depth": 4}}], {})
+
+def testBuildPointsSweepsParameters():
+    points: list[dict] = runner.buildPoints([{"model": "finite", "parameters": {"v0": [4, 8]}, "solver": "rk4"}], {"states": 2})
+
+    assert [point["parameters"] for point in points] == [{"v0": 4}, {"v0": 8}]
+    assert all(point["solver"] == "rk4" and point["states"] == 2 for point in points)
+
+def testRunPointReportsSettingErrors():
+    point: dict = runner.buildPoints([{"model": "harmonic", "states": 2}], {})[0]
+    point["solver"] = "foo"
+
+    # A run point that was never validated fails with an error summary instead of a traceback in the worker
+    summary: dict = runner.runPoint(point)
+
+    assert summary["states"] == 0
+    assert "Unknown solver" in summary["error"]
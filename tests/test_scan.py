@@ -0,0 +1,27 @@
+# Package imports
+import importlib
+import numpy as np
+
+# Custom imports
+import util.scan as scan
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+
+def testCountNodes():
+    xValues = np.linspace(0, 1, 101)
+    psiValues = np.stack([np.sin((n + 1) * np.pi * xValues[:-1] + 0.01) for n in range(3)], axis=1)
+
+    assert list(scan.countNodes(psiValues)) == [0, 1, 2]
+
+def testScanBracketsIsolatesEveryState():
+    model: harmonic.HarmonicOscillator = harmonic.HarmonicOscillator()
+    xValues = np.linspace(harmonic.xMin, harmonic.xMax, 1401)
+
+    for parity, energies in (("even", [0.5, 2.5, 4.5]), ("odd", [1.5, 3.5])):
+        brackets = scan.scanBrackets(model, xValues, 0, 5, parity)
+
+        # One bracket per state, each holding exactly its own eigenvalue
+        assert len(brackets) == len(energies)
+        assert all(bracket.low < energy < bracket.high for bracket, energy in zip(brackets, energies))
+        assert all(bracket.parity == parity for bracket in brackets)
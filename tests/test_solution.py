@@ -0,0 +1,30 @@
+# Package imports
+import numpy as np
+
+# Custom imports
+import util.solution as sl
+
+def testSolutionSetViews():
+    xValues = np.linspace(0, 1, 11)
+    solutions: sl.SolutionSet = sl.SolutionSet(xValues)
+
+    for n in range(3):
+        solutions.append(sl.createSolution(xValues, np.sin((n + 1) * np.pi * xValues), (n + 1)**2, "even" if n % 2 == 0 else "odd", True))
+
+    assert len(solutions) == 3
+    assert solutions.results.shape == (3, xValues.size)
+    assert np.array_equal(solutions.epsilons, [1, 4, 9])
+    assert [solution.type for solution in solutions] == ["even", "odd", "even"]
+    assert np.shares_memory(solutions[1].result, solutions.results)
+
+def testSolutionSetStorageModes():
+    xValues = np.linspace(0, 1, 11)
+    solution: sl.Solution = sl.createSolution(xValues, np.sin(np.pi * xValues), 1, "even", True)
+
+    # Only the normalised rows are kept, in single precision
+    solutions: sl.SolutionSet = sl.SolutionSet.fromSolutions(xValues, [solution] * 4, "normalised", np.float32)
+
+    assert solutions.results.shape == (0, xValues.size)
+    assert solutions.normalised.shape == (4, xValues.size)
+    assert solutions.normalised.dtype == np.float32
+    assert np.allclose(solutions[3].normalised, solution.normalised, atol=1e-6)
@@ -0,0 +1,80 @@
+# Package imports
+import importlib
+import numpy as np
+import pytest
+
+# Custom imports
+import util.simulation as sm
+import util.bracket as br
+
+# Simulation modules, imported by name as the package folders are not valid identifiers
+harmonic = importlib.import_module("simulations.harmonic-oscillator.main")
+infinite = importlib.import_module("simulations.well.infinite.main")
+morse = importlib.import_module("simulations.morse.main")
+
+# Build a simulation of a model.
+def buildSimulation(model: sm.ModelSystem, xMin: float, xMax: float, xStep: float) -> sm.Simulation:
+    """`buildSimulation` returns a simulation of the `model` on the uniform grid from `xMin` to `xMax`."""
+
+    simulation: sm.Simulation = sm.Simulation("Test %s" % model.label)
+    simulation.modifyGrid(xMin, xMax, xStep)
+    simulation.modifyModel(model)
+
+    return simulation
+
+def testInfiniteWellSpectrum():
+    simulation: sm.Simulation = buildSimulation(infinite.InfiniteWellPotential(), infinite.xMin, infinite.xMax, infinite.xStep)
+
+    solutions = simulation.runStates(0, 3)
+
+    assert np.allclose(solutions.epsilons, [1, 4, 9, 16], atol=1e-4)
+
+def testHarmonicOscillatorSpectrum():
+    simulation: sm.Simulation = buildSimulation(harmonic.HarmonicOscillator(), harmonic.xMin, harmonic.xMax, harmonic.xStep)
+
+    solutions = simulation.runStates(0, 4)
+
+    assert np.allclose(solutions.epsilons, np.arange(5) + 0.5, atol=1e-4)
+    assert list(solutions.parities) == [1, -1, 1, -1, 1]
+
+def testMorseSpectrum():
+    simulation: sm.Simulation = buildSimulation(morse.MorsePotential(morse.depth), morse.xMin, morse.xMax, morse.xStep)
+
+    states: int = morse.boundStates(morse.depth)
+    solutions = simulation.runStates(0, states - 1, epsilonMin=-morse.depth**2)
+
+    assert np.allclose(solutions.epsilons, [morse.exactEnergy(morse.depth, n) for n in range(states)], atol=1e-5)
+
+def testMorseMatchedShooting():
+    # The shallowest state blows up when shot outward on the grid cut at xMax, matching keeps it accurate
+    for shooting, tolerance in (("matched", 1e-5), ("outward", 1)):
+        model: morse.MorsePotential = morse.MorsePotential(morse.depth)
+        model.shooting = shooting
+
+        simulation: sm.Simulation = buildSimulation(model, morse.xMin, morse.xMax, morse.xStep)
+        solutions = simulation.runStates(5, 5, epsilonMin=-morse.depth**2)
+
+        assert abs(solutions.epsilons[0] - morse.exactEnergy(morse.depth, 5)) < tolerance
+
+@pytest.mark.parametrize("refinement", br.refinements)
+def testRefinementsAgree(refinement: str):
+    model: harmonic.HarmonicOscillator = harmonic.HarmonicOscillator()
+    model.refinement = refinement
+    model.iterationCount = 60
+    model.approximatation = 1e-10
+
+    simulation: sm.Simulation = buildSimulation(model, harmonic.xMin, harmonic.xMax, harmonic.xStep)
+
+    solutions = simulation.runStates(0, 3)
+
+    assert np.allclose(solutions.epsilons, np.arange(4) + 0.5, atol=1e-4)
+
+def testMissingModelRaises():
+    simulation: sm.Simulation = sm.Simulation("Test")
+    simulation.modifyGrid(0, 1, 0.01)
+
+    with pytest.raises(ValueError):
+        simulation.runStates(0, 1)
+
+    with pytest.raises(ValueError):
+        simulation.runEigen(0, 1)
@@ -1,11 +1,50 @@
-from . import core
-from . import plot
-from . import simulation
-from . import solution
-from . import bracket
-
-from .core import solveEpsilonList, findRoots
-from .plot import defineWellGraph, configureGraph, clearGraph, plotGraph, displayGraph, saveGraph
-from .solution import Solution, getSolution, normaliseSolution, integrateSolution
-from .simulation import ModelSystem, Simulation, solveSimulation, bracketSimulation
-from .bracket import bracketEnergyState, computeBrackets
\ No newline at end of file
+# Package imports
+import importlib
+
+# Submodules of the package, loaded on first access so that importing `util` (or one submodule of it) stays cheap
+submodules: tuple[str, ...] = (
+    "core", "plot", "simulation", "solution", "bracket", "integrator", "parallel", "cache", "memo", "scan", "eigen", "jit", "instrument", "results", "runner", "grid"
+)
+
+# Names exported by the package and the submodule defining them
+exports: dict[str, str] = {}
+for module, names in (
+    ("core", ("solveEpsilonList", "solveEpsilonBatch", "findRoots", "branchIntervals", "bisectRoots")),
+    ("plot", ("defineWellGraph", "configureGraph", "clearGraph", "plotGraph", "displayGraph", "saveGraph", "renderGraph", "exportGraph", "waitExports", "closeExports")),
+    ("solution", ("Solution", "SolutionSet", "SolutionView", "getSolution", "createSolution", "normaliseSolution", "integrateSquared", "integrateSolution")),
+    ("simulation", ("ModelSystem", "PotentialModel", "Simulation", "solveSimulation", "bracketSimulation", "registerModel")),
+    ("bracket", ("bracketEnergyState", "computeBrackets", "solveBracket", "solveEndpoint")),
+    ("integrator", ("integrateBatch", "integrateSpliced", "integrateInward", "integrateMismatch", "rk4Batch", "numerovBatch")),
+    ("parallel", ("mapOrdered",)),
+    ("cache", ("EigenCache",)),
+    ("memo", ("SolutionCache", "solutionCache")),
+    ("scan", ("scanBrackets", "stateBrackets", "countNodes", "modelParities")),
+    ("eigen", ("solveEigen",)),
+    ("instrument", ("RunReport",)),
+    ("results", ("ResultsWriter", "openResults")),
+    ("runner", ("discoverModels", "runPoints")),
+    ("grid", ("uniformGrid", "gradedGrid", "isUniform"))
+):
+    exports.update((name, module) for name in names)
+
+__all__ = list(submodules) + list(exports)
+
+# Load submodules and exported names on first access.
+def __getattr__(name: str):
+    """`__getattr__` imports the submodule `name`, or the submodule defining the exported `name`, when it is first accessed."""
+
+    if name in submodules:
+        return importlib.import_module("%s.%s" % (__name__, name))
+
+    if name in exports:
+        value = getattr(importlib.import_module("%s.%s" % (__name__, exports[name])), name)
+
+        # Later accesses skip this hook
+        globals()[name] = value
+
+        return value
+
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,6 @@
+# Custom imports
+import util.runner as runner
+
+# Command line runner: python -m util --help
+if __name__ == "__main__":
+    runner.main()
@@ -1,11 +1,18 @@
 # Pakcage imports
+from __future__ import annotations
 from numpy.typing import NDArray
-from scipy.constants import pi
+from math import pi
 import numpy as np
+import functools
 
 # Custom imports
 import util.core as core
 import util.solution as sl
+import util.integrator as itg
+import util.parallel as pl
+import util.memo as memo
+import util.jit as jit
+import util.instrument as ins
 
 class Bracket:
     """
@@ -15,6 +22,9 @@ class Bracket:
          #   low: float  - bracket initial low end
          #   high: float - bracket initial high end
          #   parity: str - bracket parity type: odd or even
+
+         #   iterations: int  - refinement iterations used for the last solve of the bracket
+         #   evaluations: int - model integrations used for the last solve of the bracket
     """
 
     def __init__(self, low: float, high: float, parity: str):
@@ -28,14 +38,162 @@ class Bracket:
         self.low = 0
         self.high = 0
         self.parity = ""
+        self.iterations = 0
+        self.evaluations = 0
+
+# Available bracket root refinement strategies
+refinements: tuple[str, ...] = ("bisection", "brent", "illinois", "secant")
+
+class EndpointCache:
+    """
+        Endpoint value cache used while refining a single bracket.
+
+        Class variables:
+         #   model: ModelSystem - model system being shot
+         #   xValues: NDArray   - integration grid
+         #   parity: str        - shooting parity type: odd or even
+         #   match: int         - matching point of two-sided shooting, the cached values are its mismatch instead of endpoints
+         #                        when not negative
+         #   context: tuple     - model and grid part of the memo keys, built once per bracket
+         #   endpoints: dict    - solution endpoint values keyed by epsilon
+         #   evaluations: int   - number of integration passes actually performed, both passes of every mismatch included
+    """
+
+    def __init__(self, model: "simulation.ModelSystem", xValues: NDArray, parity: str, match: int = -1):
+        self.model = model
+        self.xValues = xValues
+        self.parity = parity
+        self.match = match
+        self.context: tuple = memo.contextKey(model, xValues)
+
+        self.endpoints: dict[float, float] = {}
+        self.evaluations: int = 0
+
+    def get(self, epsilon: float) -> float:
+        """`get` returns the solution endpoint (or matching mismatch) for `epsilon`, integrating only when it was not computed before in this bracket or in the run."""
+
+        if epsilon in self.endpoints:
+            return self.endpoints[epsilon]
+
+        kind: str = "endpoint" if self.match < 0 else "mismatch%d" % self.match
+
+        key: tuple = memo.solutionKey(self.context, epsilon, self.parity, kind)
+        endpoint: float = memo.solutionCache.get(key)
+
+        if endpoint is None:
+            if self.match < 0:
+                endpoint = integrateEndpoint(self.model, self.xValues, epsilon, self.parity)
+                self.evaluations += 1
+            else:
+                endpoint = float(itg.integrateMismatch(self.model, self.xValues, np.array([epsilon]), self.parity, self.match)[0])
+                self.evaluations += itg.mismatchIntegrations(self.model)
+            memo.solutionCache.put(key, endpoint)
+
+        self.endpoints[epsilon] = endpoint
+
+        return endpoint
+
+# Computes the solution endpoint for a specific epsilon.
+def solveEndpoint(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float, parity: str) -> float:
+    """`solveEndpoint` integrates the `model` for `epsilon` without storing the trajectory or normalising, returning only psi at the last grid point. \n
+        Endpoints already computed within the run are served from `memo.solutionCache`.
+    """
+
+    key: tuple = memo.solutionKey(memo.contextKey(model, xValues), epsilon, parity, "endpoint")
+    endpoint: float = memo.solutionCache.get(key)
+
+    if endpoint is None:
+        endpoint = integrateEndpoint(model, xValues, epsilon, parity)
+        memo.solutionCache.put(key, endpoint)
+
+    return endpoint
+
+# Integrates the solution endpoint for a specific epsilon.
+def integrateEndpoint(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float, parity: str) -> float:
+    """`integrateEndpoint` always integrates the `model` for `epsilon` in endpoint-only mode."""
+
+    return float(itg.integrateBatch(model, xValues, np.array([epsilon]), parity, endpointOnly=True)[0])
+
+# Record endpoints computed elsewhere, e.g. by a bracket search sweep.
+def memoiseEndpoints(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str, endpoints: NDArray) -> None:
+    """`memoiseEndpoints` stores the `endpoints` of the `epsilonValues` solutions, so refining brackets on them needs no integration."""
+
+    context: tuple = memo.contextKey(model, xValues)
+
+    for epsilon, endpoint in zip(epsilonValues, endpoints):
+        memo.solutionCache.put(memo.solutionKey(context, epsilon, parity, "endpoint"), float(endpoint))
 
 # One of simulation computations.
-def bracketEnergyState(model: "simulation.ModelSystem", xValues: NDArray, bracketList: list[Bracket]) -> list[sl.Solution]:
-    """`bracketEnergyState` finds the energy state approximation using bracketing method based on the `model` and `bracketList[[epsilonHigh, epsilonLow]...]`"""
+def bracketEnergyState(model: "simulation.ModelSystem", xValues: NDArray, bracketList: list[Bracket], executor: str = "serial", workers: int = 0, cache: "ch.EigenCache" = None) -> list[sl.Solution]:
+    """`bracketEnergyState` finds the energy state approximation using bracketing method based on the `model` and `bracketList[[epsilonHigh, epsilonLow]...]`. \n
+        With the `process` executor the brackets are refined concurrently, the solutions keep the order of `bracketList`.
+        With a `cache` brackets solved in previous runs are loaded instead of refined.
+    """
     
     # Final bracketed epsilon approximations
     epsilonRoots: list[core.Epsilon] = []
-    
+
+    iterationCtx, approximatation, refinement = refinementSettings(model)
+
+    # Brackets converged in previous runs are loaded from the persistent cache
+    keys: list[str] = []
+    cachedSolutions: list[sl.Solution] = [None] * len(bracketList)
+    if cache is not None:
+        for i, bracket in enumerate(bracketList):
+            keys.append(cache.key(model, xValues, "bracket", bracket.low, bracket.high, bracket.parity, iterationCtx, approximatation, refinement, itg.getShooting(model), sl.getQuadrature(model)))
+            cachedSolutions[i] = cache.loadSolution(keys[i], xValues)
+
+            if cachedSolutions[i] is not None:
+                bracket.iterations = 0
+                bracket.evaluations = 0
+
+    pendingBrackets: list[Bracket] = [bracket for bracket, solution in zip(bracketList, cachedSolutions) if solution is None]
+
+    # Compute all brackets, every bracket is independent of the others
+    with ins.stage("refine"):
+        refined: list[tuple[float, int, int]] = pl.mapOrdered(functools.partial(refineBracket, model, xValues, iterationCtx, approximatation, refinement), pendingBrackets, executor, workers)
+
+    for bracket, (epsilonRoot, iterations, evaluations) in zip(pendingBrackets, refined):
+        # Workers refine copies of the brackets, so the counts are recorded here
+        bracket.iterations = iterations
+        bracket.evaluations = evaluations
+
+        ins.recordBracket(bracket, epsilonRoot)
+
+        newEpsilon: core.Epsilon = core.Epsilon(epsilonRoot, bracket.parity)
+
+        epsilonRoots.append(newEpsilon)
+
+    # Only the converged roots get their full normalised wavefunction computed
+    with ins.stage("wavefunctions"):
+        solutions: list[sl.Solution] = core.solveEpsilonList(model, xValues, epsilonRoots, executor, workers)
+
+    if cache is None:
+        return solutions
+
+    # Failed roots are dropped from the computed list, so the solutions are matched back by value
+    computedSolutions: dict[tuple[float, str], sl.Solution] = {(solution.epsilon, solution.type): solution for solution in solutions}
+    rootIterator = iter(epsilonRoots)
+
+    for i in range(len(bracketList)):
+        if cachedSolutions[i] is not None:
+            continue
+
+        epsilonRoot: core.Epsilon = next(rootIterator)
+        solution: sl.Solution = computedSolutions.get((epsilonRoot.value, epsilonRoot.parity))
+
+        if solution is not None:
+            cachedSolutions[i] = solution
+            cache.storeSolution(keys[i], solution)
+
+    return [solution for solution in cachedSolutions if solution is not None]
+
+# Determine the model bracket refinement settings.
+def refinementSettings(model: "simulation.ModelSystem") -> tuple[int, float, str]:
+    """`refinementSettings` returns the iteration count, tolerance and refinement strategy requested by the `model`, with their defaults. \n
+        Matched shooting refines with the Illinois method unless the model asks for another strategy.
+    """
+
     iterationCtx: int = 20 # Default iteration count, in the case that the model does not provide a specified count
     if hasattr(model, "iterationCount") and model.iterationCount > 0:
         iterationCtx = model.iterationCount
@@ -44,46 +202,210 @@ def bracketEnergyState(model: "simulation.ModelSystem", xValues: NDArray, bracke
     if hasattr(model, "approximatation"):
         approximatation = model.approximatation
 
-    # Compute all brackets
-    for bracket in bracketList:
-        epsilonRoot: float = solveBracket(model, bracket, xValues, iterationCtx, approximatation)
-        
-        newEpsilon: core.Epsilon = core.Epsilon(epsilonRoot, bracket.parity)
+    # Default refinement, in the case that the model does not provide a specified strategy
+    # The mismatch of matched shooting is smooth in epsilon, so regula falsi converges on it superlinearly
+    refinement: str = "illinois" if itg.getShooting(model) == "matched" else "bisection"
+    if hasattr(model, "refinement") and model.refinement != "":
+        refinement = model.refinement
 
-        epsilonRoots.append(newEpsilon)
+    if refinement not in refinements:
+        raise ValueError("Unknown refinement '%s', expected one of: %s." % (refinement, ", ".join(refinements)))
 
-    solutions: list[sl.Solution] = core.solveEpsilonList(model, xValues, epsilonRoots)
+    return iterationCtx, approximatation, refinement
 
-    return solutions
+# Refines a single bracket, used as the unit of work for executors.
+def refineBracket(model: "sm.ModelSystem", xValues: NDArray, iterationCtx: int, approximatation: float, refinement: str, bracket: Bracket) -> tuple[float, int, int]:
+    """`refineBracket` solves the `bracket` and returns its root epsilon together with the iteration and integration counts."""
 
-# Computes the mid epsilon for a specifc bracket.
-def solveBracket(model: "sm.ModelSystem", bracket: Bracket, xValues: NDArray, iterationCtx: int, approximatation: float) -> float:
-    """`solveBracket` computes the approximated root epsilon value for the given `bracket`."""
-    
-    # Retrieve bracket immediate info
-    epsilonLow, epsilonHigh, parity = bracket.low, bracket.high, bracket.parity
+    epsilonRoot: float = solveBracket(model, bracket, xValues, iterationCtx, approximatation, refinement)
+
+    return epsilonRoot, bracket.iterations, bracket.evaluations
+
+# Computes the root epsilon for a specifc bracket.
+def solveBracket(model: "sm.ModelSystem", bracket: Bracket, xValues: NDArray, iterationCtx: int, approximatation: float, refinement: str = "bisection") -> float:
+    """`solveBracket` computes the approximated root epsilon value for the given `bracket` using the `refinement` strategy. \n
+        The iteration and integration counts are recorded on the `bracket`. \n
+        In `matched` shooting mode the root of the mismatch at the outermost turning point of the bracket midpoint is refined
+        instead of the endpoint, the matching point stays fixed over the bracket so the mismatch is a smooth function of epsilon.
+        The decaying tail lowers the roots below the hard wall ones the brackets were scanned for, so the bracket is widened
+        downward until the mismatch changes sign.
+    """
+
+    matched: bool = itg.getShooting(model) == "matched"
+
+    # The compiled engine runs the whole bisection without returning to the interpreter
+    if refinement == "bisection" and itg.getSolver(model) == "jit" and not matched:
+        epsilonRoot, bracket.iterations, bracket.evaluations = jit.bisectBracket(model, xValues, bracket.parity, bracket.low, bracket.high, iterationCtx, approximatation)
+
+        return epsilonRoot
+
+    # Every epsilon is integrated once, so a bracket end that did not move is never recomputed
+    endpoints: EndpointCache = EndpointCache(model, xValues, bracket.parity, itg.matchIndex(model, xValues, (bracket.low + bracket.high) / 2) if matched else -1)
+
+    epsilonLow: float = bracket.low
+    epsilonHigh: float = bracket.high
+    if matched:
+        epsilonLow = widenBracket(endpoints, epsilonLow, epsilonHigh)
+
+    # Superlinear strategies need the endpoint to change sign over the bracket, otherwise fall back to bisection
+    if refinement in ("brent", "illinois") and np.sign(endpoints.get(epsilonLow)) == np.sign(endpoints.get(epsilonHigh)):
+        print("Warning refining bracket [%f, %f]: no sign change, falling back to bisection." % (epsilonLow, epsilonHigh))
+        refinement = "bisection"
+
+    epsilonRoot: float
+    iterations: int
+    if refinement == "brent":
+        epsilonRoot, iterations = brentBracket(endpoints, epsilonLow, epsilonHigh, iterationCtx, approximatation)
+    elif refinement == "illinois":
+        epsilonRoot, iterations = illinoisBracket(endpoints, epsilonLow, epsilonHigh, iterationCtx, approximatation)
+    elif refinement == "secant":
+        epsilonRoot, iterations = secantBracket(endpoints, epsilonLow, epsilonHigh, iterationCtx, approximatation)
+    else:
+        epsilonRoot, iterations = bisectBracket(endpoints, epsilonLow, epsilonHigh, iterationCtx, approximatation)
+
+    bracket.iterations = iterations
+    bracket.evaluations = endpoints.evaluations
+
+    return epsilonRoot
+
+# Widen a bracket downward until it holds a sign change.
+def widenBracket(endpoints: EndpointCache, epsilonLow: float, epsilonHigh: float, expansions: int = 16) -> float:
+    """`widenBracket` moves the low end down by the current bracket width, doubling it every step, until the values at both ends
+        differ in sign. Returns the new low end, or the last one tried after `expansions` steps.
+    """
+
+    valueHigh: float = endpoints.get(epsilonHigh)
+
+    for i in range(expansions):
+        if np.sign(endpoints.get(epsilonLow)) != np.sign(valueHigh):
+            break
+
+        epsilonLow -= epsilonHigh - epsilonLow
+
+    return epsilonLow
+
+# Plain bisection of a bracket.
+def bisectBracket(endpoints: EndpointCache, epsilonLow: float, epsilonHigh: float, iterationCtx: int, approximatation: float) -> tuple[float, int]:
+    """`bisectBracket` halves the bracket until its width is below `approximatation`. Returns the root and the iterations used."""
 
     # Approximated root epsilon
-    epsilonRoot: float = 0
+    epsilonRoot: float = (epsilonHigh + epsilonLow) / 2
 
+    iterations: int = 0
     for i in range(iterationCtx):
         # If prediction gap is already smaller than `approximation` then its good enough
         if abs(epsilonHigh - epsilonLow) < approximatation:
             break
 
+        iterations += 1
+
         # Midpoint in the prediction gap - current approximation
         epsilonRoot = (epsilonHigh + epsilonLow) / 2
         
-        solutionHigh: sl.Solution = sl.getSolution(model, xValues, epsilonHigh, True, parity)
-        solutionMid: sl.Solution = sl.getSolution(model, xValues, epsilonRoot, True, parity)
+        # Only the sign of the endpoint is needed, so neither trajectory nor normalisation is computed
+        endpointHigh: float = endpoints.get(epsilonHigh)
+        endpointMid: float = endpoints.get(epsilonRoot)
         
         # Depending on what solution is at the wall (where lim x -> L and function 'vanishes), adapt the bounding prediction limits
-        if np.sign(solutionMid.result[-1]) == np.sign(solutionHigh.result[-1]):
+        if np.sign(endpointMid) == np.sign(endpointHigh):
             epsilonHigh = epsilonRoot
         else:
             epsilonLow = epsilonRoot
     
-    return epsilonRoot
+    return epsilonRoot, iterations
+
+# Brent's method on a bracket.
+def brentBracket(endpoints: EndpointCache, epsilonLow: float, epsilonHigh: float, iterationCtx: int, approximatation: float) -> tuple[float, int]:
+    """`brentBracket` finds the endpoint root with Brent's method. Returns the root and the iterations used."""
+
+    # scipy.optimize is only imported by runs refining with Brent's method
+    from scipy.optimize import brentq
+
+    epsilonRoot, result = brentq(endpoints.get, epsilonLow, epsilonHigh, xtol=approximatation, maxiter=iterationCtx, full_output=True, disp=False)
+
+    return epsilonRoot, result.iterations
+
+# Regula falsi with the Illinois modification on a bracket.
+def illinoisBracket(endpoints: EndpointCache, epsilonLow: float, epsilonHigh: float, iterationCtx: int, approximatation: float) -> tuple[float, int]:
+    """`illinoisBracket` finds the endpoint root with the Illinois variant of regula falsi. Returns the root and the iterations used."""
+
+    endpointLow: float = endpoints.get(epsilonLow)
+    endpointHigh: float = endpoints.get(epsilonHigh)
+
+    # Side of the bracket that moved last: -1 for low, 1 for high
+    side: int = 0
+
+    # No previous iterate yet, so the first step never passes the convergence check
+    epsilonRoot: float = np.inf
+    
+    iterations: int = 0
+    for i in range(iterationCtx):
+        iterations += 1
+
+        epsilonPrevious: float = epsilonRoot
+        epsilonRoot = (endpointLow * epsilonHigh - endpointHigh * epsilonLow) / (endpointLow - endpointHigh)
+
+        endpointRoot: float = endpoints.get(epsilonRoot)
+
+        if np.sign(endpointRoot) == np.sign(endpointHigh):
+            epsilonHigh, endpointHigh = epsilonRoot, endpointRoot
+
+            # Halve the stale end when the same end moves twice, which keeps convergence superlinear
+            if side == 1:
+                endpointLow /= 2
+            side = 1
+        elif np.sign(endpointRoot) == np.sign(endpointLow):
+            epsilonLow, endpointLow = epsilonRoot, endpointRoot
+
+            if side == -1:
+                endpointHigh /= 2
+            side = -1
+        else:
+            # Hit the root exactly
+            break
+
+        if abs(epsilonRoot - epsilonPrevious) < approximatation or abs(epsilonHigh - epsilonLow) < approximatation:
+            break
+
+    return epsilonRoot, iterations
+
+# Secant iteration started from the bracket ends.
+def secantBracket(endpoints: EndpointCache, epsilonLow: float, epsilonHigh: float, iterationCtx: int, approximatation: float) -> tuple[float, int]:
+    """`secantBracket` finds the endpoint root with the secant method started from the bracket ends. \n
+        The bracket is narrowed to the sign change around every iterate, iterates that leave it are replaced by its midpoint.
+        Returns the root and the iterations used.
+    """
+
+    bracketLow, bracketHigh = min(epsilonLow, epsilonHigh), max(epsilonLow, epsilonHigh)
+    endpointLow: float = endpoints.get(bracketLow)
+
+    epsilonPrevious, epsilonRoot = epsilonLow, epsilonHigh
+    endpointPrevious, endpointRoot = endpoints.get(epsilonPrevious), endpoints.get(epsilonRoot)
+
+    iterations: int = 0
+    for i in range(iterationCtx):
+        if abs(epsilonRoot - epsilonPrevious) < approximatation or bracketHigh - bracketLow < approximatation or endpointRoot == endpointPrevious:
+            break
+
+        iterations += 1
+
+        epsilonNext: float = epsilonRoot - endpointRoot * (epsilonRoot - epsilonPrevious) / (endpointRoot - endpointPrevious)
+
+        # Replacing stray iterates by the midpoint of the narrowed bracket, not of the initial one, keeps them from repeating
+        if not bracketLow < epsilonNext < bracketHigh:
+            epsilonNext = (bracketLow + bracketHigh) / 2
+
+        endpointNext: float = endpoints.get(epsilonNext)
+
+        if np.sign(endpointNext) == np.sign(endpointLow):
+            bracketLow, endpointLow = epsilonNext, endpointNext
+        else:
+            bracketHigh = epsilonNext
+
+        epsilonPrevious, endpointPrevious = epsilonRoot, endpointRoot
+        epsilonRoot, endpointRoot = epsilonNext, endpointNext
+
+    return epsilonRoot, iterations
 
 # Make bracket pairs from computed values.
 def computeBrackets(roots: list[float], bracketType: str, margin: float = 1e-2) -> list[Bracket]:
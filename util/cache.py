@@ -0,0 +1,190 @@
+# Package imports
+from __future__ import annotations
+import hashlib
+import os
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.solution as sl
+
+# Attribute value types that describe a model parameter
+parameterTypes: tuple = (bool, int, float, str, list, tuple, dict, type(None))
+
+class EigenCache:
+    """
+        Persistent content-addressed eigenstate cache. Every entry is a `.npz` file named by the hash of its key,
+        the least recently used entries are evicted once the directory grows above `maxBytes`.
+
+        Class variables:
+         #   path: str      - cache directory
+         #   maxBytes: int  - maximum total size of the cached entries
+         #   hits: int      - entries loaded from the cache
+         #   misses: int    - lookups that had to be computed
+    """
+
+    def __init__(self, path: str, maxBytes: int = 256 * 1024**2):
+        self.path = path
+        self.maxBytes = maxBytes
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def key(self, model: "simulation.ModelSystem", xValues: NDArray, *parts) -> str:
+        """`key` hashes the `model` identity and parameters, the `xValues` grid and the extra `parts` (solver settings, epsilon, bracket...)."""
+
+        digest = hashlib.sha256()
+
+        digest.update(modelFingerprint(model).encode())
+        digest.update(np.ascontiguousarray(xValues, dtype=float).tobytes())
+
+        # The tabulated potential also captures parameters that live outside the model object
+        if hasattr(model, "potential"):
+            digest.update(np.ascontiguousarray(np.broadcast_to(model.potential(xValues), xValues.shape), dtype=float).tobytes())
+
+        digest.update(repr(parts).encode())
+
+        return digest.hexdigest()
+
+    def filename(self, key: str) -> str:
+        """`filename` returns the entry file for the `key`."""
+
+        return os.path.join(self.path, "%s.npz" % key)
+
+    def load(self, key: str) -> dict:
+        """`load` returns the stored arrays for the `key`, or None when the entry is missing."""
+
+        filename: str = self.filename(key)
+
+        if not os.path.exists(filename):
+            self.misses += 1
+            return None
+
+        try:
+            with np.load(filename) as data:
+                entry: dict = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            # A damaged entry is treated as missing, it will be overwritten
+            self.misses += 1
+            return None
+
+        # Mark the entry as recently used
+        os.utime(filename)
+        self.hits += 1
+
+        return entry
+
+    def store(self, key: str, **arrays) -> None:
+        """`store` saves the `arrays` under the `key` and evicts old entries if the cache grew too large."""
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see partial entries
+        temporary: str = os.path.join(self.path, "%s.%d.tmp.npz" % (key, os.getpid()))
+        np.savez(temporary, **arrays)
+        os.replace(temporary, self.filename(key))
+
+        self.evict()
+
+    def loadSolution(self, key: str, xValues: NDArray) -> "sl.Solution":
+        """`loadSolution` rebuilds a cached solution, or returns None when the `key` is missing."""
+
+        entry: dict = self.load(key)
+
+        if entry is None:
+            return None
+
+        solution: sl.Solution = sl.createSolution(xValues, entry["result"], float(entry["epsilon"]), str(entry["parity"]))
+        solution.normalised = entry["normalised"]
+
+        return solution
+
+    def storeSolution(self, key: str, solution: "sl.Solution") -> None:
+        """`storeSolution` saves the converged `solution` eigenvalue and wavefunction under the `key`."""
+
+        self.store(key, epsilon=np.float64(solution.epsilon), parity=np.str_(solution.type), result=solution.result, normalised=solution.normalised)
+
+    def size(self) -> int:
+        """`size` returns the total size of the cached entries in bytes."""
+
+        return sum(os.path.getsize(filename) for filename in self.entries())
+
+    def entries(self) -> list[str]:
+        """`entries` lists the cached entry files."""
+
+        if not os.path.isdir(self.path):
+            return []
+
+        return [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".npz") and ".tmp." not in name]
+
+    def evict(self) -> None:
+        """`evict` removes the least recently used entries until the cache fits in `maxBytes`."""
+
+        entries: list[tuple[float, int, str]] = []
+        for filename in self.entries():
+            try:
+                status = os.stat(filename)
+            except FileNotFoundError:
+                continue
+
+            entries.append((status.st_mtime, status.st_size, filename))
+
+        totalSize: int = sum(entry[1] for entry in entries)
+
+        for modified, size, filename in sorted(entries):
+            if totalSize <= self.maxBytes:
+                break
+
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+
+            totalSize -= size
+
+    def clear(self) -> None:
+        """`clear` removes every cached entry."""
+
+        for filename in self.entries():
+            os.remove(filename)
+
+# Identify a potential function.
+def functionFingerprint(function) -> str:
+    """`functionFingerprint` describes a callable by its qualified name and, for Python functions, a digest of its bytecode,
+        constants, referenced names and captured parameter values, so functions sharing a name (lambdas) are told apart.
+    """
+
+    name: str = "%s.%s" % (getattr(function, "__module__", ""), getattr(function, "__qualname__", type(function).__qualname__))
+
+    # Bound methods are described by their underlying function
+    function = getattr(function, "__func__", function)
+    code = getattr(function, "__code__", None)
+
+    if code is None:
+        return name
+
+    # Only values with a stable repr enter the digest, which keeps it the same across processes
+    constants: list = [value for value in code.co_consts if isinstance(value, parameterTypes)]
+    captured: list = [cell.cell_contents for cell in function.__closure__ or () if isinstance(cell.cell_contents, parameterTypes)]
+
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr((constants, code.co_names, captured)).encode())
+
+    return "%s:%s" % (name, digest.hexdigest()[:16])
+
+# Identify a model and its parameters.
+def modelFingerprint(model: "simulation.ModelSystem") -> str:
+    """`modelFingerprint` describes the `model` class and its public parameter attributes as a stable string."""
+
+    parameters: list[tuple[str, str]] = []
+    for name, value in sorted(vars(model).items()):
+        if name.startswith("_"):
+            continue
+
+        # Potential functions are told apart by their name and code, their parameters by the attributes they read
+        if callable(value):
+            parameters.append((name, functionFingerprint(value)))
+        elif isinstance(value, parameterTypes):
+            parameters.append((name, repr(value)))
+
+    return "%s.%s%r" % (type(model).__module__, type(model).__qualname__, parameters)
@@ -1,14 +1,18 @@
 # Package imports
+from __future__ import annotations
 import math
+import functools
 import numpy as np
 from numpy.typing import NDArray
-from scipy.optimize import fsolve
-from scipy.constants import pi
+from math import pi
 
 # Custom imports
 import util.solution as sl
 import util.simulation as sm
 import util.bracket as br
+import util.integrator as itg
+import util.parallel as pl
+import util.memo as memo
 
 class Epsilon:
     """
@@ -30,17 +34,37 @@ class Epsilon:
         self.parity = ""
 
 # One of simulation computations. 
-def solveEpsilonList(model: "simulation.ModelSystem", xValues: NDArray, epsilonList: list[Epsilon]) -> list[sl.Solution]:
-    """`solveEpsilonList` computes the solutions for the given `model` and `epsilonList`"""
+def solveEpsilonList(model: "simulation.ModelSystem", xValues: NDArray, epsilonList: list[Epsilon], executor: str = "serial", workers: int = 0, cache: "ch.EigenCache" = None) -> list[sl.Solution]:
+    """`solveEpsilonList` computes the solutions for the given `model` and `epsilonList`. \n
+        With the `process` executor the list is split into ordered chunks solved by separate processes, the output order stays the same.
+        With a `cache` previously computed solutions are loaded instead of integrated.
+    """
     
+    if cache is not None:
+        return solveEpsilonCached(model, xValues, epsilonList, executor, workers, cache)
+
+    # Every worker solves one contiguous chunk serially, which keeps batched solvers batched
+    if executor != "serial" and len(epsilonList) > 1:
+        chunks: list[list[Epsilon]] = pl.splitChunks(epsilonList, pl.getWorkerCount(workers))
+        chunkSolutions: list[list[sl.Solution]] = pl.mapOrdered(functools.partial(solveEpsilonList, model, xValues), chunks, executor, workers, 1)
+
+        return [solution for chunk in chunkSolutions for solution in chunk]
+
+    # Fixed-step engines advance every epsilon of the same parity in one stacked pass
+    if itg.isBatched(model):
+        return solveEpsilonBatch(model, xValues, epsilonList)
+
     # Final solutions list initialisation
     solutions: list[sl.Solution] = [] 
 
+    # Every epsilon is looked up under the same model and grid
+    context: tuple = memo.contextKey(model, xValues)
+
     # Check every epsilon for solution
     for epsilon in epsilonList:
         try:
             # Compute a new normalised solution
-            newSolution: sl.Solution = sl.getSolution(model, xValues, epsilon.value, True, epsilon.parity)
+            newSolution: sl.Solution = sl.getSolution(model, xValues, epsilon.value, True, epsilon.parity, context)
 
             solutions.append(newSolution)
         except ValueError as error:
@@ -49,24 +73,129 @@ def solveEpsilonList(model: "simulation.ModelSystem", xValues: NDArray, epsilonL
         
     return solutions
 
-# Finds roots of function with initial guess.
-def findRoots(function, guesses, z0) -> list[float]:
-    """`findRoots` finds solutions where `function` is zero (roots) for initial `guesses` and `z0` value."""
-    
-    roots: list[float] = []
+# Cached variant of the simulation solving computation.
+def solveEpsilonCached(model: "simulation.ModelSystem", xValues: NDArray, epsilonList: list[Epsilon], executor: str, workers: int, cache: "ch.EigenCache") -> list[sl.Solution]:
+    """`solveEpsilonCached` loads the solutions of `epsilonList` from the `cache`, computing and storing only the missing ones."""
 
-    # Find roots for every computed guess
-    for guess in guesses:
-        root, info, ier, _ = fsolve(function, guess, args=(z0,), full_output=True)
-        
-        # Check if valid
-        if ier != 1:
+    keys: list[str] = [cache.key(model, xValues, "epsilon", epsilon.value, epsilon.parity, sl.getQuadrature(model)) for epsilon in epsilonList]
+    solutions: list[sl.Solution] = [cache.loadSolution(key, xValues) for key in keys]
+
+    pending: list[Epsilon] = [epsilon for epsilon, solution in zip(epsilonList, solutions) if solution is None]
+    computed: list[sl.Solution] = solveEpsilonList(model, xValues, pending, executor, workers)
+
+    # Failed epsilons are dropped from the computed list, so the solutions are matched back by value
+    computedSolutions: dict[tuple[float, str], sl.Solution] = {(solution.epsilon, solution.type): solution for solution in computed}
+
+    for i, (epsilon, key) in enumerate(zip(epsilonList, keys)):
+        if solutions[i] is not None or (epsilon.value, epsilon.parity) not in computedSolutions:
             continue
 
-        # Avoid duplicates within small tolerance
-        if any(np.isclose(root, s, atol=1e-4) for s in roots):
+        solutions[i] = computedSolutions[(epsilon.value, epsilon.parity)]
+        cache.storeSolution(key, solutions[i])
+
+    return [solution for solution in solutions if solution is not None]
+
+# Batched variant of the simulation solving computation.
+def solveEpsilonBatch(model: "simulation.ModelSystem", xValues: NDArray, epsilonList: list[Epsilon]) -> list[sl.Solution]:
+    """`solveEpsilonBatch` computes the solutions for the given `model` and `epsilonList`, integrating all epsilons of a parity at once."""
+
+    # Solutions are placed back at the position of their epsilon, so the output order matches `epsilonList`
+    solutions: list = [None] * len(epsilonList)
+
+    context: tuple = memo.contextKey(model, xValues)
+
+    for parity in dict.fromkeys(epsilon.parity for epsilon in epsilonList):
+        indices: list[int] = [i for i, epsilon in enumerate(epsilonList) if epsilon.parity == parity]
+
+        # Solutions computed before within the run are served from the in-memory cache
+        pending: list[int] = []
+        for i in indices:
+            key: tuple = memo.solutionKey(context, epsilonList[i].value, parity)
+            cached: sl.Solution = memo.solutionCache.get(key)
+
+            if cached is None:
+                pending.append(i)
+            else:
+                solutions[i] = sl.copySolution(xValues, cached, True, sl.getQuadrature(model), key)
+
+        if len(pending) == 0:
             continue
 
-        roots.append(root[0])
+        epsilonValues: NDArray = np.array([epsilonList[i].value for i in pending])
+
+        try:
+            if itg.isSpliced(model, parity):
+                results: NDArray = itg.integrateSpliced(model, xValues, epsilonValues, parity)
+            else:
+                results: NDArray = itg.integrateBatch(model, xValues, epsilonValues, parity)
+        except ValueError as error:
+            # Getting an error from a specific batch should not be fatal to the whole simulation, therefore just notify the user
+            print("Warning computing solution: %s" % error)
+            continue
+
+        for column, i in enumerate(pending):
+            try:
+                solutions[i] = sl.createSolution(xValues, results[:, column], epsilonValues[column], parity, True, sl.getQuadrature(model))
+            except ValueError as error:
+                print("Warning computing solution: %s" % error)
+                continue
+
+            sl.memoiseSolution(memo.solutionKey(context, epsilonList[i].value, parity), solutions[i], not itg.isSpliced(model, parity))
+
+    return [solution for solution in solutions if solution is not None]
+
+# Build the pole-delimited branches of a transcendental equation.
+def branchIntervals(zMaxValues: NDArray, offset: float = 0, period: float = pi, width: float = pi / 2) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+    """`branchIntervals` lists the monotone branches [k * `period` + `offset`, k * `period` + `offset` + `width`] lying below every `zMaxValues` entry. \n
+        Branches are cut at their zMax, the ones starting at or above it are dropped.
+        Returns the interval lows, highs, the zMax of every interval and its branch index k.
+    """
+
+    zMaxValues = np.atleast_1d(np.asarray(zMaxValues, dtype=float))
+
+    branches: NDArray = np.arange(max(0, math.ceil((zMaxValues.max(initial=0) - offset) / period)) + 1)
+    zMaxGrid, branchGrid = np.meshgrid(zMaxValues, branches, indexing="ij")
+
+    lows: NDArray = branchGrid * period + offset
+    valid: NDArray = lows < zMaxGrid
+
+    lows = lows[valid]
+    highs: NDArray = np.minimum(lows + width, zMaxGrid[valid])
+
+    return lows, highs, zMaxGrid[valid], branchGrid[valid]
+
+# Find the roots of a tan(z) type equation.
+def findRoots(function, z0: float, offset: float = 0, period: float = pi, width: float = pi / 2) -> list[float]:
+    """`findRoots` finds the sorted solutions where `function(z, z0)` is zero (roots) for 0 < z < `z0`. \n
+        The equation must have at most one root on every branch between the poles of tan(z), described by `offset`, `period` and `width`
+        (see `branchIntervals`), and change sign across it. All branches are solved together with `bisectRoots`.
+    """
+
+    lows, highs, z0Values, branches = branchIntervals(np.array([z0]), offset, period, width)
+
+    return bisectRoots(function, lows, highs, (z0Values,)).tolist()
+
+# Vectorized bisection over many brackets at once.
+def bisectRoots(function, lows: NDArray, highs: NDArray, args: tuple = (), iterations: int = 60, tolerance: float = 1e-12) -> NDArray:
+    """`bisectRoots` finds one root of `function` inside every [`lows`, `highs`] interval simultaneously. \n
+        `function(z, *args)` must work element-wise on arrays, `args` are broadcast against the intervals.
+        Every interval must contain a sign change of `function`.
+    """
+
+    lows = np.array(lows, dtype=float)
+    highs = np.array(highs, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        signLow: NDArray = np.sign(function(lows, *args))
+
+        for i in range(iterations):
+            if np.all(highs - lows < tolerance):
+                break
+
+            mids: NDArray = (lows + highs) / 2
+            sameSign: NDArray = np.sign(function(mids, *args)) == signLow
+
+            lows = np.where(sameSign, mids, lows)
+            highs = np.where(sameSign, highs, mids)
 
-    return roots
\ No newline at end of file
+    return (lows + highs) / 2
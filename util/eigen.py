@@ -0,0 +1,93 @@
+# Package imports
+from __future__ import annotations
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.solution as sl
+
+# Build the finite-difference Hamiltonian of a model.
+def buildHamiltonian(model: "simulation.ModelSystem", xValues: NDArray, parity: str) -> tuple[NDArray, NDArray, NDArray, slice]:
+    """`buildHamiltonian` discretises -psi'' / k + V(x) * psi = epsilon * psi on the half domain `xValues` with three-point differences. \n
+        The wavefunction vanishes at the last grid point, the first point follows the `parity`: zero slope for even, zero value for odd
+        and for full domain (asymmetric) models, whose grid starts at the left boundary instead of the centre.
+        The (possibly non-uniform) grid gives a generalised problem A * psi = epsilon * W * psi, returned already symmetrised as the
+        diagonal and off-diagonal of W^-1/2 * A * W^-1/2, together with the weights W and the slice of grid points that are unknowns.
+    """
+
+    if xValues.size < 3:
+        raise ValueError("Eigen solver needs at least 3 grid points.")
+
+    h: NDArray = np.diff(xValues)
+    kinetic: float = 1 / model.energyScale
+
+    # The potential is integrated over both half intervals of every point by their midpoints, so a jump of V on a grid point stays second order
+    halfPotential: NDArray = model.tabulatePotential(np.concatenate((xValues[:-1] + h / 4, xValues[1:] - h / 4))).reshape(2, -1) * h / 2
+    potentialWeights: NDArray = np.zeros(xValues.size)
+    potentialWeights[:-1] += halfPotential[0]
+    potentialWeights[1:] += halfPotential[1]
+
+    # Interior points carry half of both neighbouring intervals, the symmetric centre point only the half interval to its right
+    weights: NDArray = np.empty(xValues.size)
+    weights[1:-1] = (h[:-1] + h[1:]) / 2
+    weights[0] = h[0] / 2
+    weights[-1] = h[-1] / 2
+
+    stiffness: NDArray = np.empty(xValues.size)
+    stiffness[1:-1] = kinetic * (1 / h[:-1] + 1 / h[1:])
+    stiffness[0] = kinetic / h[0]
+    stiffness[-1] = kinetic / h[-1]
+
+    diagonal: NDArray = stiffness + potentialWeights
+    offDiagonal: NDArray = -kinetic / h
+
+    # Even solutions keep the centre point as an unknown, odd and full domain solutions vanish there
+    unknowns: slice = slice(0, xValues.size - 1) if parity == "even" else slice(1, xValues.size - 1)
+
+    diagonal = diagonal[unknowns]
+    offDiagonal = offDiagonal[unknowns][:-1]
+    weights = weights[unknowns]
+
+    return diagonal / weights, offDiagonal / np.sqrt(weights[:-1] * weights[1:]), weights, unknowns
+
+# Solve the model eigenproblem by diagonalisation.
+def solveEigen(model: "simulation.ModelSystem", xValues: NDArray, parity: str, indexRange: tuple[int, int] = (), epsilonWindow: tuple[float, float] = ()) -> list[sl.Solution]:
+    """`solveEigen` returns the `parity` eigenstates of the `model` on `xValues` by diagonalising the tridiagonal Hamiltonian. \n
+        Either the states `indexRange` (inclusive, counted within the parity) or every state inside `epsilonWindow` are returned,
+        sorted by energy, as normalised solutions compatible with the shooting results.
+    """
+
+    if parity not in ("even", "odd", "full"):
+        raise ValueError("Unknown parity '%s' for the eigen solver." % parity)
+
+    diagonal, offDiagonal, weights, unknowns = buildHamiltonian(model, xValues, parity)
+
+    # scipy.linalg is only imported by runs using the eigensolver
+    from scipy.linalg import eigh_tridiagonal
+
+    epsilonValues: NDArray
+    vectors: NDArray
+    if len(epsilonWindow) == 2:
+        epsilonValues, vectors = eigh_tridiagonal(diagonal, offDiagonal, select="v", select_range=epsilonWindow)
+    elif len(indexRange) == 2:
+        indexMax: int = min(indexRange[1], diagonal.size - 1)
+
+        if indexRange[0] > indexMax:
+            return []
+
+        epsilonValues, vectors = eigh_tridiagonal(diagonal, offDiagonal, select="i", select_range=(indexRange[0], indexMax))
+    else:
+        raise ValueError("Either an index range or an epsilon window has to be given.")
+
+    solutions: list[sl.Solution] = []
+    for i, epsilon in enumerate(epsilonValues):
+        psiValues: NDArray = np.zeros(xValues.size)
+        psiValues[unknowns] = vectors[:, i] / np.sqrt(weights)
+
+        # Match the shooting initial conditions: psi(0) > 0 for even, psi'(0) > 0 for odd and full
+        if psiValues[0 if parity == "even" else 1] < 0:
+            psiValues = -psiValues
+
+        solutions.append(sl.createSolution(xValues, psiValues, float(epsilon), parity, True, sl.getQuadrature(model)))
+
+    return solutions
@@ -0,0 +1,81 @@
+# Package imports
+import numpy as np
+from numpy.typing import NDArray
+
+# Ways the points of a simulation grid can be spaced
+spacings: tuple[str, ...] = ("uniform", "graded")
+
+# Default growth of the graded grid step, in steps per wavelength of the fastest state travelled beyond the turning points
+stepGrowth: float = 0.5
+
+# Default ratio of the widest graded grid step to the step in the classically allowed region
+tailRatio: float = 10
+
+# Build a uniform grid.
+def uniformGrid(xMin: float, xMax: float, xStep: float) -> NDArray:
+    """`uniformGrid` returns points from `xMin` to `xMax` spaced as close to `xStep` as lets the grid end exactly on `xMax`."""
+
+    if xStep <= 0 or xMax <= xMin:
+        raise ValueError("Grid needs xMax > xMin and a positive step, got [%g, %g] with step %g." % (xMin, xMax, xStep))
+
+    return np.linspace(xMin, xMax, max(2, int(round((xMax - xMin) / xStep)) + 1))
+
+# Check whether a grid is uniform.
+def isUniform(xValues: NDArray) -> bool:
+    """`isUniform` checks whether every step of the `xValues` grid has the same size, up to rounding."""
+
+    if xValues.size < 3:
+        return True
+
+    steps: NDArray = np.diff(xValues)
+
+    return bool(np.abs(steps - steps[0]).max() <= 1e-6 * abs(steps[0]))
+
+# Build a grid graded by the model potential.
+def gradedGrid(model: "simulation.ModelSystem", xMin: float, xMax: float, xStep: float, epsilonMax: float, tailStep: float = 0, growth: float = stepGrowth) -> NDArray:
+    """`gradedGrid` spaces the points `xStep` apart where the `model` potential lies below `epsilonMax`, the classically allowed
+        region of every state up to that energy, and widens the steps beyond the turning points, where the wavefunctions only decay. \n
+        A step grows with the distance to the allowed region by `growth` times the distance in wavelengths of the fastest state,
+        but stays below the local decay length over that wavelength in steps of `xStep`, and below `tailStep` (ten times `xStep` by default).
+        The step widens smoothly from `xStep` to at most ten times `xStep`, so the accuracy still converges as `xStep` shrinks. \n
+        The grid starts on `xMin` and ends on `xMax`. Without an allowed region the uniform `xStep` grid is returned.
+    """
+
+    if tailStep <= 0:
+        tailStep = tailRatio * xStep
+
+    probe: NDArray = uniformGrid(xMin, xMax, xStep)
+    potential: NDArray = model.tabulatePotential(probe)
+    allowed: NDArray = probe[potential <= epsilonMax]
+
+    if allowed.size == 0:
+        return probe
+
+    # Distance of every probe point to the nearest allowed point
+    position: NDArray = np.searchsorted(allowed, probe)
+    distance: NDArray = np.minimum(np.abs(probe - allowed[np.maximum(position - 1, 0)]), np.abs(allowed[np.minimum(position, allowed.size - 1)] - probe))
+
+    # Largest wave number inside the allowed region and decay rate of the highest state outside it
+    waveNumber: float = np.sqrt(max(model.energyScale * (epsilonMax - potential.min()), 0))
+    decayRate: NDArray = np.sqrt(np.maximum(model.energyScale * (potential - epsilonMax), 0))
+
+    with np.errstate(divide="ignore"):
+        decayRatio: NDArray = np.maximum(1, waveNumber / decayRate)
+
+    steps: NDArray = xStep * np.minimum(np.minimum(1 + growth * waveNumber * distance, decayRatio), max(tailStep / xStep, 1))
+
+    points: list[float] = [xMin]
+    while True:
+        # The step is checked at both of its ends, so a wide tail step never jumps into the dense region
+        step: float = float(np.interp(points[-1], probe, steps))
+        step = min(step, float(np.interp(points[-1] + step, probe, steps)))
+
+        # The last step is stretched or shrunk by at most half a step to end on xMax
+        if points[-1] + 1.5 * step >= xMax:
+            break
+
+        points.append(points[-1] + step)
+
+    points.append(xMax)
+
+    return np.array(points)
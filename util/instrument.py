@@ -0,0 +1,159 @@
+# Package imports
+import contextlib
+import json
+import os
+import time
+
+# Available report dump formats
+reportFormats: tuple[str, ...] = ("json", "trace")
+
+class RunReport:
+    """
+        Structured timing and solver-call report of simulation runs.
+
+        Class variables:
+         #   title: str           - name of the reported simulation
+         #   origin: float        - performance counter value the report started at
+         #   events: list[dict]   - finished stages with their name, start, duration (seconds) and nesting depth
+         #   counters: dict       - solver call counters: odeint calls, RHS evaluations, batched integrations...
+         #   brackets: list[dict] - refined brackets with their iteration and integration counts
+    """
+
+    def __init__(self, title: str = ""):
+        self.title = title
+        self.origin: float = time.perf_counter()
+
+        self.events: list[dict] = []
+        self.counters: dict[str, int] = {}
+        self.brackets: list[dict] = []
+
+        self.depth: int = 0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """`stage` measures the wall time of the code run inside the `with` block as the stage `name`. Stages can be nested."""
+
+        start: float = time.perf_counter()
+        self.depth += 1
+
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.events.append({"name": name, "start": start - self.origin, "duration": time.perf_counter() - start, "depth": self.depth})
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """`count` adds `amount` to the counter `name`."""
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def recordBracket(self, bracket: "br.Bracket", epsilon: float) -> None:
+        """`recordBracket` stores the refinement counts of the `bracket` and its root `epsilon`."""
+
+        self.brackets.append({
+            "low": float(bracket.low),
+            "high": float(bracket.high),
+            "parity": bracket.parity,
+            "epsilon": float(epsilon),
+            "iterations": int(bracket.iterations),
+            "evaluations": int(bracket.evaluations)
+        })
+
+    def stages(self) -> dict[str, dict]:
+        """`stages` sums the recorded events per stage name, in the order the stages were first entered."""
+
+        totals: dict[str, dict] = {}
+        for event in sorted(self.events, key=lambda event: event["start"]):
+            total: dict = totals.setdefault(event["name"], {"calls": 0, "seconds": 0.0})
+            total["calls"] += 1
+            total["seconds"] += event["duration"]
+
+        return totals
+
+    def summary(self) -> dict:
+        """`summary` returns the whole report as plain JSON serialisable data."""
+
+        return {
+            "title": self.title,
+            "wallTime": time.perf_counter() - self.origin,
+            "stages": self.stages(),
+            "counters": dict(self.counters),
+            "brackets": list(self.brackets)
+        }
+
+    def dumpJson(self, filename: str) -> None:
+        """`dumpJson` writes the report `summary` to `filename`."""
+
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+        with open(filename, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def dumpTrace(self, filename: str) -> None:
+        """`dumpTrace` writes the stages as a Chrome trace (chrome://tracing, Perfetto) to `filename`, with the counters as trace metadata."""
+
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+        traceEvents: list[dict] = [
+            {"name": event["name"], "ph": "X", "ts": event["start"] * 1e6, "dur": event["duration"] * 1e6, "pid": os.getpid(), "tid": 0}
+            for event in self.events
+        ]
+
+        with open(filename, "w") as file:
+            json.dump({"traceEvents": traceEvents, "displayTimeUnit": "ms", "otherData": {"title": self.title, "counters": self.counters}}, file)
+
+    def dump(self, path: str, name: str, formats: tuple[str, ...]) -> None:
+        """`dump` writes the report in every requested format to `path`, as `name.report.json` and `name.trace.json`."""
+
+        if "json" in formats:
+            self.dumpJson(os.path.join(path, "%s.report.json" % name))
+
+        if "trace" in formats:
+            self.dumpTrace(os.path.join(path, "%s.trace.json" % name))
+
+    def __str__(self) -> str:
+        lines: list[str] = ["Run report: %s (%.3f s)" % (self.title, time.perf_counter() - self.origin)]
+
+        for name, total in self.stages().items():
+            lines.append("  %-16s %6d calls %10.3f s" % (name, total["calls"], total["seconds"]))
+
+        for name, value in self.counters.items():
+            lines.append("  %-24s %d" % (name, value))
+
+        for bracket in self.brackets:
+            lines.append("  bracket [%f, %f] (%s): %d iterations, %d integrations" % (bracket["low"], bracket["high"], bracket["parity"], bracket["iterations"], bracket["evaluations"]))
+
+        return "\n".join(lines)
+
+# Report the instrumented code records into, None when instrumentation is off.
+# Only the main process records, work done in executor worker processes is timed as a whole by the enclosing stage.
+active: RunReport = None
+
+# Check whether instrumentation is on.
+def isActive() -> bool:
+    """`isActive` checks whether a report is currently recording."""
+
+    return active is not None
+
+# Measure a stage of the active report.
+def stage(name: str):
+    """`stage` returns a context manager timing the stage `name` in the active report, or doing nothing when instrumentation is off."""
+
+    if active is None:
+        return contextlib.nullcontext()
+
+    return active.stage(name)
+
+# Count an event in the active report.
+def count(name: str, amount: int = 1) -> None:
+    """`count` adds `amount` to the counter `name` of the active report."""
+
+    if active is not None:
+        active.count(name, amount)
+
+# Record a refined bracket in the active report.
+def recordBracket(bracket: "br.Bracket", epsilon: float) -> None:
+    """`recordBracket` stores the refinement counts of the `bracket` in the active report."""
+
+    if active is not None:
+        active.recordBracket(bracket, epsilon)
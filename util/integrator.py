@@ -0,0 +1,389 @@
+# Package imports
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.jit as jit
+import util.instrument as ins
+import util.grid as grid
+
+# Integration engines that advance a whole stack of epsilons in a single pass
+batchedSolvers: tuple[str, ...] = ("rk4", "numerov", "jit")
+
+# Every available integration engine
+solvers: tuple[str, ...] = ("odeint",) + batchedSolvers
+
+# Integration engines stepping the stacked state array in Python, which start from any initial conditions
+tabulatedSolvers: tuple[str, ...] = ("rk4", "numerov")
+
+# Available shooting modes: outward from the start of the grid, or from both ends matched at the turning point
+shootingModes: tuple[str, ...] = ("outward", "matched")
+
+# Determine the model integration engine.
+def getSolver(model: "simulation.ModelSystem") -> str:
+    """`getSolver` returns the integration engine requested by the `model`, defaulting to `odeint`. \n
+        The `jit` engine resolves to `odeint` when it cannot run for the model.
+    """
+
+    solver: str = "odeint" # Default solver, in the case that the model does not provide a specified solver
+    if hasattr(model, "solver") and model.solver != "":
+        solver = model.solver
+
+    if solver == "jit" and not jit.supportsModel(model):
+        solver = "odeint"
+
+    return solver
+
+# Check whether the model integrates epsilons in batches.
+def isBatched(model: "simulation.ModelSystem") -> bool:
+    """`isBatched` checks whether the `model` solver advances every epsilon in one stacked state array."""
+
+    return getSolver(model) in batchedSolvers
+
+# Check whether the model keeps the default Schrodinger form right-hand side.
+def isSchrodingerForm(model: "simulation.ModelSystem") -> bool:
+    """`isSchrodingerForm` checks whether the `model` uses the base `system`, so its right-hand side is fully described by the potential."""
+
+    # Imported here, as the simulation module itself depends on the integrator
+    import util.simulation as sm
+
+    return type(model).system is sm.ModelSystem.system
+
+# Integrate the model for a whole array of epsilons.
+def integrateBatch(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str, solver: str = "", endpointOnly: bool = False, initialConditions: NDArray = None) -> NDArray:
+    """`integrateBatch` returns psi of the `model` on `xValues` with one column per epsilon, or only the last row in `endpointOnly` mode."""
+
+    epsilonValues = np.atleast_1d(np.asarray(epsilonValues, dtype=float))
+
+    if solver == "":
+        solver = getSolver(model)
+
+    # Numerov needs a uniform step
+    if solver == "numerov" and not grid.isUniform(xValues):
+        solver = "rk4"
+
+    if solver != "odeint" and (solver != "jit" or jit.supportsModel(model)):
+        ins.count("batchedIntegrations")
+        ins.count("batchedEpsilons", epsilonValues.size)
+
+    if initialConditions is not None and solver not in tabulatedSolvers:
+        raise ValueError("Solver '%s' does not take explicit initial conditions." % solver)
+
+    if solver == "rk4":
+        if initialConditions is None:
+            initialConditions = model.getBatchInitialConditions(parity, epsilonValues.size)
+
+        if isSchrodingerForm(model):
+            # The potential is looked up at the grid nodes and step midpoints instead of evaluated on every stage
+            nodeValues: NDArray = model.tabulatePotential(xValues)
+            midValues: NDArray = model.tabulatePotential((xValues[:-1] + xValues[1:]) / 2)
+
+            return rk4Tabulated(nodeValues, midValues, model.energyScale, initialConditions, xValues, epsilonValues, endpointOnly)
+
+        return rk4Batch(model.system, initialConditions, xValues, epsilonValues, endpointOnly)
+
+    if solver == "jit" and jit.supportsModel(model):
+        return jit.integrateBatch(model, xValues, epsilonValues, parity, endpointOnly)
+
+    if solver == "jit":
+        solver = "odeint"
+
+    if solver == "numerov":
+        if initialConditions is None:
+            initialConditions = model.getBatchInitialConditions(parity, epsilonValues.size)
+
+        # The potential is tabulated once per grid and shared by every epsilon
+        potentialValues: NDArray = model.tabulatePotential(xValues)
+
+        return numerovBatch(model.system, potentialValues, model.energyScale, initialConditions, xValues, epsilonValues, endpointOnly)
+
+    if solver != "odeint":
+        raise ValueError("Unknown solver '%s' for model %s." % (solver, model.label))
+
+    # The adaptive solver picks its own steps, so for the endpoint only the grid ends are requested
+    outputValues: NDArray = xValues[[0, -1]] if endpointOnly else xValues
+
+    # The single endpoint interval keeps the internal step limit of every grid interval it spans
+    intervals: int = xValues.size - 1 if endpointOnly else 1
+
+    # General adaptive solver has to be called once per epsilon
+    results: NDArray = np.empty((outputValues.size, epsilonValues.size))
+    for i, epsilon in enumerate(epsilonValues):
+        results[:, i] = odeintSolve(model, outputValues, epsilon, parity, intervals)
+
+    if endpointOnly:
+        return results[-1]
+
+    return results
+
+# Determine the shooting mode of a model.
+def getShooting(model: "simulation.ModelSystem") -> str:
+    """`getShooting` returns the shooting mode requested by the `model`, defaulting to `outward`."""
+
+    shooting: str = "outward" # Default shooting mode, in the case that the model does not provide a specified mode
+    if hasattr(model, "shooting") and model.shooting != "":
+        shooting = model.shooting
+
+    if shooting not in shootingModes:
+        raise ValueError("Unknown shooting mode '%s', expected one of: %s." % (shooting, ", ".join(shootingModes)))
+
+    return shooting
+
+# Check whether the wavefunctions of a parity are spliced from both ends.
+def isSpliced(model: "simulation.ModelSystem", parity: str) -> bool:
+    """`isSpliced` checks whether the `parity` wavefunctions of the `model` are integrated from both ends and spliced."""
+
+    return parity == "full" or getShooting(model) == "matched"
+
+# Find the matching point of two-sided shooting.
+def matchIndex(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float) -> int:
+    """`matchIndex` returns the grid index of the outermost classical turning point of `epsilon`, kept off both grid ends."""
+
+    allowed: NDArray = np.flatnonzero(model.tabulatePotential(xValues) < epsilon)
+    index: int = int(allowed[-1]) if allowed.size > 0 else xValues.size // 2
+
+    return min(max(index, 1), xValues.size - 2)
+
+# Integrate the matching mismatch of two-sided shooting.
+def integrateMismatch(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str, match: int) -> NDArray:
+    """`integrateMismatch` returns the normalised Wronskian of the outward and inward solutions at the `match` point for every epsilon."""
+
+    epsilonValues = np.atleast_1d(np.asarray(epsilonValues, dtype=float))
+
+    # Both solutions are kept on the three points around the match, the inward one integrated over the reversed grid
+    outward: NDArray = integrateBatch(model, xValues[:match + 2], epsilonValues, parity)[-3:]
+    inward: NDArray = integrateInward(model, xValues[match - 1:], epsilonValues)[-3:][::-1]
+
+    # Three-point derivative weights at the match, which also hold for unequal steps on both sides
+    hLow: float = xValues[match] - xValues[match - 1]
+    hHigh: float = xValues[match + 1] - xValues[match]
+    weights: NDArray = np.array([-hHigh / hLow, hHigh / hLow - hLow / hHigh, hLow / hHigh]) / (hLow + hHigh)
+
+    psiOutward: NDArray = outward[1]
+    dpsiOutward: NDArray = weights @ outward
+    psiInward: NDArray = inward[1]
+    dpsiInward: NDArray = weights @ inward
+
+    return (psiOutward * dpsiInward - dpsiOutward * psiInward) / np.sqrt((psiOutward**2 + dpsiOutward**2) * (psiInward**2 + dpsiInward**2))
+
+# Count the integration passes of a mismatch.
+def mismatchIntegrations(model: "simulation.ModelSystem") -> int:
+    """`mismatchIntegrations` returns the integration passes `integrateMismatch` makes for one epsilon."""
+
+    return 2 if getSolver(model) in tabulatedSolvers else 3
+
+# Integrate the decaying solution inward from the end of the grid.
+def integrateInward(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray) -> NDArray:
+    """`integrateInward` integrates the `model` from the end of the `xValues` grid back to its start, starting on the decaying WKB tail."""
+
+    epsilonValues = np.atleast_1d(np.asarray(epsilonValues, dtype=float))
+
+    # The tail is only known for the Schrodinger form, where the right-hand side follows from the potential
+    kappa: NDArray = np.zeros(epsilonValues.size)
+    if isSchrodingerForm(model):
+        potentialValues: NDArray = model.tabulatePotential(xValues[-2:])
+        kappa = np.sqrt(np.maximum(model.energyScale * (potentialValues[-1] - epsilonValues), 0))
+
+    if not np.any(kappa > 0):
+        return integrateBatch(model, xValues[::-1], epsilonValues, "inward")
+
+    # WKB tail psi' / psi = -kappa - energyScale * V' / (4 * kappa^2), close to the turning point the correction grows without bound
+    forbidden: NDArray = kappa > 0
+    gradient: float = (potentialValues[-1] - potentialValues[-2]) / (xValues[-1] - xValues[-2])
+    logDerivative: NDArray = -kappa - model.energyScale * gradient / (4 * np.where(forbidden, kappa, 1)**2)
+
+    # The `inward` solution starts with slope -1, so it enters with the negated log-derivative
+    valueWeight: NDArray = np.where(forbidden, 1.0, 0.0)
+    slopeWeight: NDArray = np.where(forbidden, -logDerivative, 1.0)
+    norm: NDArray = np.hypot(valueWeight, slopeWeight)
+
+    if getSolver(model) in tabulatedSolvers:
+        return integrateBatch(model, xValues[::-1], epsilonValues, "inward", initialConditions=np.array([valueWeight, -slopeWeight]) / norm)
+
+    # Other engines only start from the model initial conditions, the equation being linear the solution is combined from two of them
+
+    value: NDArray = integrateBatch(model, xValues[::-1], epsilonValues, "inwardValue")
+    slope: NDArray = integrateBatch(model, xValues[::-1], epsilonValues, "inward")
+
+    return value * (valueWeight / norm)[np.newaxis, :] + slope * (slopeWeight / norm)[np.newaxis, :]
+
+# Integrate wavefunctions from both ends.
+def integrateSpliced(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str = "full") -> NDArray:
+    """`integrateSpliced` returns psi of the `model` like `integrateBatch`, joining the outward and inward solutions at the turning point."""
+
+    epsilonValues = np.atleast_1d(np.asarray(epsilonValues, dtype=float))
+
+    outward: NDArray = integrateBatch(model, xValues, epsilonValues, parity)
+    inward: NDArray = integrateInward(model, xValues, epsilonValues)[::-1]
+
+    # The splice point of every epsilon is the last grid point inside the classically allowed region
+    allowed: NDArray = model.tabulatePotential(xValues)[:, np.newaxis] < epsilonValues[np.newaxis, :]
+    lastAllowed: NDArray = xValues.size - 1 - np.argmax(allowed[::-1], axis=0)
+    splice: NDArray = np.where(allowed.any(axis=0), np.minimum(lastAllowed, xValues.size - 2), xValues.size // 2)
+
+    columns: NDArray = np.arange(epsilonValues.size)
+    inwardSplice: NDArray = inward[splice, columns]
+    scale: NDArray = np.divide(outward[splice, columns], inwardSplice, out=np.zeros(epsilonValues.size), where=inwardSplice != 0)
+
+    rows: NDArray = np.arange(xValues.size)[:, np.newaxis]
+
+    return np.where(rows > splice[np.newaxis, :], inward * scale[np.newaxis, :], outward)
+
+# Adaptive integration of a single epsilon.
+def odeintSolve(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float, parity: str, intervals: int = 1) -> NDArray:
+    """`odeintSolve` integrates the `model` for `epsilon` with `odeint` and returns psi on `xValues`. \n
+        While a run report is recording, the call and its right-hand-side evaluations are counted.
+        The model `odeintSteps` raises the internal step limit of a grid interval, `intervals` grid intervals lie between two output points.
+    """
+
+    # scipy.integrate is only imported by runs using odeint, the batched solvers start without it
+    from scipy.integrate import odeint
+
+    maxSteps: int = 500 # The odeint default, in the case that the model does not provide a specified count
+    if hasattr(model, "odeintSteps") and model.odeintSteps > 0:
+        maxSteps = model.odeintSteps
+
+    maxSteps *= intervals
+
+    if not ins.isActive():
+        return odeint(model.system, model.getInitialConditions(parity), xValues, args=(epsilon,), mxstep=maxSteps)[:, 0].copy()
+
+    result, info = odeint(model.system, model.getInitialConditions(parity), xValues, args=(epsilon,), full_output=True, mxstep=maxSteps)
+
+    ins.count("odeintCalls")
+    ins.count("rhsEvaluations", int(info["nfe"][-1]))
+
+    # A copy, as a view of the psi column would keep the psi' column of the output alive as well
+    return result[:, 0].copy()
+
+# Fixed-step Runge-Kutta integration vectorized over the epsilon axis.
+def rk4Batch(system, initialConditions: NDArray, xValues: NDArray, epsilonValues: NDArray, endpointOnly: bool = False) -> NDArray:
+    """`rk4Batch` integrates `system` with the classic 4th order Runge-Kutta method on the `xValues` grid. \n
+        The state is a stacked (2, N) array holding psi and psi' for every one of the N epsilons,
+        so `system` must accept array states and an array of epsilons.
+    """
+
+    y: NDArray = np.array(initialConditions, dtype=float)
+
+    if endpointOnly:
+        for i in range(xValues.size - 1):
+            y = rk4Step(system, y, xValues[i], xValues[i + 1] - xValues[i], epsilonValues)
+
+        return y[0]
+
+    # Only psi is kept for every grid point, psi' is carried along in the state
+    psiValues: NDArray = np.empty((xValues.size, epsilonValues.size))
+    psiValues[0] = y[0]
+
+    for i in range(xValues.size - 1):
+        y = rk4Step(system, y, xValues[i], xValues[i + 1] - xValues[i], epsilonValues)
+
+        psiValues[i + 1] = y[0]
+
+    return psiValues
+
+# Fixed-step Runge-Kutta integration of the Schrodinger form with a tabulated potential.
+def rk4Tabulated(nodeValues: NDArray, midValues: NDArray, energyScale: float, initialConditions: NDArray, xValues: NDArray, epsilonValues: NDArray, endpointOnly: bool = False) -> NDArray:
+    """`rk4Tabulated` integrates psi'' = `energyScale` * (V(x) - epsilon) * psi with the classic 4th order Runge-Kutta method. \n
+        `nodeValues` holds V(x) on the `xValues` grid and `midValues` at the midpoints of every step,
+        which are exactly the points the Runge-Kutta stages need, so no right-hand side function is called.
+    """
+
+    psi, dpsi = np.array(initialConditions, dtype=float)
+
+    # Coefficients k(x) = energyScale * (V(x) - epsilon) for every grid point and epsilon
+    nodeCoefficients: NDArray = energyScale * (nodeValues[:, np.newaxis] - epsilonValues[np.newaxis, :])
+    midCoefficients: NDArray = energyScale * (midValues[:, np.newaxis] - epsilonValues[np.newaxis, :])
+    steps: NDArray = np.diff(xValues)
+
+    if not endpointOnly:
+        psiValues: NDArray = np.empty((xValues.size, epsilonValues.size))
+        psiValues[0] = psi
+
+    # The step is shared with the compiled kernels, here it advances every epsilon at once
+    for i in range(xValues.size - 1):
+        psi, dpsi = jit.rk4Update(psi, dpsi, steps[i], nodeCoefficients[i], midCoefficients[i], nodeCoefficients[i + 1])
+
+        if not endpointOnly:
+            psiValues[i + 1] = psi
+
+    if endpointOnly:
+        return psi
+
+    return psiValues
+
+# Single Runge-Kutta step.
+def rk4Step(system, y: NDArray, x: float, h: float, epsilonValues: NDArray) -> NDArray:
+    """`rk4Step` advances the stacked state `y` from `x` to `x + h` with one 4th order Runge-Kutta step."""
+
+    k1: NDArray = np.asarray(system(y, x, epsilonValues))
+    k2: NDArray = np.asarray(system(y + h / 2 * k1, x + h / 2, epsilonValues))
+    k3: NDArray = np.asarray(system(y + h / 2 * k2, x + h / 2, epsilonValues))
+    k4: NDArray = np.asarray(system(y + h * k3, x + h, epsilonValues))
+
+    return y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+# Numerov shooting for Schrodinger-form systems vectorized over the epsilon axis.
+def numerovBatch(system, potentialValues: NDArray, energyScale: float, initialConditions: NDArray, xValues: NDArray, epsilonValues: NDArray, endpointOnly: bool = False) -> NDArray:
+    """`numerovBatch` integrates psi'' = `energyScale` * (V(x) - epsilon) * psi with the Numerov method on a uniform `xValues` grid. \n
+        `potentialValues` holds V(x) precomputed on the grid. The first step is taken with Runge-Kutta using `system`,
+        as Numerov needs two starting points.
+    """
+
+    h: float = xValues[1] - xValues[0]
+
+    if not grid.isUniform(xValues):
+        raise ValueError("Numerov solver requires a uniform grid.")
+
+    y: NDArray = np.array(initialConditions, dtype=float)
+    psi0: NDArray = y[0]
+    psi1: NDArray = rk4Step(system, y, xValues[0], h, epsilonValues)[0]
+
+    # Numerov weights f = 1 - h^2 / 12 * k(x), for psi'' = k(x) * psi
+    weights: NDArray = 1 - h**2 / 12 * energyScale * (potentialValues[:, np.newaxis] - epsilonValues[np.newaxis, :])
+
+    # A single epsilon is cheaper to step with plain floats than with one element arrays
+    if epsilonValues.size == 1:
+        psiList: list[float] = numerovScalar(weights[:, 0].tolist(), float(psi0[0]), float(psi1[0]), endpointOnly)
+
+        if endpointOnly:
+            return np.array(psiList)
+
+        return np.array(psiList)[:, np.newaxis]
+
+    if endpointOnly:
+        # Only the last two points are needed to carry the recurrence
+        psiPrevious, psiCurrent = psi0, psi1
+        for i in range(1, xValues.size - 1):
+            psiPrevious, psiCurrent = psiCurrent, ((12 - 10 * weights[i]) * psiCurrent - weights[i - 1] * psiPrevious) / weights[i + 1]
+
+        return psiCurrent
+
+    psiValues: NDArray = np.empty((xValues.size, epsilonValues.size))
+    psiValues[0] = psi0
+    psiValues[1] = psi1
+
+    for i in range(1, xValues.size - 1):
+        psiValues[i + 1] = ((12 - 10 * weights[i]) * psiValues[i] - weights[i - 1] * psiValues[i - 1]) / weights[i + 1]
+
+    return psiValues
+
+# Numerov recurrence for a single epsilon.
+def numerovScalar(weights: list[float], psi0: float, psi1: float, endpointOnly: bool = False) -> list[float]:
+    """`numerovScalar` runs the Numerov recurrence over the `weights` starting from `psi0` and `psi1`. \n
+        In `endpointOnly` mode only the last value is returned.
+    """
+
+    if endpointOnly:
+        psiPrevious, psiCurrent = psi0, psi1
+        for i in range(1, len(weights) - 1):
+            psiPrevious, psiCurrent = psiCurrent, ((12 - 10 * weights[i]) * psiCurrent - weights[i - 1] * psiPrevious) / weights[i + 1]
+
+        return [psiCurrent]
+
+    psiValues: list[float] = [psi0, psi1]
+
+    for i in range(1, len(weights) - 1):
+        psiValues.append(((12 - 10 * weights[i]) * psiValues[i] - weights[i - 1] * psiValues[i - 1]) / weights[i + 1])
+
+    return psiValues
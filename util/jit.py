@@ -0,0 +1,176 @@
+# Package imports
+import numpy as np
+from numpy.typing import NDArray
+
+# Optional compiler, without it the jit solver falls back to odeint
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Custom imports
+import util.integrator as itg
+
+# Models that already reported a fallback, so the warning is printed once per model
+fallbackWarnings: set[str] = set()
+
+# Check whether compiled kernels are available.
+def isAvailable() -> bool:
+    """`isAvailable` checks whether numba is installed, so the kernels below run compiled."""
+
+    return numba is not None
+
+# Compile a kernel when the compiler is installed.
+def compiled(function):
+    """`compiled` compiles `function` to machine code with numba, or returns it unchanged when numba is missing."""
+
+    if numba is None:
+        return function
+
+    return numba.njit(cache=True)(function)
+
+# Check whether a model can run on the compiled path.
+def supportsModel(model: "simulation.ModelSystem") -> bool:
+    """`supportsModel` checks whether the `model` can be integrated with the compiled kernels, printing the reason once when it cannot. \n
+        The kernels integrate the Schrodinger form with a tabulated potential, so models overriding `system` are not supported.
+    """
+
+    reason: str = ""
+    if not isAvailable():
+        reason = "numba is not installed"
+    elif not itg.isSchrodingerForm(model):
+        reason = "the model overrides its system"
+
+    if reason == "":
+        return True
+
+    if model.label not in fallbackWarnings:
+        fallbackWarnings.add(model.label)
+        print("Warning solving %s: jit solver unavailable (%s), falling back to odeint." % (model.label, reason))
+
+    return False
+
+# Tabulate the coefficients the compiled kernels need.
+def tabulateModel(model: "simulation.ModelSystem", xValues: NDArray) -> tuple[NDArray, NDArray]:
+    """`tabulateModel` returns the `model` potential at the `xValues` nodes and at the midpoints of every step."""
+
+    nodeValues: NDArray = model.tabulatePotential(xValues)
+    midValues: NDArray = model.tabulatePotential((xValues[:-1] + xValues[1:]) / 2)
+
+    return nodeValues, midValues
+
+# Integrate the model for a whole array of epsilons with the compiled kernels.
+def integrateBatch(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str, endpointOnly: bool = False) -> NDArray:
+    """`integrateBatch` runs the compiled Runge-Kutta kernel for every epsilon, with the same results layout as `integrator.integrateBatch`."""
+
+    nodeValues, midValues = tabulateModel(model, xValues)
+    psi0, dpsi0 = np.asarray(model.getInitialConditions(parity), dtype=float)
+
+    psiValues: NDArray = rk4Kernel(nodeValues, midValues, float(model.energyScale), psi0, dpsi0, np.ascontiguousarray(xValues, dtype=float), epsilonValues, endpointOnly)
+
+    if endpointOnly:
+        return psiValues[0]
+
+    return psiValues
+
+# Bisect a bracket entirely within compiled code.
+def bisectBracket(model: "simulation.ModelSystem", xValues: NDArray, parity: str, epsilonLow: float, epsilonHigh: float, iterationCtx: int, approximatation: float) -> tuple[float, int, int]:
+    """`bisectBracket` refines the bracket like `bracket.bisectBracket`, but every iteration and integration runs in one compiled call. \n
+        Returns the root, the iterations and the integrations used.
+    """
+
+    nodeValues, midValues = tabulateModel(model, xValues)
+    psi0, dpsi0 = np.asarray(model.getInitialConditions(parity), dtype=float)
+
+    epsilonRoot, iterations, evaluations = bisectKernel(nodeValues, midValues, float(model.energyScale), psi0, dpsi0, np.ascontiguousarray(xValues, dtype=float), float(epsilonLow), float(epsilonHigh), int(iterationCtx), float(approximatation))
+
+    return float(epsilonRoot), int(iterations), int(evaluations)
+
+# Runge-Kutta step on a tabulated potential.
+def rk4Update(psi, dpsi, h, kNode, kMid, kNext):
+    """`rk4Update` advances psi and psi' of psi'' = k(x) * psi over one step `h`, given k at its start, midpoint and end. \n
+        Plain Python, so the interpreted `integrator.rk4Tabulated` steps whole epsilon arrays with it and the kernels below compile it.
+    """
+
+    k1 = dpsi
+    l1 = kNode * psi
+    k2 = dpsi + h / 2 * l1
+    l2 = kMid * (psi + h / 2 * k1)
+    k3 = dpsi + h / 2 * l2
+    l3 = kMid * (psi + h / 2 * k2)
+    k4 = dpsi + h * l3
+    l4 = kNext * (psi + h * k3)
+
+    return psi + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4), dpsi + h / 6 * (l1 + 2 * l2 + 2 * l3 + l4)
+
+# The same step compiled for the kernels
+rk4UpdateKernel = compiled(rk4Update)
+
+# Runge-Kutta endpoint of a single epsilon.
+@compiled
+def rk4Endpoint(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilon):
+    """`rk4Endpoint` integrates psi'' = energyScale * (V(x) - epsilon) * psi over `xValues` and returns psi at the last grid point."""
+
+    psi = psi0
+    dpsi = dpsi0
+
+    for i in range(xValues.size - 1):
+        psi, dpsi = rk4UpdateKernel(psi, dpsi, xValues[i + 1] - xValues[i], energyScale * (nodeValues[i] - epsilon), energyScale * (midValues[i] - epsilon), energyScale * (nodeValues[i + 1] - epsilon))
+
+    return psi
+
+# Runge-Kutta trajectories of a batch of epsilons.
+@compiled
+def rk4Kernel(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilonValues, endpointOnly):
+    """`rk4Kernel` integrates every epsilon with the classic 4th order Runge-Kutta method on the tabulated potential. \n
+        Returns psi with shape (xValues.size, N), or (1, N) holding only the endpoints in `endpointOnly` mode.
+    """
+
+    rows = 1 if endpointOnly else xValues.size
+    psiValues = np.empty((rows, epsilonValues.size))
+
+    for j in range(epsilonValues.size):
+        if endpointOnly:
+            psiValues[0, j] = rk4Endpoint(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilonValues[j])
+            continue
+
+        psi = psi0
+        dpsi = dpsi0
+        psiValues[0, j] = psi
+
+        for i in range(xValues.size - 1):
+            psi, dpsi = rk4UpdateKernel(psi, dpsi, xValues[i + 1] - xValues[i], energyScale * (nodeValues[i] - epsilonValues[j]), energyScale * (midValues[i] - epsilonValues[j]), energyScale * (nodeValues[i + 1] - epsilonValues[j]))
+
+            psiValues[i + 1, j] = psi
+
+    return psiValues
+
+# Endpoint bisection of a single bracket.
+@compiled
+def bisectKernel(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilonLow, epsilonHigh, iterationCtx, approximatation):
+    """`bisectKernel` halves the bracket until its width is below `approximatation`, keeping the sign change of the endpoint inside. \n
+        Returns the root, the iterations and the integrations used.
+    """
+
+    epsilonRoot = (epsilonHigh + epsilonLow) / 2
+    endpointHigh = rk4Endpoint(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilonHigh)
+
+    iterations = 0
+    evaluations = 1
+    for i in range(iterationCtx):
+        if abs(epsilonHigh - epsilonLow) < approximatation:
+            break
+
+        iterations += 1
+
+        epsilonRoot = (epsilonHigh + epsilonLow) / 2
+        endpointMid = rk4Endpoint(nodeValues, midValues, energyScale, psi0, dpsi0, xValues, epsilonRoot)
+        evaluations += 1
+
+        if np.sign(endpointMid) == np.sign(endpointHigh):
+            epsilonHigh = epsilonRoot
+            endpointHigh = endpointMid
+        else:
+            epsilonLow = epsilonRoot
+
+    return epsilonRoot, iterations, evaluations
@@ -0,0 +1,118 @@
+# Package imports
+from __future__ import annotations
+from collections import OrderedDict
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.cache as ch
+
+class SolutionCache:
+    """
+        Bounded in-memory LRU cache for computed solutions and solution endpoints within a run.
+
+        Class variables:
+         #   maxSize: int          - maximum number of cached entries (0 disables the cache)
+         #   maxBytes: int         - maximum size of the cached wavefunction arrays in bytes
+         #   entries: OrderedDict  - cached values ordered from least to most recently used
+         #   bytes: int            - size of the cached wavefunction arrays in bytes
+         #   hits: int             - lookups served from the cache
+         #   misses: int           - lookups that had to be computed
+    """
+
+    def __init__(self, maxSize: int = 4096, maxBytes: int = 64 * 1024**2):
+        self.maxSize = maxSize
+        self.maxBytes = maxBytes
+        self.entries: OrderedDict = OrderedDict()
+        self.bytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: tuple):
+        """`get` returns the cached value for `key`, or None when it is missing."""
+
+        if key not in self.entries:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return self.entries[key]
+
+    def put(self, key: tuple, value) -> None:
+        """`put` caches `value` under `key`, evicting the least recently used entries above `maxSize` entries or `maxBytes`."""
+
+        if self.maxSize <= 0:
+            return
+
+        # A value larger than the whole budget would only evict every other entry
+        size: int = valueBytes(value)
+        if size > self.maxBytes:
+            return
+
+        if key in self.entries:
+            self.bytes -= valueBytes(self.entries[key])
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.bytes += size
+
+        while len(self.entries) > self.maxSize or self.bytes > self.maxBytes:
+            self.bytes -= valueBytes(self.entries.popitem(last=False)[1])
+
+    def clear(self) -> None:
+        """`clear` removes every cached entry and resets the statistics."""
+
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """`stats` returns the cache hit/miss statistics."""
+
+        lookups: int = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups > 0 else 0.0,
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "bytes": self.bytes,
+            "maxBytes": self.maxBytes
+        }
+
+# Size of a cached value.
+def valueBytes(value) -> int:
+    """`valueBytes` returns the size of the wavefunction arrays held by a cached solution, endpoints hold none."""
+
+    arrays: dict[int, NDArray] = {id(array): array for array in (getattr(value, "result", None), getattr(value, "normalised", None)) if isinstance(array, np.ndarray)}
+
+    return sum(array.nbytes for array in arrays.values())
+
+# Shared cache used by `getSolution` and the bracket endpoint evaluations.
+# Should be cleared when model parameters that live outside the model object (module globals) change.
+solutionCache: SolutionCache = SolutionCache()
+
+# Identify an integration grid.
+def gridKey(xValues: NDArray) -> tuple:
+    """`gridKey` identifies the `xValues` grid by its size, ends and content hash."""
+
+    return (xValues.size, float(xValues[0]), float(xValues[-1]), hash(np.ascontiguousarray(xValues).tobytes()))
+
+# Identify a model on an integration grid.
+def contextKey(model: "simulation.ModelSystem", xValues: NDArray) -> tuple:
+    """`contextKey` identifies the `model` by its fingerprint and the `xValues` grid. \n
+        Both take a pass over the model attributes or grid, so it is built once per solve or bracket and shared by all its lookups.
+    """
+
+    return (ch.modelFingerprint(model), gridKey(xValues))
+
+# Build a cache key for a model solution.
+def solutionKey(context: tuple, epsilon: float, parity: str, kind: str = "solution") -> tuple:
+    """`solutionKey` builds the cache key of a `kind` (solution or endpoint) entry for (model and grid `context`, parity, epsilon)."""
+
+    return (kind,) + context + (parity, float(epsilon))
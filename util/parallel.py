@@ -0,0 +1,49 @@
+# Package imports
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Available simulation executors
+executors: tuple[str, ...] = ("serial", "process")
+
+# Determine the number of worker processes.
+def getWorkerCount(workers: int = 0) -> int:
+    """`getWorkerCount` returns `workers` when positive, otherwise the number of available cores."""
+
+    if workers > 0:
+        return workers
+
+    return os.cpu_count() or 1
+
+# Split work into contiguous chunks.
+def splitChunks(items: list, chunkCount: int) -> list[list]:
+    """`splitChunks` splits `items` into at most `chunkCount` contiguous chunks, keeping their order."""
+
+    chunkSize: int = max(1, math.ceil(len(items) / max(1, chunkCount)))
+
+    return [items[i:i + chunkSize] for i in range(0, len(items), chunkSize)]
+
+# Map a function over items with the requested executor.
+def mapOrdered(function, items: list, executor: str = "serial", workers: int = 0, chunkSize: int = 0) -> list:
+    """`mapOrdered` applies `function` to every item and returns the results in the order of `items`. \n
+        With the `process` executor the items are distributed in chunks of `chunkSize` over a process pool,
+        so `function` and every item must be picklable (module level functions and classes, no lambdas).
+    """
+
+    if executor not in executors:
+        raise ValueError("Unknown executor '%s', expected one of: %s." % (executor, ", ".join(executors)))
+
+    workerCount: int = getWorkerCount(workers)
+
+    # A pool is not worth starting for a single worker or a single item
+    if executor == "serial" or workerCount == 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    workerCount = min(workerCount, len(items))
+
+    # Default to a few chunks per worker, which balances uneven items without much pickling overhead
+    if chunkSize <= 0:
+        chunkSize = max(1, math.ceil(len(items) / (workerCount * 4)))
+
+    with ProcessPoolExecutor(max_workers=workerCount) as pool:
+        return list(pool.map(function, items, chunksize=chunkSize))
@@ -1,19 +1,45 @@
 # Package imports
 import numpy as np
 import os
-import matplotlib.pyplot as plt
+import concurrent.futures
+import atexit
+import importlib
 from numpy.typing import NDArray
 
+# File formats headless figures can be exported in
+figureFormats: tuple[str, ...] = ("png", "svg", "pdf")
+
+# Ways headless figures are exported in the background
+exporters: tuple[str, ...] = ("thread", "process")
+
+# Background export pools, created on first use
+exportPools: dict[str, concurrent.futures.Executor] = {}
+
+# Exports that were submitted but not waited for yet
+pendingExports: list[concurrent.futures.Future] = []
+
+# Import pyplot on first use.
+def pyplot():
+    """`pyplot` returns `matplotlib.pyplot`, importing it on the first call. \n
+        matplotlib is only loaded once a graph is drawn, so compute-only runs and worker processes start without it.
+    """
+
+    return importlib.import_module("matplotlib.pyplot")
+
 # Clear graph.
 def clearGraph() -> None:
     """`clearGraph` clears the current simulation graph of any inserted values."""
 
+    plt = pyplot()
+
     plt.clf()
 
 # Congiure graph parameters.
 def configureGraph(title: str, xLabel: str, yLabel: str, showGrid: bool = False) -> None:
     """`configureGraph` sets simulation graph parameters."""
     
+    plt = pyplot()
+
     plt.xlabel(xLabel)
     plt.ylabel(yLabel)
     plt.title(title)
@@ -24,6 +50,23 @@ def configureGraph(title: str, xLabel: str, yLabel: str, showGrid: bool = False)
 def plotGraph(xValues: NDArray, solutionResult: NDArray, solutionLabel: str, solutionType: str) -> None:
     """`plotGraph` computes the simulation graph values."""
 
+    plt = pyplot()
+
+    xAxis, yAxis = mirrorSolution(xValues, solutionResult, solutionType)
+
+    plt.plot(xAxis, yAxis, label=solutionLabel)
+
+    limitAxis(plt.gca(), xAxis)
+
+# Mirror a half domain solution.
+def mirrorSolution(xValues: NDArray, solutionResult: NDArray, solutionType: str) -> tuple[NDArray, NDArray]:
+    """`mirrorSolution` extends the half domain solution to the full -L to L domain according to its `solutionType` parity. \n
+        Full domain solutions of asymmetric models are returned unchanged.
+    """
+
+    if solutionType == "full":
+        return xValues, solutionResult
+
     # Obtaining the negative x half (from x -L to 0) of the function
     # This is only possible because of the fact that all solutions to the well potential are symmetrical
     xNegativeValues = xValues[:0:-1] * -1
@@ -38,13 +81,15 @@ def plotGraph(xValues: NDArray, solutionResult: NDArray, solutionLabel: str, sol
     xAxis = np.concatenate((xNegativeValues, xValues) )
     yAxis = np.concatenate((yNegativeValues, solutionResult) )
 
-    plt.plot(xAxis, yAxis, label=solutionLabel)
+    return xAxis, yAxis
 
-    # Get all major plot ticks based on overall x axis 
-    indices = np.linspace(0, xAxis.size-1, 5, dtype=int)
-    tickValues = np.round(xAxis[indices], 2)
+# Fit the horizontal axis to the plotted domain.
+def limitAxis(ax, xAxis: NDArray) -> None:
+    """`limitAxis` sets hard horizontal limits and 5 major ticks spanning `xAxis` on the axes `ax`."""
+
+    # Get all major plot ticks based on overall x axis, evenly spaced in x as the grid points may not be
+    tickValues = np.round(np.linspace(xAxis[0], xAxis[-1], 5), 2)
 
-    ax = plt.gca()
     ax.set_xlim(tickValues[0], tickValues[-1]) # Enforce hard limits for plot from -L ro L
     ax.set_xticks(tickValues) # Show major tick marks
 
@@ -52,6 +97,8 @@ def plotGraph(xValues: NDArray, solutionResult: NDArray, solutionLabel: str, sol
 def displayGraph() -> None:
     """`displayGraph` shows the computed simulation graph to the screen."""
 
+    plt = pyplot()
+
     plt.legend()
 
     plt.show()
@@ -60,6 +107,8 @@ def displayGraph() -> None:
 def saveGraph(outputPath: str = "data", graphName: str = "new-graph") -> None:
     """`saveGraph` saves the computed simulation graph to `outputPath/graphName`."""
 
+    plt = pyplot()
+
     # Check if output path exists
     os.makedirs(outputPath, exist_ok=True)
 
@@ -77,5 +126,100 @@ def defineWellGraph(wellWall: float) -> None:
     if wellWall == 0:
         return
 
+    plt = pyplot()
+
     plt.axvline(x=-wellWall, linestyle='--')
-    plt.axvline(x=wellWall, linestyle='--')
\ No newline at end of file
+    plt.axvline(x=wellWall, linestyle='--')
+
+# Render and save a whole graph without pyplot.
+def renderGraph(outputPath: str, graphName: str, formats: tuple[str, ...], title: str, xLabel: str, yLabel: str, wellWall: float, xValues: NDArray, curves: list[tuple[NDArray, str, str]]) -> list[str]:
+    """`renderGraph` draws the `curves` (solution values, label, parity type) on an explicit Agg `Figure` and saves it once per format. \n
+        No global pyplot state is touched, so graphs can be rendered on any thread or process. Returns the saved filenames.
+    """
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure: Figure = Figure()
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+
+    if wellWall != 0:
+        ax.axvline(x=-wellWall, linestyle='--')
+        ax.axvline(x=wellWall, linestyle='--')
+
+    ax.set_xlabel(xLabel)
+    ax.set_ylabel(yLabel)
+    ax.set_title(title)
+    ax.grid(True)
+
+    for solutionResult, solutionLabel, solutionType in curves:
+        xAxis, yAxis = mirrorSolution(xValues, solutionResult, solutionType)
+
+        ax.plot(xAxis, yAxis, label=solutionLabel)
+
+        limitAxis(ax, xAxis)
+
+    if len(curves) > 0:
+        ax.legend()
+
+    os.makedirs(outputPath, exist_ok=True)
+
+    filenames: list[str] = []
+    for format in formats:
+        filename: str = os.path.join(outputPath, "%s.%s" % (graphName, format))
+        figure.savefig(filename, format=format)
+
+        filenames.append(filename)
+
+    return filenames
+
+# Queue a graph export in the background.
+def exportGraph(outputPath: str, graphName: str, formats: tuple[str, ...], title: str, xLabel: str, yLabel: str, wellWall: float, xValues: NDArray, curves: list[tuple[NDArray, str, str]], exporter: str = "thread") -> concurrent.futures.Future:
+    """`exportGraph` renders and saves the graph with `renderGraph` on a background `exporter` (thread or process) and returns immediately. \n
+        The returned future holds the saved filenames, `waitExports` waits for every queued export.
+    """
+
+    for format in formats:
+        if format not in figureFormats:
+            raise ValueError("Unknown figure format '%s', expected one of: %s." % (format, ", ".join(figureFormats)))
+
+    if exporter not in exporters:
+        raise ValueError("Unknown exporter '%s', expected one of: %s." % (exporter, ", ".join(exporters)))
+
+    if exporter not in exportPools:
+        if exporter == "process":
+            exportPools[exporter] = concurrent.futures.ProcessPoolExecutor()
+        else:
+            exportPools[exporter] = concurrent.futures.ThreadPoolExecutor()
+
+    # The values are copied, so later runs of the simulation cannot change a graph that is still being drawn
+    curves = [(np.array(solutionResult), solutionLabel, solutionType) for solutionResult, solutionLabel, solutionType in curves]
+
+    future: concurrent.futures.Future = exportPools[exporter].submit(renderGraph, outputPath, graphName, tuple(formats), title, xLabel, yLabel, wellWall, np.array(xValues), curves)
+    pendingExports.append(future)
+
+    return future
+
+# Wait for the background graph exports.
+def waitExports() -> list[str]:
+    """`waitExports` blocks until every queued export is saved and returns their filenames. Export errors are raised here."""
+
+    filenames: list[str] = []
+
+    while len(pendingExports) > 0:
+        filenames.extend(pendingExports.pop(0).result())
+
+    return filenames
+
+# Shut the background export pools down.
+def closeExports() -> None:
+    """`closeExports` waits for the queued exports and shuts every export pool down, the next export starts a new one."""
+
+    while len(exportPools) > 0:
+        exportPools.popitem()[1].shutdown(wait=True)
+
+    pendingExports.clear()
+
+# The pools outlive single plots, their workers are stopped once the interpreter exits
+atexit.register(closeExports)
@@ -0,0 +1,206 @@
+# Package imports
+from __future__ import annotations
+import json
+import os
+import numpy as np
+from numpy.typing import NDArray
+
+# Optional HDF5 support
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# Custom imports
+import util.solution as sl
+
+# Available results file formats
+resultFormats: tuple[str, ...] = ("npy", "hdf5")
+
+class ResultsWriter:
+    """
+        Streams converged eigenstates to disk as they are found. Wavefunctions are rows of a preallocated memory-mapped `.npy`
+        file (or a resizable HDF5 dataset), next to a small JSON index of epsilons, parities and labels. The rows are grown by
+        doubling when the file is full, so only the index is ever held in memory.
+
+        Class variables:
+         #   path: str          - results directory
+         #   format: str        - file format: npy or hdf5
+         #   data: str          - stored wavefunction: normalised or result
+         #   dtype: type        - storage type of the wavefunctions
+         #   count: int         - number of written states
+         #   epsilons: list     - epsilon of every written state
+         #   parities: list     - parity code of every written state: even (=1), odd (=-1) or full (=0)
+         #   labels: list[str]  - plot label of every written state
+    """
+
+    def __init__(self, path: str, xValues: NDArray, capacity: int = 64, data: str = "normalised", dtype: type = np.float64, format: str = "npy"):
+        if format not in resultFormats:
+            raise ValueError("Unknown results format '%s', expected one of: %s." % (format, ", ".join(resultFormats)))
+
+        if format == "hdf5" and h5py is None:
+            raise ValueError("The hdf5 results format needs h5py, which is not installed.")
+
+        if data not in ("normalised", "result"):
+            raise ValueError("Unknown results data '%s', expected normalised or result." % data)
+
+        self.path = path
+        self.format = format
+        self.data = data
+        self.dtype = np.dtype(dtype)
+        self.xSize: int = xValues.size
+
+        self.count: int = 0
+        self.epsilons: list[float] = []
+        self.parities: list[int] = []
+        self.labels: list[str] = []
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "xValues.npy"), xValues)
+
+        self.file = None
+        self.rows = None
+        self.open(max(1, capacity))
+
+    def open(self, capacity: int) -> None:
+        """`open` creates the wavefunction storage with room for `capacity` states."""
+
+        if self.format == "hdf5":
+            self.file = h5py.File(os.path.join(self.path, "wavefunctions.h5"), "w")
+            self.rows = self.file.create_dataset("wavefunctions", shape=(capacity, self.xSize), maxshape=(None, self.xSize), dtype=self.dtype, chunks=(1, self.xSize))
+            return
+
+        self.rows = np.lib.format.open_memmap(os.path.join(self.path, "wavefunctions.npy"), mode="w+", dtype=self.dtype, shape=(capacity, self.xSize))
+
+    def capacity(self) -> int:
+        """`capacity` returns the number of states the storage can hold before growing."""
+
+        return self.rows.shape[0]
+
+    def grow(self, capacity: int) -> None:
+        """`grow` enlarges the storage to hold `capacity` states, keeping the written rows."""
+
+        if self.format == "hdf5":
+            self.rows.resize((capacity, self.xSize))
+            return
+
+        filename: str = os.path.join(self.path, "wavefunctions.npy")
+        temporary: str = os.path.join(self.path, "wavefunctions.%d.tmp.npy" % os.getpid())
+
+        # Rows are copied in blocks, so growing never loads the whole file
+        grown = np.lib.format.open_memmap(temporary, mode="w+", dtype=self.dtype, shape=(capacity, self.xSize))
+        for start in range(0, self.count, 1024):
+            grown[start:min(self.count, start + 1024)] = self.rows[start:min(self.count, start + 1024)]
+
+        grown.flush()
+        del self.rows, grown
+
+        os.replace(temporary, filename)
+        self.rows = np.lib.format.open_memmap(filename, mode="r+")
+
+    def write(self, solution) -> None:
+        """`write` appends one converged `solution` (Solution object or view) and updates the index."""
+
+        self.writeAll([solution])
+
+    def writeAll(self, solutions) -> None:
+        """`writeAll` appends every one of the `solutions`, then flushes the rows and updates the index once."""
+
+        for solution in solutions:
+            self.writeRow(solution)
+
+        self.flush()
+        self.writeIndex()
+
+    def writeRow(self, solution) -> None:
+        """`writeRow` copies the wavefunction of the `solution` into the next row, growing the storage when it is full."""
+
+        values: NDArray = solution.normalised if self.data == "normalised" else solution.result
+
+        if np.size(values) != self.xSize:
+            raise ValueError("Cannot write solution %s: it has %d values for a grid of %d points." % (solution.label, np.size(values), self.xSize))
+
+        if self.count == self.capacity():
+            self.grow(2 * self.capacity())
+
+        self.rows[self.count] = values
+        self.count += 1
+
+        self.epsilons.append(float(solution.epsilon))
+        self.parities.append(sl.parityCodes[solution.type])
+        self.labels.append(solution.label)
+
+    def flush(self) -> None:
+        """`flush` pushes the written rows to disk."""
+
+        if self.format == "hdf5":
+            self.file.flush()
+        else:
+            self.rows.flush()
+
+    def writeIndex(self) -> None:
+        """`writeIndex` saves the small index describing the written rows, replacing the old one atomically."""
+
+        index: dict = {
+            "count": self.count,
+            "format": self.format,
+            "data": self.data,
+            "dtype": self.dtype.str,
+            "epsilons": self.epsilons,
+            "parities": self.parities,
+            "labels": self.labels
+        }
+
+        temporary: str = os.path.join(self.path, "index.%d.tmp.json" % os.getpid())
+        with open(temporary, "w") as file:
+            json.dump(index, file)
+
+        os.replace(temporary, os.path.join(self.path, "index.json"))
+
+    def close(self) -> None:
+        """`close` flushes the written rows to disk and releases the file."""
+
+        if self.rows is None:
+            return
+
+        self.flush()
+
+        if self.format == "hdf5":
+            self.file.close()
+
+        self.rows = None
+        self.file = None
+
+# Open stored results lazily.
+def openResults(path: str) -> sl.SolutionSet:
+    """`openResults` opens the results stored under `path` as a read-only `SolutionSet`. \n
+        The wavefunctions stay on disk (memory-mapped, or an HDF5 dataset) and are only read when a state is accessed.
+    """
+
+    with open(os.path.join(path, "index.json")) as file:
+        index: dict = json.load(file)
+
+    xValues: NDArray = np.load(os.path.join(path, "xValues.npy"))
+
+    rows = None
+    if index["format"] == "hdf5":
+        if h5py is None:
+            raise ValueError("Results under %s are stored as hdf5, which needs h5py." % path)
+
+        rows = h5py.File(os.path.join(path, "wavefunctions.h5"), "r")["wavefunctions"]
+    else:
+        rows = np.load(os.path.join(path, "wavefunctions.npy"), mmap_mode="r")
+
+    # The set is built around the stored arrays without copying them
+    results: sl.SolutionSet = sl.SolutionSet(xValues, index["data"], np.dtype(index["dtype"]))
+    results.size = index["count"]
+    results.epsilonValues = np.array(index["epsilons"], dtype=float)
+    results.parityValues = np.array(index["parities"], dtype=np.int8)
+    results.labels = list(index["labels"])
+
+    if index["data"] == "normalised":
+        results.normalisedValues = rows
+    else:
+        results.resultValues = rows
+
+    return results
@@ -0,0 +1,298 @@
+# Package imports
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+
+# Custom imports
+import util.simulation as sm
+import util.parallel as pl
+import util.scan as scan
+import util.grid as grid
+import util.integrator as itg
+import util.bracket as br
+import util.results as rs
+
+# Ways a run point finds its states
+methods: tuple[str, ...] = ("eigen", "shooting")
+
+# Settings of a run point, in the order they are resolved: model defaults, config file, config run entry, command line
+runSettings: tuple[str, ...] = ("method", "xMin", "xMax", "xStep", "epsilonMin", "epsilonMax", "states", "solver", "refinement", "shooting", "spacing", "tolerance", "parameters", "plot", "results")
+
+# Discover the registered models.
+def discoverModels(root: str = "") -> dict[str, dict]:
+    """`discoverModels` imports every `main.py` module under `root/simulations` (the repository by default), which registers
+        their models with `simulation.registerModel`, and returns the registry. Modules failing to import are skipped with a warning.
+    """
+
+    if root == "":
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+    for directory, folders, files in os.walk(os.path.join(root, "simulations")):
+        folders[:] = sorted(folder for folder in folders if folder not in ("data", "__pycache__"))
+
+        if "main.py" not in files:
+            continue
+
+        module: str = ".".join(os.path.relpath(os.path.join(directory, "main"), root).split(os.sep))
+
+        try:
+            importlib.import_module(module)
+        except ImportError as error:
+            print("Warning discovering models: could not import %s (%s)." % (module, error))
+
+    return sm.models
+
+# Parse a parameter sweep.
+def parseParameter(text: str) -> tuple[str, list]:
+    """`parseParameter` splits a `name=value,value,...` sweep into the model attribute name and its values (integers or floats where possible)."""
+
+    if "=" not in text:
+        raise ValueError("Parameter '%s' is not of the form name=value,value,..." % text)
+
+    name, values = text.split("=", 1)
+
+    parsed: list = []
+    for value in values.split(","):
+        for convert in (int, float, str):
+            try:
+                parsed.append(convert(value))
+                break
+            except ValueError:
+                continue
+
+    return name.strip(), parsed
+
+# Build the run points.
+def buildPoints(runs: list[dict], overrides: dict) -> list[dict]:
+    """`buildPoints` resolves every run of the `runs` list against its model defaults and the command line `overrides`,
+        then expands parameter sweeps (lists of values) into one run point per combination.
+    """
+
+    points: list[dict] = []
+
+    for run in runs:
+        if run.get("model") not in sm.models:
+            raise ValueError("Unknown model '%s', expected one of: %s." % (run.get("model"), ", ".join(sorted(sm.models))))
+
+        defaults: dict = sm.models[run["model"]]
+
+        settings: dict = {"model": run["model"], "method": "eigen", "epsilonMax": None, "solver": "", "refinement": "", "shooting": "", "spacing": "uniform", "tolerance": None, "parameters": {}, "plot": False, "results": ""}
+        settings.update((name, defaults[name]) for name in ("xMin", "xMax", "xStep", "states", "epsilonMin"))
+        settings.update((name, run[name]) for name in runSettings if name in run)
+        settings.update((name, value) for name, value in overrides.items() if value is not None)
+
+        if settings["method"] not in methods:
+            raise ValueError("Unknown method '%s', expected one of: %s." % (settings["method"], ", ".join(methods)))
+
+        if settings["spacing"] not in grid.spacings:
+            raise ValueError("Unknown grid spacing '%s', expected one of: %s." % (settings["spacing"], ", ".join(grid.spacings)))
+
+        # An empty engine, refinement, shooting mode or results format keeps the model default
+        for name, choices in (("solver", itg.solvers), ("refinement", br.refinements), ("shooting", itg.shootingModes), ("results", rs.resultFormats)):
+            if settings[name] != "" and settings[name] not in choices:
+                raise ValueError("Unknown %s '%s', expected one of: %s." % (name, settings[name], ", ".join(choices)))
+
+        # Only parameters the model already has can be set, anything else would be set without effect and still reported as a sweep
+        model: sm.ModelSystem = defaults["model"]()
+        for name in settings["parameters"]:
+            if not hasattr(model, name):
+                raise ValueError("Unknown parameter '%s' of model '%s'." % (name, run["model"]))
+
+        # Every combination of the swept parameters is its own run point
+        sweeps: dict[str, list] = {name: values if isinstance(values, list) else [values] for name, values in settings["parameters"].items()}
+        for combination in itertools.product(*sweeps.values()):
+            points.append(dict(settings, parameters=dict(zip(sweeps.keys(), combination))))
+
+    return points
+
+# Run one run point.
+def runPoint(point: dict) -> dict:
+    """`runPoint` builds the model and simulation of the run `point`, solves its states and returns a summary of the run. \n
+        Runs in worker processes, so it only takes and returns plain data.
+    """
+
+    discoverModels()
+
+    # Wall time measures the run, CPU time of the process the work it actually got, which differ when runs share cores
+    start: float = time.perf_counter()
+    cpuStart: float = time.process_time()
+    registration: dict = sm.models[point["model"]]
+
+    model: sm.ModelSystem = registration["model"]()
+    for name, value in point["parameters"].items():
+        setattr(model, name, value)
+
+    parameterText: str = ", ".join("%s = %g" % (name, value) if isinstance(value, (int, float)) else "%s = %s" % (name, value) for name, value in point["parameters"].items())
+    title: str = "%s %s run" % (model.label, point["method"]) + (" (%s)" % parameterText if parameterText != "" else "")
+
+    simulation: sm.Simulation = sm.Simulation(title)
+    simulation.modifyGrid(point["xMin"], point["xMax"], point["xStep"], registration["wellWall"], spacing=point["spacing"], epsilonMax=point["epsilonMax"])
+    simulation.modifyModel(model)
+
+    if point["plot"]:
+        simulation.modifyPlotting(True)
+
+    window: bool = point["epsilonMax"] is not None
+    try:
+        if point["solver"] != "":
+            simulation.modifySolver(point["solver"])
+
+        if point["refinement"] != "":
+            simulation.modifyRefinement(point["refinement"])
+
+        if point["shooting"] != "":
+            simulation.modifyShooting(point["shooting"])
+
+        if point["results"] != "":
+            simulation.modifyResults(point["results"])
+
+        # The grid is refined on the requested states before they are solved
+        if point["tolerance"] is not None:
+            simulation.adaptGrid(point["tolerance"], 0, int(point["states"]) - 1, point["epsilonMin"], point["method"])
+
+        if point["method"] == "eigen" and window:
+            simulation.runEigen(epsilonWindow=(point["epsilonMin"], point["epsilonMax"]), plot=point["plot"])
+        elif point["method"] == "eigen":
+            simulation.runEigen(0, int(point["states"]) - 1, plot=point["plot"])
+        elif window:
+            simulation.configureModel()
+            brackets: list = []
+            for parity in scan.modelParities(model):
+                brackets.extend(scan.scanBrackets(model, simulation.xValues, point["epsilonMin"], point["epsilonMax"], parity))
+
+            simulation.runBracket(sorted(brackets, key=lambda bracket: bracket.low), point["plot"])
+        else:
+            simulation.runStates(0, int(point["states"]) - 1, point["plot"], point["epsilonMin"])
+    except ValueError as error:
+        return {"model": point["model"], "title": title, "parameters": point["parameters"], "error": str(error), "states": 0, "seconds": time.perf_counter() - start, "cpuSeconds": time.process_time() - cpuStart}
+
+    simulation.waitPlots()
+    simulation.closeResults()
+
+    return {
+        "model": point["model"],
+        "title": title,
+        "parameters": point["parameters"],
+        "method": point["method"],
+        "points": int(simulation.xValues.size),
+        "states": len(simulation.solutions),
+        "epsilons": [float(epsilon) for epsilon in simulation.solutions.epsilons],
+        "seconds": time.perf_counter() - start,
+        "cpuSeconds": time.process_time() - cpuStart
+    }
+
+# Run every run point.
+def runPoints(points: list[dict], workers: int = 0) -> dict:
+    """`runPoints` runs the `points` concurrently on `workers` processes (every core by default) and returns the run summaries
+        with the overall throughput in states per second.
+    """
+
+    workerCount: int = min(pl.getWorkerCount(workers), max(1, len(points)))
+
+    start: float = time.perf_counter()
+
+    # Run points differ a lot in cost, so they are handed out one at a time
+    summaries: list[dict] = pl.mapOrdered(runPoint, points, "process" if workerCount > 1 else "serial", workerCount, 1)
+
+    wallTime: float = time.perf_counter() - start
+    stateCount: int = sum(summary["states"] for summary in summaries)
+
+    # Summed wall times of runs sharing a core overlap, so the speedup is measured on the CPU time the runs used
+    cpuTime: float = sum(summary["cpuSeconds"] for summary in summaries)
+
+    return {
+        "workers": workerCount,
+        "wallTime": wallTime,
+        "cpuTime": cpuTime,
+        "states": stateCount,
+        "statesPerSecond": stateCount / wallTime if wallTime > 0 else 0.0,
+        "runs": summaries
+    }
+
+# Print the run summaries.
+def printReport(report: dict) -> None:
+    """`printReport` prints one line per run and the overall throughput."""
+
+    for summary in report["runs"]:
+        if "error" in summary:
+            print("%-50s error: %s" % (summary["title"], summary["error"]))
+            continue
+
+        print("%-50s %4d states %9.3f s %10.1f states/s" % (summary["title"], summary["states"], summary["seconds"], summary["states"] / summary["seconds"] if summary["seconds"] > 0 else 0))
+
+    print("\n%d runs, %d states in %.3f s on %d workers: %.1f states/s (%.3f s of CPU time, %.2fx parallel speedup)" % (
+        len(report["runs"]), report["states"], report["wallTime"], report["workers"], report["statesPerSecond"], report["cpuTime"],
+        report["cpuTime"] / report["wallTime"] if report["wallTime"] > 0 else 0
+    ))
+
+def main(arguments: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m util", description="Run registered model simulations, several models and parameter points at once across cores.")
+    parser.add_argument("models", nargs="*", help="registered models to run (default: every model, or the runs of --config)")
+    parser.add_argument("--list", action="store_true", help="list the registered models and their defaults")
+    parser.add_argument("--config", default="", help="JSON file with run settings, either one run or {\"runs\": [...]} with shared settings around it")
+    parser.add_argument("--method", dest="method", choices=methods, help="eigen (finite-difference eigensolver, default) or shooting")
+    parser.add_argument("--x-min", dest="xMin", type=float, help="start of the integration grid")
+    parser.add_argument("--x-max", dest="xMax", type=float, help="end of the integration grid")
+    parser.add_argument("--x-step", dest="xStep", type=float, help="grid step")
+    parser.add_argument("--epsilon-min", dest="epsilonMin", type=float, help="lower end of the energy range")
+    parser.add_argument("--epsilon-max", dest="epsilonMax", type=float, help="upper end of the energy range, solves every state in the range instead of --states")
+    parser.add_argument("--states", dest="states", type=int, help="number of lowest states solved when no energy range is given")
+    parser.add_argument("--solver", dest="solver", choices=itg.solvers, help="integration engine: odeint, rk4, numerov or jit")
+    parser.add_argument("--refinement", dest="refinement", choices=br.refinements, help="bracket refinement: bisection, brent, illinois or secant")
+    parser.add_argument("--shooting", dest="shooting", choices=itg.shootingModes, help="shooting mode: outward or matched (two-sided, matched at the turning point)")
+    parser.add_argument("--spacing", dest="spacing", choices=grid.spacings, help="grid spacing: uniform, or graded by the potential (needs --epsilon-max or --tolerance)")
+    parser.add_argument("--tolerance", dest="tolerance", type=float, help="halve the grid step until the estimated energy error of the --states lowest states drops below it")
+    parser.add_argument("--set", dest="sweeps", action="append", default=[], metavar="NAME=VALUES", help="model attribute to set, a comma separated list sweeps it (repeatable)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: every core)")
+    parser.add_argument("--plot", dest="plot", action="store_const", const=True, help="save a headless PNG of every run to the model data path")
+    parser.add_argument("--results", dest="results", choices=rs.resultFormats, help="stream the states to the model data path: npy or hdf5")
+    parser.add_argument("--output", default="", help="JSON file the run summaries are written to")
+    options = parser.parse_args(arguments)
+
+    discoverModels()
+
+    if options.list:
+        for name, registration in sorted(sm.models.items()):
+            print("%-12s %-28s x = [%g, %g], step %g, %d states" % (name, registration["model"].__name__, registration["xMin"], registration["xMax"], registration["xStep"], registration["states"]))
+
+        return
+
+    shared: dict = {}
+    runs: list[dict] = []
+    if options.config != "":
+        with open(options.config) as file:
+            config: dict = json.load(file)
+
+        shared = {name: value for name, value in config.items() if name != "runs"}
+        runs = [dict(shared, **run) for run in config.get("runs", [])] or [shared]
+
+    # Models named on the command line replace the runs of the config file
+    if len(options.models) > 0:
+        runs = [dict(shared, model=name) for name in options.models]
+    elif len(runs) == 0:
+        runs = [{"model": name} for name in sorted(sm.models)]
+
+    try:
+        overrides: dict = {name: getattr(options, name) for name in runSettings if hasattr(options, name)}
+        if len(options.sweeps) > 0:
+            overrides["parameters"] = dict(parseParameter(sweep) for sweep in options.sweeps)
+
+        points: list[dict] = buildPoints(runs, overrides)
+    except ValueError as error:
+        parser.error(str(error))
+
+    report: dict = runPoints(points, options.workers)
+
+    printReport(report)
+
+    if options.output != "":
+        os.makedirs(os.path.dirname(options.output) or ".", exist_ok=True)
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
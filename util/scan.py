@@ -0,0 +1,181 @@
+# Package imports
+from __future__ import annotations
+import numpy as np
+from numpy.typing import NDArray
+
+# Custom imports
+import util.bracket as br
+import util.integrator as itg
+
+# Count the nodes of shooting solutions.
+def countNodes(psiValues: NDArray) -> NDArray:
+    """`countNodes` counts the sign changes of every solution column in `psiValues`, skipping the first grid point. \n
+        The first point is skipped because odd solutions start exactly at zero.
+    """
+
+    signs: NDArray = np.signbit(psiValues[1:])
+
+    return np.count_nonzero(signs[1:] != signs[:-1], axis=0)
+
+# Shoot a batch of epsilons and keep only what the scanner needs.
+def shootNodes(model: "simulation.ModelSystem", xValues: NDArray, epsilonValues: NDArray, parity: str) -> tuple[NDArray, NDArray]:
+    """`shootNodes` integrates the `model` for every epsilon and returns the node counts and endpoint values of the solutions."""
+
+    psiValues: NDArray = itg.integrateBatch(model, xValues, epsilonValues, parity)
+
+    # Later bracket refinement starts from these epsilons, so keep their endpoints for it
+    br.memoiseEndpoints(model, xValues, epsilonValues, parity, psiValues[-1])
+
+    return countNodes(psiValues), psiValues[-1]
+
+# Adaptive coarse-to-fine energy scanning.
+def scanBrackets(model: "simulation.ModelSystem", xValues: NDArray, epsilonMin: float, epsilonMax: float, parity: str, samples: int = 16, minWidth: float = 1e-6, maxDepth: int = 40) -> list[br.Bracket]:
+    """`scanBrackets` finds epsilon brackets containing exactly one solution of the given `parity` between `epsilonMin` and `epsilonMax`. \n
+        The range is sampled coarsely with `samples` epsilons. Following the Sturm oscillation theorem the node count of the
+        shooting solution grows by one at every eigenvalue, so only intervals whose node counts differ are subdivided, until
+        each holds a single endpoint sign change. All midpoints of one refinement level are integrated in a single batch.
+    """
+
+    epsilonValues: NDArray = np.linspace(epsilonMin, epsilonMax, max(2, samples))
+    nodes, endpoints = shootNodes(model, xValues, epsilonValues, parity)
+
+    # Pending intervals as (low, high, nodes low, nodes high, endpoint low, endpoint high)
+    intervals: list[tuple] = [
+        (epsilonValues[i], epsilonValues[i + 1], nodes[i], nodes[i + 1], endpoints[i], endpoints[i + 1])
+        for i in range(epsilonValues.size - 1)
+    ]
+
+    brackets: list[br.Bracket] = []
+
+    for depth in range(maxDepth + 1):
+        subdivide: list[tuple] = []
+
+        for interval in intervals:
+            low, high, nodesLow, nodesHigh, endpointLow, endpointHigh = interval
+
+            # Equal node counts mean no eigenvalue in between
+            if nodesLow == nodesHigh and np.sign(endpointLow) == np.sign(endpointHigh):
+                continue
+
+            # A single eigenvalue shows up as one extra node together with an endpoint sign change
+            if abs(nodesHigh - nodesLow) == 1 and np.sign(endpointLow) != np.sign(endpointHigh):
+                brackets.append(br.Bracket(low, high, parity))
+                continue
+
+            if high - low < minWidth or depth == maxDepth:
+                # Cannot be resolved any further, keep it if the endpoint still changes sign
+                if np.sign(endpointLow) != np.sign(endpointHigh):
+                    brackets.append(br.Bracket(low, high, parity))
+                continue
+
+            subdivide.append(interval)
+
+        if len(subdivide) == 0:
+            break
+
+        # Integrate every midpoint of this level at once
+        midpoints: NDArray = np.array([(interval[0] + interval[1]) / 2 for interval in subdivide])
+        nodes, endpoints = shootNodes(model, xValues, midpoints, parity)
+
+        intervals = []
+        for interval, mid, nodesMid, endpointMid in zip(subdivide, midpoints, nodes, endpoints):
+            low, high, nodesLow, nodesHigh, endpointLow, endpointHigh = interval
+
+            intervals.append((low, mid, nodesLow, nodesMid, endpointLow, endpointMid))
+            intervals.append((mid, high, nodesMid, nodesHigh, endpointMid, endpointHigh))
+
+    return sorted(brackets, key=lambda bracket: bracket.low)
+
+# Check whether a model is solved on the half domain.
+def isSymmetric(model: "simulation.ModelSystem") -> bool:
+    """`isSymmetric` checks whether the `model` potential is symmetric, so its states are shot on the half domain by parity. \n
+        Defaults to symmetric, asymmetric models set `symmetric` to False and are shot on the full domain.
+    """
+
+    return not hasattr(model, "symmetric") or model.symmetric
+
+# Determine the shooting parities of a model.
+def modelParities(model: "simulation.ModelSystem") -> tuple[str, ...]:
+    """`modelParities` returns the parities the states of the `model` are shot with: even and odd, or full for asymmetric models."""
+
+    return ("even", "odd") if isSymmetric(model) else ("full",)
+
+# Determine the shooting parity of a state.
+def stateParity(model: "simulation.ModelSystem", index: int) -> tuple[str, int]:
+    """`stateParity` maps the overall state `index` (0 for the ground state) to its parity and its index among the states of that parity. \n
+        Symmetric models alternate even and odd states, starting with an even ground state. Asymmetric models have full domain states only.
+    """
+
+    if not isSymmetric(model):
+        return "full", index
+
+    if index % 2 == 0:
+        return "even", index // 2
+
+    return "odd", index // 2
+
+# Node-counting search for states by index.
+def stateBrackets(model: "simulation.ModelSystem", xValues: NDArray, indices: list[int], parity: str, epsilonMin: float = 0, epsilonStep: float = 1, maxIterations: int = 60) -> list[br.Bracket]:
+    """`stateBrackets` finds one bracket for each requested state of the given `parity`, where `indices` count the states of that parity. \n
+        By the Sturm oscillation theorem the shooting solution has exactly `k` nodes between the `k`-th and the next eigenvalue,
+        so every state is isolated by bisecting on the node count instead of scanning the whole energy range below it.
+        `epsilonMin` must lie below the lowest eigenvalue. All requested states are bisected together, one batch per iteration.
+        States that cannot be isolated within `maxIterations` get None in their place, with a warning.
+    """
+
+    targets: NDArray = np.asarray(indices, dtype=int)
+
+    if targets.size == 0:
+        return []
+
+    nodesMin, endpointMin = shootNodes(model, xValues, np.array([epsilonMin]), parity)
+
+    low: NDArray = np.full(targets.size, float(epsilonMin))
+    nodesLow: NDArray = np.full(targets.size, nodesMin[0])
+    endpointLow: NDArray = np.full(targets.size, endpointMin[0])
+
+    # Grow the upper ends geometrically until they lie above the requested states
+    high: NDArray = np.full(targets.size, epsilonMin + epsilonStep)
+    nodesHigh, endpointHigh = shootNodes(model, xValues, high, parity)
+
+    for i in range(maxIterations):
+        below: NDArray = nodesHigh <= targets
+
+        if not below.any():
+            break
+
+        # The old upper end is a valid lower end for these states
+        low[below], nodesLow[below], endpointLow[below] = high[below], nodesHigh[below], endpointHigh[below]
+
+        high[below] = epsilonMin + 2 * (high[below] - epsilonMin)
+        nodesHigh[below], endpointHigh[below] = shootNodes(model, xValues, high[below], parity)
+
+    # Bisect on the node count until exactly one eigenvalue remains in every bracket
+    for i in range(maxIterations):
+        pending: NDArray = (nodesLow != targets) | (nodesHigh != targets + 1) | (np.sign(endpointLow) == np.sign(endpointHigh))
+
+        if not pending.any():
+            break
+
+        mid: NDArray = (low[pending] + high[pending]) / 2
+        nodesMid, endpointMid = shootNodes(model, xValues, mid, parity)
+
+        lowerHalf: NDArray = nodesMid > targets[pending]
+
+        indicesPending: NDArray = np.flatnonzero(pending)
+        moveHigh: NDArray = indicesPending[lowerHalf]
+        moveLow: NDArray = indicesPending[~lowerHalf]
+
+        high[moveHigh], nodesHigh[moveHigh], endpointHigh[moveHigh] = mid[lowerHalf], nodesMid[lowerHalf], endpointMid[lowerHalf]
+        low[moveLow], nodesLow[moveLow], endpointLow[moveLow] = mid[~lowerHalf], nodesMid[~lowerHalf], endpointMid[~lowerHalf]
+
+    brackets: list[br.Bracket] = []
+    for i, target in enumerate(targets):
+        if nodesLow[i] != target or nodesHigh[i] != target + 1:
+            print("Warning finding state %d (%s): could not isolate it above epsilon = %f." % (target, parity, epsilonMin))
+            brackets.append(None)
+            continue
+
+        brackets.append(br.Bracket(low[i], high[i], parity))
+
+    return brackets
@@ -1,4 +1,6 @@
 # Package imports
+from __future__ import annotations
+import os
 import numpy as np
 from numpy.typing import NDArray
 
@@ -7,6 +9,21 @@ import util.plot as plot
 import util.core as core
 import util.solution as sl
 import util.bracket as br
+import util.integrator as itg
+import util.parallel as pl
+import util.cache as ch
+import util.memo as memo
+import util.instrument as ins
+import util.results as rs
+import util.scan as scan
+import util.eigen as eigen
+import util.grid as grid
+
+# Independent starting states at the end of the grid, which two-sided shooting combines into the decaying tail
+inwardConditions: dict[str, list] = {
+    "inward": [0, -1], # Vanishing wavefunction, positive inside the grid like the decaying tail
+    "inwardValue": [1, 0] # Unit wavefunction with zero slope
+}
 
 # Base model system object class.
 class ModelSystem:
@@ -16,29 +33,147 @@ class ModelSystem:
         #   label: str              - name of the model system
         #   initialConditions: dict - model system initial conditions
         #   dataPath: str           - path to simulation data
+        #   solver: str             - integration engine: odeint (adaptive, per epsilon), rk4, numerov (fixed-step, batched over epsilons)
+        #                             or jit (compiled rk4 with numba, falls back to odeint without it)
+        #   energyScale: float      - factor k in the Schrodinger form psi'' = k * (V(x) - epsilon) * psi
+
+       Optional bracketing variables:
+        #   iterationCount: int     - maximum refinement iterations per bracket
+        #   approximatation: float  - bracket refinement tolerance
+        #   refinement: str         - bracket root refinement strategy: bisection, brent, illinois or secant
+        #   shooting: str           - outward (the endpoint must vanish) or matched (outward and inward solutions matched at the
+        #                             classical turning point, stable for high and deep states)
+
+       Optional solver variables:
+        #   odeintSteps: int        - most internal odeint steps per grid interval, 500 (the odeint default) when not given
+
+       Optional solution variables:
+        #   quadrature: str         - normalisation quadrature: trapezoid or simpson
+
+       Optional domain variables:
+        #   symmetric: bool         - False for asymmetric potentials, whose states are shot over the whole grid with the `full`
+        #                             initial conditions instead of over the half domain by parity
     """
 
     # Abstract object constructor.
     def __init__(self) -> None:
         self.label: str = "New Model System" # Abstract non-empty model label
         self.dataPath: str = "data"
+        self.solver: str = "odeint"
+        self.energyScale: float = 1
         self.initialConditions: dict = {
             "odd": [],
             "even": []
         }
 
-    # Abstract model system.
-    def system(self) -> list:
-        """Model system structure."""
+    # Abstract model potential.
+    def potential(self, x: NDArray) -> NDArray:
+        """Model potential V(x). Should accept both scalar and array `x` values."""
 
-        return []
+        return 0 * x
+
+    # Fast scalar model potential.
+    def potentialScalar(self, x: float) -> float:
+        """Model potential V(x) for a single float `x`, used on every right-hand-side evaluation of the adaptive solver. \n
+            Defaults to `potential`, models with an analytic potential should override it with plain float arithmetic.
+        """
+
+        return self.potential(x)
+
+    # Model potential tabulated on a grid.
+    def tabulatePotential(self, xValues: NDArray) -> NDArray:
+        """Model potential V(x) evaluated on the whole `xValues` grid. \n
+            Tables of the last few grids are kept on the model and reused for as long as the model parameters stay the same.
+        """
+
+        fingerprint: str = ch.modelFingerprint(self)
+        key: tuple = memo.gridKey(xValues)
+
+        # Changed parameters invalidate every table
+        if getattr(self, "_potentialFingerprint", None) != fingerprint:
+            self._potentialFingerprint: str = fingerprint
+            self._potentialTables: dict[tuple, NDArray] = {}
+
+        if key in self._potentialTables:
+            return self._potentialTables[key]
+
+        potentialValues: NDArray = np.array(np.broadcast_to(self.potential(xValues), xValues.shape), dtype=float)
+        potentialValues.flags.writeable = False
+
+        # Solvers need at most the grid nodes and midpoints, so only a few grids are kept
+        if len(self._potentialTables) >= 4:
+            self._potentialTables.pop(next(iter(self._potentialTables)))
+
+        self._potentialTables[key] = potentialValues
+
+        return potentialValues
+
+    # Model system in the Schrodinger form.
+    def system(self, y: NDArray, x: float, epsilon: float) -> list:
+        """Model system structure: psi' and psi'' = k * (V(x) - epsilon) * psi. \n
+            Batched solvers call it with a stacked (2, N) state and an array of N epsilons,
+            so overriding right-hand sides should be written with element-wise operations only.
+        """
+
+        psi, dpsi = y # psi and psi derivative
+
+        return [dpsi, self.energyScale * (self.potentialScalar(x) - epsilon) * psi]
 
     # Determine class initial conditions.
     def getInitialConditions(self, type: str) -> list:
-        """Adapt model system initial conditions based on given `type`."""
+        """Adapt model system initial conditions based on given `type`. \n
+            Unless the model defines its own, the `inward` and `inwardValue` solutions two-sided shooting combines start from
+            a vanishing and a unit value at the end of the grid.
+        """
+
+        if type in inwardConditions and type not in self.initialConditions:
+            return inwardConditions[type]
 
         return self.initialConditions[type]
 
+    # Determine stacked initial conditions for a batch of epsilons.
+    def getBatchInitialConditions(self, type: str, count: int) -> NDArray:
+        """Stack the model initial conditions of the given `type` into a (2, `count`) state array."""
+
+        initialConditions: NDArray = np.asarray(self.getInitialConditions(type), dtype=float)
+
+        return np.repeat(initialConditions[:, np.newaxis], count, axis=1)
+
+# Model system of an analytic potential.
+class PotentialModel(ModelSystem):
+    """Model system built from a vectorized potential function, so a new potential needs no hand-written right-hand side. \n
+       The potential is tabulated once per grid and integrated with a fixed-step batched solver by default.
+
+       Class variables:
+        #   function: function      - vectorized potential V(x), taking a float or an array of x values
+        #   symmetric: bool         - whether V(-x) = V(x): symmetric models are shot from x = 0 by parity,
+        #                             asymmetric ones from the left end of the grid with the `full` initial conditions
+    """
+
+    # Potential model constructor
+    def __init__(self, function, label: str = "Potential Model", dataPath: str = "data", energyScale: float = 1, symmetric: bool = True, solver: str = "numerov") -> None:
+        self.label: str = label
+        self.dataPath: str = dataPath
+        self.solver: str = solver
+        self.energyScale: float = energyScale
+        self.function = function
+        self.symmetric: bool = symmetric
+        self.initialConditions: dict = {
+            "odd": [0, 1],
+            "even": [1, 0],
+            "full": [0, 1] # The wavefunction vanishes at the left boundary of the grid
+        }
+
+    def potential(self, x: NDArray) -> NDArray:
+        """Potential V(x) given by the model `function`."""
+
+        return self.function(x)
+
+    def potentialScalar(self, x: float) -> float:
+        """Potential V(x) for a single `x`, as a plain float."""
+
+        return float(self.function(x))
+
 # Base simulation object
 class Simulation:
     """Base simulation object class.
@@ -48,9 +183,35 @@ class Simulation:
         #   xLabel: str         - horizontal axis label
         #   yLabel: str         - vertical axis label
         #   xValues: NDArray      - list of all horizontal axis points
+        #   xMin: float         - start of the simulation grid
+        #   xMax: float         - end of the simulation grid
+        #   xStep: float        - grid step, inside the classically allowed region for graded grids
+        #   spacing: str        - how the grid points are spaced: uniform or graded by the model potential
+        #   gridEnergy: float   - energy whose classically allowed region a graded grid keeps dense (None until given or adapted)
+        #   tailStep: float     - largest step of a graded grid in the forbidden tails (0 uses ten times `xStep`)
+        #   gridKey: tuple      - model and settings the current graded grid was built for
         #   model: ModelSystem  - model functions for which the solution was found
-
-        #   solutions: list[Solution] - all computed solutions of the model system
+        #   solver: str         - integration engine forced onto the model (empty keeps the model choice)
+        #   refinement: str     - bracket refinement strategy forced onto the model (empty keeps the model choice)
+        #   shooting: str       - shooting mode forced onto the model (empty keeps the model choice)
+        #   executor: str       - how independent epsilons and brackets are processed: serial or process
+        #   workers: int        - number of worker processes for the process executor (0 uses every core)
+        #   cacheBytes: int     - size bound of the persistent eigenstate cache under the model `dataPath` (0 disables it)
+        #   cache: EigenCache   - persistent eigenstate cache of the current model
+        #   report: RunReport   - stage timings and solver call counts of the runs (None when instrumentation is off)
+        #   reportFormats: tuple - formats the report is dumped in next to the plot: json and/or trace
+        #   headless: bool      - plot without a display: render on a background exporter instead of showing the graph
+        #   figureFormats: tuple - file formats headless plots are saved in: png, svg and/or pdf
+        #   exporter: str       - where headless plots are rendered: thread or process
+
+        #   solutionKeep: str   - solution data kept after a run: both, normalised (raw results dropped) or result
+        #   solutionDtype: type - storage type of the kept wavefunctions, e.g. float64 or float32
+
+        #   resultsFormat: str  - format converged states are streamed to disk in: npy or hdf5 (empty disables the writer)
+        #   resultsData: str    - wavefunction streamed to disk: normalised or result
+        #   writers: dict       - open results writers by results directory
+
+        #   solutions: SolutionSet - all computed solutions of the model system
     """
 
     # Object constructor with optional values.
@@ -68,16 +229,54 @@ class Simulation:
         self.xLabel: str = "x (dimensionless)" # Abstract non-empty x axis label
         self.yLabel: str = "y (dimensionless)" # Abstract non-empty y axis label
         self.xValues: NDArray = np.array([])
+        self.xMin: float = 0
+        self.xMax: float = 0
+        self.xStep: float = 0
+        self.spacing: str = "uniform"
+        self.gridEnergy: float = None # Graded grids need an energy, given or found by `adaptGrid`
+        self.tailStep: float = 0 # Zero tail step grows the graded grid step up to ten times `xStep`
+        self.gridKey: tuple = ()
         self.wellWall: float = 0
         self.model: ModelSystem = None
-        self.solutions: list = []
+        self.solver: str = "" # Empty solver keeps the model own integration engine
+        self.refinement: str = "" # Empty refinement keeps the model own bracket refinement strategy
+        self.shooting: str = "" # Empty shooting keeps the model own shooting mode
+        self.executor: str = "serial"
+        self.workers: int = 0 # Zero workers uses every available core
+        self.cacheBytes: int = 0 # Zero disables the persistent eigenstate cache
+        self.cache: ch.EigenCache = None
+        self.report: ins.RunReport = None
+        self.reportFormats: tuple[str, ...] = ()
+        self.headless: bool = False
+        self.figureFormats: tuple[str, ...] = ("png",)
+        self.exporter: str = "thread"
+        self.solutionKeep: str = "both"
+        self.solutionDtype: type = np.float64
+        self.resultsFormat: str = "" # Empty format keeps the results in memory only
+        self.resultsData: str = "normalised"
+        self.writers: dict[str, rs.ResultsWriter] = {}
+        self.solutions: sl.SolutionSet = sl.SolutionSet(self.xValues)
 
     # Define a new simulation space.
-    def modifyGrid(self, xMin: float, xMax: float, xStep: float, wellWall: float = 0, xLabel: str = "", yLabel: str = "") -> None:
-        """`modifyGrid` defines a new simulation space."""
-        
+    def modifyGrid(self, xMin: float, xMax: float, xStep: float, wellWall: float = 0, xLabel: str = "", yLabel: str = "", spacing: str = "uniform", epsilonMax: float = None, tailStep: float = 0) -> None:
+        """`modifyGrid` defines a new simulation space. \n
+            The `graded` spacing keeps `xStep` where the model potential lies below `epsilonMax` and lets the step grow up to
+            `tailStep` in the forbidden tails. It follows the model potential, so it is built once the model is configured for a run.
+        """
+
+        if spacing not in grid.spacings:
+            raise ValueError("Unknown grid spacing '%s', expected one of: %s." % (spacing, ", ".join(grid.spacings)))
+
+        self.xMin = xMin
+        self.xMax = xMax
+        self.xStep = xStep
+        self.spacing = spacing
+        self.gridEnergy = epsilonMax
+        self.tailStep = tailStep
+        self.gridKey = ()
+
         # Overall simulation integration range
-        self.xValues = np.linspace(xMin, xMax, int(xMax/xStep))
+        self.xValues = grid.uniformGrid(xMin, xMax, xStep)
 
         if xLabel != "":
             self.xLabel = xLabel
@@ -94,11 +293,329 @@ class Simulation:
         
         self.model = model
 
+    # Change the simulation integration engine.
+    def modifySolver(self, solver: str) -> None:
+        """`modifySolver` selects the integration engine used for every model of the simulation: odeint, rk4, numerov or jit."""
+
+        if solver not in itg.solvers:
+            raise ValueError("Unknown solver '%s', expected one of: %s." % (solver, ", ".join(itg.solvers)))
+
+        self.solver = solver
+
+    # Change the simulation bracket refinement strategy.
+    def modifyRefinement(self, refinement: str) -> None:
+        """`modifyRefinement` selects the bracket root refinement strategy: bisection, brent, illinois or secant."""
+
+        if refinement not in br.refinements:
+            raise ValueError("Unknown refinement '%s', expected one of: %s." % (refinement, ", ".join(br.refinements)))
+
+        self.refinement = refinement
+
+    # Change the simulation shooting mode.
+    def modifyShooting(self, shooting: str) -> None:
+        """`modifyShooting` selects the shooting mode: outward, where the endpoint must vanish, or matched, where the solutions
+            shot from both ends are matched at the classical turning point.
+        """
+
+        if shooting not in itg.shootingModes:
+            raise ValueError("Unknown shooting mode '%s', expected one of: %s." % (shooting, ", ".join(itg.shootingModes)))
+
+        self.shooting = shooting
+
+    # Change the simulation executor.
+    def modifyExecutor(self, executor: str, workers: int = 0) -> None:
+        """`modifyExecutor` selects how independent epsilons and brackets are processed: serially or on a process pool of `workers`. \n
+            The process executor requires a picklable model, meaning a module level class without lambdas or open resources.
+        """
+
+        if executor not in pl.executors:
+            raise ValueError("Unknown executor '%s', expected one of: %s." % (executor, ", ".join(pl.executors)))
+
+        self.executor = executor
+        self.workers = workers
+
+    # Change the persistent eigenstate cache.
+    def modifyCache(self, maxBytes: int) -> None:
+        """`modifyCache` enables the persistent eigenstate cache under `<model dataPath>/cache`, bounded to `maxBytes`. Zero disables it."""
+
+        self.cacheBytes = maxBytes
+        self.cache = None
+
+    # Change how the simulation keeps its solutions.
+    def modifyStorage(self, keep: str = "both", dtype: type = np.float64) -> None:
+        """`modifyStorage` selects what the solution set of every following run keeps: `both` raw and normalised wavefunctions,
+            only the `normalised` ones or only the raw `result`, stored with the given `dtype` (float32 halves the memory).
+        """
+
+        if keep not in sl.storageModes:
+            raise ValueError("Unknown storage mode '%s', expected one of: %s." % (keep, ", ".join(sl.storageModes)))
+
+        self.solutionKeep = keep
+        self.solutionDtype = dtype
+
+    # Change how converged states are written to disk.
+    def modifyResults(self, format: str = "npy", data: str = "normalised") -> None:
+        """`modifyResults` streams the converged states of every following run to `dataPath/results/<title>` in the given
+            `format` (memory-mapped npy, or hdf5 when h5py is installed), storing the `data` wavefunction: normalised or result.
+            The stored states can be opened lazily with `results.openResults`. An empty `format` turns the writer off.
+        """
+
+        if format != "" and format not in rs.resultFormats:
+            raise ValueError("Unknown results format '%s', expected one of: %s." % (format, ", ".join(rs.resultFormats)))
+
+        self.closeResults()
+
+        self.resultsFormat = format
+        self.resultsData = data
+
+    # Close the results writers.
+    def closeResults(self) -> None:
+        """`closeResults` flushes and closes every open results writer."""
+
+        for writer in self.writers.values():
+            writer.close()
+
+        self.writers.clear()
+
+    # Store the solutions of a run.
+    def storeSolutions(self, solutions: list[sl.Solution]) -> sl.SolutionSet:
+        """`storeSolutions` packs the `solutions` of a run into the simulation solution set and streams them to disk if enabled."""
+
+        if self.resultsFormat != "" and self.model is not None:
+            path: str = os.path.join(self.model.dataPath, "results", self.title)
+
+            # Later runs with the same title keep appending to the same results
+            if path not in self.writers:
+                self.writers[path] = rs.ResultsWriter(path, self.xValues, max(64, len(solutions)), self.resultsData, self.solutionDtype, self.resultsFormat)
+
+            with ins.stage("write"):
+                self.writers[path].writeAll(solutions)
+
+        self.solutions = sl.SolutionSet.fromSolutions(self.xValues, solutions, self.solutionKeep, self.solutionDtype)
+
+        return self.solutions
+
+    # Change how the simulation is plotted.
+    def modifyPlotting(self, headless: bool = True, formats: tuple[str, ...] = ("png",), exporter: str = "thread") -> None:
+        """`modifyPlotting` switches between interactive plotting (pyplot window) and `headless` plotting. \n
+            Headless plots are drawn on their own Agg figures and saved in every one of the `formats` on a background `exporter`
+            (thread or process), so the run continues while the files are written. `waitPlots` waits for them.
+        """
+
+        for format in formats:
+            if format not in plot.figureFormats:
+                raise ValueError("Unknown figure format '%s', expected one of: %s." % (format, ", ".join(plot.figureFormats)))
+
+        if exporter not in plot.exporters:
+            raise ValueError("Unknown exporter '%s', expected one of: %s." % (exporter, ", ".join(plot.exporters)))
+
+        self.headless = headless
+        self.figureFormats = tuple(formats)
+        self.exporter = exporter
+
+    # Wait for the headless plots.
+    def waitPlots(self) -> list[str]:
+        """`waitPlots` blocks until every queued headless plot is saved and returns the saved filenames."""
+
+        return plot.waitExports()
+
+    # Change the simulation instrumentation.
+    def modifyReport(self, enabled: bool = True, formats: tuple[str, ...] = ()) -> None:
+        """`modifyReport` turns the run report on or off. The report records the wall time of every stage, `odeint` call and
+            right-hand-side evaluation counts, and the iterations of every bracket over all following runs. \n
+            With `formats` (json, trace) the report is also dumped next to the plot in the model `dataPath` after every run and plot.
+        """
+
+        for format in formats:
+            if format not in ins.reportFormats:
+                raise ValueError("Unknown report format '%s', expected one of: %s." % (format, ", ".join(ins.reportFormats)))
+
+        self.report = ins.RunReport(self.title) if enabled else None
+        self.reportFormats = tuple(formats)
+
+        ins.active = self.report
+
+    # Dump the report of a finished run.
+    def finishReport(self) -> None:
+        """`finishReport` dumps the report in the requested formats, when instrumentation is on."""
+
+        if self.report is None or self.model is None:
+            return
+
+        self.report.title = self.title
+        self.report.dump(self.model.dataPath, self.title, self.reportFormats)
+
+    # Apply the simulation configuration to the model.
+    def configureModel(self) -> None:
+        """`configureModel` passes simulation wide settings down to the model before a run."""
+
+        if self.solver != "":
+            self.model.solver = self.solver
+
+        if self.refinement != "":
+            self.model.refinement = self.refinement
+
+        if self.shooting != "":
+            self.model.shooting = self.shooting
+
+        self.buildGrid()
+
+        # The cache follows the model data path, so switching models switches caches
+        if self.cacheBytes <= 0:
+            self.cache = None
+        elif self.cache is None or self.cache.path != os.path.join(self.model.dataPath, "cache"):
+            self.cache = ch.EigenCache(os.path.join(self.model.dataPath, "cache"), self.cacheBytes)
+        else:
+            self.cache.maxBytes = self.cacheBytes
+
+        # Runs of this simulation record into its own report, or into none
+        ins.active = self.report
+
+    # Build the graded simulation grid.
+    def buildGrid(self) -> None:
+        """`buildGrid` grades the simulation grid by the potential of the current model, rebuilding it only when the model
+            parameters or grid settings changed. Uniform grids are left as they are.
+        """
+
+        if self.spacing != "graded":
+            return
+
+        if self.gridEnergy is None:
+            raise ValueError("Graded grids need an epsilonMax, give one to modifyGrid or find it with adaptGrid.")
+
+        key: tuple = (ch.modelFingerprint(self.model), self.xMin, self.xMax, self.xStep, self.gridEnergy, self.tailStep)
+        if key == self.gridKey:
+            return
+
+        self.xValues = grid.gradedGrid(self.model, self.xMin, self.xMax, self.xStep, self.gridEnergy, self.tailStep)
+        self.gridKey = key
+
+    # Group states by parity.
+    def _groupStates(self, indexMin: int, indexMax: int) -> dict[str, list[tuple[int, int]]]:
+        """`_groupStates` maps every parity to the (state index, index within the parity) pairs of the states `indexMin` to `indexMax`."""
+
+        parityIndices: dict[str, list[tuple[int, int]]] = {}
+        for index in range(indexMin, indexMax + 1):
+            parity, parityIndex = scan.stateParity(self.model, index)
+            parityIndices.setdefault(parity, []).append((index, parityIndex))
+
+        return parityIndices
+
+    # Estimate the energies of states on a grid.
+    def estimateEnergies(self, xValues: NDArray, indexMin: int, indexMax: int, epsilonMin: float = 0, method: str = "shooting", tolerance: float = 0) -> NDArray:
+        """`estimateEnergies` returns the energies of the states `indexMin` to `indexMax` on `xValues`, refined by shooting or
+            found with the eigensolver (`method`), without computing wavefunctions. States that were not found are NaN. \n
+            A `tolerance` tighter than the model refinement tolerance refines the shooting energies down to it.
+        """
+
+        energies: NDArray = np.full(indexMax - indexMin + 1, np.nan)
+
+        for parity, indices in self._groupStates(indexMin, indexMax).items():
+            if method == "eigen":
+                solutions: list[sl.Solution] = eigen.solveEigen(self.model, xValues, parity, (indices[0][1], indices[-1][1]))
+
+                for (index, parityIndex), solution in zip(indices, solutions):
+                    energies[index - indexMin] = solution.epsilon
+
+                continue
+
+            iterationCtx, approximatation, refinement = br.refinementSettings(self.model)
+            if tolerance > 0:
+                approximatation = min(approximatation, tolerance)
+
+            brackets: list[br.Bracket] = scan.stateBrackets(self.model, xValues, [parityIndex for index, parityIndex in indices], parity, epsilonMin)
+
+            for (index, parityIndex), bracket in zip(indices, brackets):
+                if bracket is None:
+                    continue
+
+                # Enough iterations for bisection to narrow the bracket down to the tolerance
+                iterations: int = max(iterationCtx, int(np.ceil(np.log2(max(bracket.high - bracket.low, approximatation) / approximatation))) + 1)
+                energies[index - indexMin] = br.solveBracket(self.model, bracket, xValues, iterations, approximatation, refinement)
+
+        return energies
+
+    # Refine the simulation grid until the energies converge.
+    def adaptGrid(self, tolerance: float, indexMin: int = 0, indexMax: int = 0, epsilonMin: float = 0, method: str = "shooting", refinements: int = 8) -> float:
+        """`adaptGrid` halves the grid step until the estimated energy error of the states `indexMin` to `indexMax` drops below `tolerance`."""
+
+        if self.model is None:
+            raise ValueError("No model given for the simulation.")
+
+        if self.xValues.size == 0:
+            raise ValueError("Simulation space was not defined.")
+
+        if method not in ("shooting", "eigen"):
+            raise ValueError("Unknown method '%s', expected shooting or eigen." % method)
+
+        # The uniform grid of `modifyGrid` finds the highest requested state first, the graded grid is built around its turning points
+        gradeLater: bool = self.spacing == "graded" and self.gridEnergy is None
+        if gradeLater:
+            self.spacing = "uniform"
+
+        # Shooting energies are refined a hundred times below `tolerance`, so the refinement does not blur the error estimate
+        self.configureModel()
+        energies: NDArray = self.estimateEnergies(self.xValues, indexMin, indexMax, epsilonMin, method, tolerance / 100)
+
+        if np.all(np.isnan(energies)):
+            raise ValueError("None of the states %d to %d were found on the grid with step %g." % (indexMin, indexMax, self.xStep))
+
+        if gradeLater:
+            self.spacing = "graded"
+            self.gridEnergy = float(np.nanmax(energies))
+
+            self.configureModel()
+            energies = self.estimateEnergies(self.xValues, indexMin, indexMax, epsilonMin, method, tolerance / 100)
+
+            if np.all(np.isnan(energies)):
+                raise ValueError("None of the states %d to %d were found on the grid with step %g." % (indexMin, indexMax, self.xStep))
+
+        # Halving the step divides the error by 2^order, so the change of the energies estimates the error left on the finer grid
+        assumedOrder: int = 2 if method == "eigen" else 4
+        previousChanges: NDArray = None
+        error: float = np.inf
+
+        for i in range(refinements):
+            self.xStep /= 2
+            self.tailStep /= 2
+            self.xValues = grid.uniformGrid(self.xMin, self.xMax, self.xStep)
+            self.configureModel()
+
+            refined: NDArray = self.estimateEnergies(self.xValues, indexMin, indexMax, epsilonMin, method, tolerance / 100)
+            changes: NDArray = np.abs(refined - energies)
+
+            # Only states found on both grids give an estimate
+            if np.all(np.isnan(changes)):
+                raise ValueError("None of the states %d to %d were found on both grids with steps %g and %g." % (indexMin, indexMax, 2 * self.xStep, self.xStep))
+
+            # Three grids give the observed order, a jump of the potential or a rough refinement can make it lower than the assumed one
+            order: float = assumedOrder
+            if previousChanges is not None:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    observed: NDArray = np.log2(previousChanges / changes)
+
+                observed = observed[np.isfinite(observed)]
+                if observed.size > 0:
+                    order = min(assumedOrder, max(float(observed.min()), 1))
+
+            error = float(np.nanmax(changes)) / (2**order - 1)
+            energies = refined
+
+            # The assumed order alone is not trusted, the estimate is only accepted once the order was observed
+            if previousChanges is not None and error < tolerance:
+                break
+
+            previousChanges = changes
+
+        return error
+
     # Clear the simulation of any results.
     def clearSolutions(self) -> None:
-        """`clearSOlutions` removes any residual solutions left from previous simulatopn attempts."""
+        """`clearSOlutions` removes any residual solutions left from previous simulatopn attempts. \n
+            A new empty set replaces the old one, so solutions returned by earlier runs stay valid.
+        """
 
-        self.solutions.clear()
+        self.solutions = sl.SolutionSet(self.xValues, self.solutionKeep, self.solutionDtype)
 
     # Run the simulation solving method.
     def runSolve(self, epsilonList: list["core.Epsilon"], plot: bool = False) -> list:
@@ -110,9 +627,14 @@ class Simulation:
         if self.xValues.size == 0:
             return ValueError("Simulation space was not defined.")
 
+        # Configuring first, as it may rebuild a graded grid the new solutions are stored on
+        self.configureModel()
         self.clearSolutions()
 
-        self.solutions = core.solveEpsilonList(self.model, self.xValues, epsilonList)
+        with ins.stage("solve"):
+            self.storeSolutions(core.solveEpsilonList(self.model, self.xValues, epsilonList, self.executor, self.workers, self.cache))
+
+        self.finishReport()
 
         # Plotting is optional
         if plot:
@@ -130,9 +652,84 @@ class Simulation:
         if self.xValues.size == 0:
             return ValueError("Simulation space was not defined.")
 
+        self.configureModel()
         self.clearSolutions()
 
-        self.solutions = br.bracketEnergyState(self.model, self.xValues, bracketList)
+        with ins.stage("bracket"):
+            self.storeSolutions(br.bracketEnergyState(self.model, self.xValues, bracketList, self.executor, self.workers, self.cache))
+
+        self.finishReport()
+
+        # Plotting is optional
+        if plot:
+            self.plot()
+
+        return self.solutions
+
+    # Run the simulation for states picked by index.
+    def runStates(self, indexMin: int, indexMax: int, plot: bool = False, epsilonMin: float = 0, epsilonStep: float = 1) -> list:
+        """`runStates` finds the eigenpairs of the states `indexMin` to `indexMax` (inclusive, 0 is the ground state). \n
+            Each state is located directly by counting the nodes of the shooting solution, so the cost grows with the number
+            of requested states rather than with the energy range below them. `epsilonMin` must lie below the ground state.
+        """
+
+        if self.model is None:
+            raise ValueError("No model given for the simulation.")
+
+        if self.xValues.size == 0:
+            raise ValueError("Simulation space was not defined.")
+
+        self.configureModel()
+
+        indexedBrackets: list[tuple[int, br.Bracket]] = []
+        for parity, indices in self._groupStates(indexMin, indexMax).items():
+            with ins.stage("discovery"):
+                brackets: list[br.Bracket] = scan.stateBrackets(self.model, self.xValues, [parityIndex for index, parityIndex in indices], parity, epsilonMin, epsilonStep)
+
+            # States that could not be isolated are skipped
+            for (index, parityIndex), bracket in zip(indices, brackets):
+                if bracket is not None:
+                    indexedBrackets.append((index, bracket))
+
+        # Brackets in state order give solutions in state order
+        bracketList: list[br.Bracket] = [bracket for index, bracket in sorted(indexedBrackets, key=lambda pair: pair[0])]
+
+        return self.runBracket(bracketList, plot)
+
+    # Run the simulation matrix eigensolver.
+    def runEigen(self, indexMin: int = 0, indexMax: int = 0, epsilonWindow: tuple[float, float] = (), plot: bool = False) -> list:
+        """`runEigen` solves the states `indexMin` to `indexMax`, or every state inside `epsilonWindow`, with the finite-difference eigensolver."""
+
+        if self.model is None:
+            raise ValueError("No model given for the simulation.")
+
+        if self.xValues.size == 0:
+            raise ValueError("Simulation space was not defined.")
+
+        self.configureModel()
+        self.clearSolutions()
+
+        if len(epsilonWindow) == 2:
+            solutions: list[sl.Solution] = []
+            for parity in scan.modelParities(self.model):
+                with ins.stage("eigen"):
+                    solutions.extend(eigen.solveEigen(self.model, self.xValues, parity, epsilonWindow=epsilonWindow))
+
+            self.storeSolutions(sorted(solutions, key=lambda solution: solution.epsilon))
+        else:
+            # Every parity is diagonalised once for the whole range of its states
+            indexedSolutions: list[tuple[int, sl.Solution]] = []
+            for parity, indices in self._groupStates(indexMin, indexMax).items():
+                with ins.stage("eigen"):
+                    solutions: list[sl.Solution] = eigen.solveEigen(self.model, self.xValues, parity, (indices[0][1], indices[-1][1]))
+
+                # Grids too coarse for the highest states return fewer solutions
+                for (index, parityIndex), solution in zip(indices, solutions):
+                    indexedSolutions.append((index, solution))
+
+            self.storeSolutions([solution for index, solution in sorted(indexedSolutions, key=lambda pair: pair[0])])
+
+        self.finishReport()
 
         # Plotting is optional
         if plot:
@@ -144,24 +741,45 @@ class Simulation:
     def plot(self) -> None:
         """`plot` configures the graphs and displays the computed simulation solutions."""
 
-        # Clear the graph of preivous simulation
-        plot.clearGraph()
+        if self.headless:
+            self.exportPlot()
+            return
 
-        plot.defineWellGraph(self.wellWall)
+        with ins.stage("plot"):
+            # Clear the graph of preivous simulation
+            plot.clearGraph()
 
-        # Configure new simulation graph parameters
-        plot.configureGraph(self.title, self.xLabel, self.yLabel, True)
+            plot.defineWellGraph(self.wellWall)
 
-        # Graph every solution
-        for solution in self.solutions:
-            plot.plotGraph(self.xValues, solution.normalised, solution.label, solution.type)
+            # Configure new simulation graph parameters
+            plot.configureGraph(self.title, self.xLabel, self.yLabel, True)
+
+            # Graph every solution
+            for solution in self.solutions:
+                plot.plotGraph(self.xValues, solution.normalised, solution.label, solution.type)
 
         if self.model != None:
-            plot.saveGraph(self.model.dataPath, self.title)
+            with ins.stage("save"):
+                plot.saveGraph(self.model.dataPath, self.title)
+
+        # The report is dumped before the display, which blocks until the window is closed
+        self.finishReport()
 
         # Display the graph
         plot.displayGraph()
 
+    # Queue a headless plot of the solutions.
+    def exportPlot(self) -> None:
+        """`exportPlot` hands the solutions over to a background exporter, which renders and saves the graph without a display."""
+
+        outputPath: str = self.model.dataPath if self.model != None else "data"
+        curves: list[tuple[NDArray, str, str]] = [(solution.normalised, solution.label, solution.type) for solution in self.solutions]
+
+        with ins.stage("plot"):
+            plot.exportGraph(outputPath, self.title, self.figureFormats, self.title, self.xLabel, self.yLabel, self.wellWall, self.xValues, curves, self.exporter)
+
+        self.finishReport()
+
 # Helper method to simplify simulation solving running and debugging.
 def solveSimulation(simulation: Simulation, model: ModelSystem, epsilonList: list, plot: bool = False) -> list[sl.Solution]:    
     """`solveSImulation` solves the provided `simulation` `model` based on the `epsilonList`. Handles any potential errors."""
@@ -192,4 +810,18 @@ def bracketSimulation(simulation: Simulation, model: ModelSystem, bracketList: l
     except ValueError as error:
         print("Error bracketing the simulation: %s" % error)
 
-    return result
\ No newline at end of file
+    return result
+
+# Model systems the command line runner can run, by name
+models: dict[str, dict] = {}
+
+# Register a model system for the command line runner.
+def registerModel(name: str, modelClass: type, xMin: float, xMax: float, xStep: float, wellWall: float = 0, states: int = 5, epsilonMin: float = 0) -> None:
+    """`registerModel` makes the `modelClass` available to `python -m util` as `name`, with its default grid (`xMin`, `xMax`,
+        `xStep`, `wellWall`), the number of lowest `states` solved when no energy range is given and an `epsilonMin` below the ground state.
+    """
+
+    if name in models and models[name]["model"] is not modelClass:
+        raise ValueError("A different model is already registered as '%s'." % name)
+
+    models[name] = {"model": modelClass, "xMin": xMin, "xMax": xMax, "xStep": xStep, "wellWall": wellWall, "states": states, "epsilonMin": epsilonMin}
@@ -1,11 +1,14 @@
 # Package imports
+from __future__ import annotations
 import math
 import numpy as np
 from numpy.typing import NDArray
-from scipy.integrate import odeint
 
 # Custom imports
 import util.core as core
+import util.integrator as itg
+import util.memo as memo
+import util.instrument as ins
 
 # Base solution object class
 class Solution:
@@ -16,7 +19,7 @@ class Solution:
         #   result: NDArray     - the solution of the ode itself
         #   epsilon: float      - the specific epsilon value corresponding to the solution
 
-        #   type: int           - specifies whether the solution is even (=1) or odd (=-1)
+        #   type: str           - specifies whether the solution is even, odd or full (an asymmetric model solved on the whole domain)
         #   normalised: NDArray - the normalized ode solution result
     """
 
@@ -41,77 +44,369 @@ class Solution:
         self.result: NDArray = np.array([])
         self.normalised: NDArray = np.array([])
         self.epsilon: float = 0
+        self.type: str = "even"
 
     # Normalise the solution.
-    def normalise(self, xValues: NDArray) -> NDArray:
-        """`normalise` normalises the solution results."""
+    def normalise(self, xValues: NDArray, quadrature: str = "trapezoid", inPlace: bool = False) -> NDArray:
+        """`normalise` normalises the solution results. \n
+            In `inPlace` mode an existing `normalised` array of matching shape is overwritten instead of allocating a new one.
+        """
 
         if self.result.size == 0:
             return ValueError("Cannot normalise solution %s: the solution has not been computed or is missing its result data." % self.label)
 
-        self.normalised =  normaliseSolution(xValues, self.result)
+        # Arrays shared with the solution cache are read-only and never overwritten
+        out: NDArray = None
+        if inPlace and self.normalised.shape == self.result.shape and self.normalised.flags.writeable:
+            out = self.normalised
+
+        self.normalised = normaliseSolution(xValues, self.result, quadrature, out, self.type != "full")
 
         return self.normalised
 
+# Parity codes of the stored solutions
+parityCodes: dict[str, int] = {"even": 1, "odd": -1, "full": 0}
+parityNames: dict[int, str] = {code: name for name, code in parityCodes.items()}
+
+# What a solution set keeps of every solution
+storageModes: tuple[str, ...] = ("both", "normalised", "result")
+
+class SolutionSet:
+    """
+        Array-backed store of many solutions on one grid. Wavefunctions are rows of contiguous 2-D arrays,
+        epsilons and parity codes are 1-D arrays, and single states are accessed through light `SolutionView` objects.
+
+        Class variables:
+         #   xValues: NDArray    - grid every stored solution is given on
+         #   keep: str           - stored data: both, normalised (raw results dropped) or result (no normalised values)
+         #   dtype: type         - wavefunction storage type, e.g. float64 or float32
+         #   size: int           - number of stored solutions
+         #   labels: list[str]   - plot label of every solution
+
+        Array views over the stored solutions:
+         #   epsilons: NDArray   - epsilon of every solution
+         #   parities: NDArray   - parity code of every solution: even (=1), odd (=-1) or full (=0)
+         #   results: NDArray    - raw solution rows (no rows when not kept)
+         #   normalised: NDArray - normalised solution rows (no rows when not kept)
+    """
+
+    __slots__ = ("xValues", "keep", "dtype", "size", "epsilonValues", "parityValues", "resultValues", "normalisedValues", "labels")
+
+    def __init__(self, xValues: NDArray, keep: str = "both", dtype: type = np.float64, capacity: int = 0):
+        if keep not in storageModes:
+            raise ValueError("Unknown storage mode '%s', expected one of: %s." % (keep, ", ".join(storageModes)))
+
+        self.xValues = xValues
+        self.keep = keep
+        self.dtype = np.dtype(dtype)
+        self.size: int = 0
+
+        self.epsilonValues: NDArray = np.empty(capacity)
+        self.parityValues: NDArray = np.empty(capacity, dtype=np.int8)
+        self.resultValues: NDArray = np.empty((capacity if keep != "normalised" else 0, xValues.size), dtype=self.dtype)
+        self.normalisedValues: NDArray = np.empty((capacity if keep != "result" else 0, xValues.size), dtype=self.dtype)
+        self.labels: list[str] = []
+
+    @classmethod
+    def fromSolutions(cls, xValues: NDArray, solutions, keep: str = "both", dtype: type = np.float64) -> "SolutionSet":
+        """`fromSolutions` packs the `solutions` (Solution objects or views) into a new set."""
+
+        solutions = list(solutions)
+
+        solutionSet: SolutionSet = cls(xValues, keep, dtype, len(solutions))
+        solutionSet.extend(solutions)
+
+        return solutionSet
+
+    @property
+    def epsilons(self) -> NDArray:
+        return self.epsilonValues[:self.size]
+
+    @property
+    def parities(self) -> NDArray:
+        return self.parityValues[:self.size]
+
+    @property
+    def results(self) -> NDArray:
+        return self.resultValues[:self.size]
+
+    @property
+    def normalised(self) -> NDArray:
+        return self.normalisedValues[:self.size]
+
+    def reserve(self, capacity: int) -> None:
+        """`reserve` grows the storage to hold at least `capacity` solutions, copying the stored rows once."""
+
+        if capacity <= self.epsilonValues.size:
+            return
+
+        # Doubling keeps repeated appends at amortised constant cost
+        capacity = max(capacity, 2 * self.epsilonValues.size)
+
+        def grow(values: NDArray) -> NDArray:
+            grown: NDArray = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            return grown
+
+        self.epsilonValues = grow(self.epsilonValues)
+        self.parityValues = grow(self.parityValues)
+
+        if self.keep != "normalised":
+            self.resultValues = grow(self.resultValues)
+
+        if self.keep != "result":
+            self.normalisedValues = grow(self.normalisedValues)
+
+    def append(self, solution) -> None:
+        """`append` copies the data of a `solution` (Solution object or view) into the set."""
+
+        self.reserve(self.size + 1)
+
+        i: int = self.size
+        self.epsilonValues[i] = solution.epsilon
+        self.parityValues[i] = parityCodes[solution.type]
+
+        if self.keep != "normalised":
+            self.resultValues[i] = solution.result
+
+        if self.keep != "result":
+            # Solutions that were never normalised keep an all zero row
+            if np.size(solution.normalised) == self.xValues.size:
+                self.normalisedValues[i] = solution.normalised
+            else:
+                self.normalisedValues[i] = 0
+
+        self.labels.append(solution.label)
+        self.size += 1
+
+    def extend(self, solutions) -> None:
+        """`extend` appends every one of the `solutions`."""
+
+        solutions = list(solutions)
+
+        self.reserve(self.size + len(solutions))
+
+        for solution in solutions:
+            self.append(solution)
+
+    def clear(self) -> None:
+        """`clear` removes every stored solution, keeping the allocated storage."""
+
+        self.size = 0
+        self.labels.clear()
+
+    def nbytes(self) -> int:
+        """`nbytes` returns the memory used by the stored arrays."""
+
+        return self.epsilonValues.nbytes + self.parityValues.nbytes + self.resultValues.nbytes + self.normalisedValues.nbytes
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> "SolutionView":
+        if index < 0:
+            index += self.size
+
+        if index < 0 or index >= self.size:
+            raise IndexError("Solution index %d out of range for %d solutions." % (index, self.size))
+
+        return SolutionView(self, index)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield SolutionView(self, i)
+
+class SolutionView:
+    """
+        Single solution of a `SolutionSet`, exposing the same attributes as `Solution` without copying any data.
+
+        Class variables:
+         #   owner: SolutionSet - set holding the data
+         #   index: int         - position of the solution in the set
+    """
+
+    __slots__ = ("owner", "index")
+
+    def __init__(self, owner: SolutionSet, index: int):
+        self.owner = owner
+        self.index = index
+
+    @property
+    def label(self) -> str:
+        return self.owner.labels[self.index]
+
+    @label.setter
+    def label(self, label: str) -> None:
+        self.owner.labels[self.index] = label
+
+    @property
+    def epsilon(self) -> float:
+        return float(self.owner.epsilonValues[self.index])
+
+    @property
+    def type(self) -> str:
+        return parityNames[int(self.owner.parityValues[self.index])]
+
+    @property
+    def result(self) -> NDArray:
+        if self.owner.keep == "normalised":
+            return np.array([])
+
+        return self.owner.resultValues[self.index]
+
+    @property
+    def normalised(self) -> NDArray:
+        if self.owner.keep == "result":
+            return np.array([])
+
+        return self.owner.normalisedValues[self.index]
+
 # Compues a new model solution.
-def getSolution(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float, normalise: bool = False, parity: str = "even") -> Solution:
-    """`getSolution` computes a new solution result based on the provided `model` and `epsilon` values"""
+def getSolution(model: "simulation.ModelSystem", xValues: NDArray, epsilon: float, normalise: bool = False, parity: str = "even", context: tuple = None) -> Solution:
+    """`getSolution` computes a new solution result based on the provided `model` and `epsilon` values. \n
+        Solutions computed before within the run are served from `memo.solutionCache`, callers solving many epsilons pass the
+        `memo.contextKey` of the model and grid as `context` so it is built only once.
+    """
     
     # Determine the type of solution: odd / even
     #solutionType: str = core.checkWavefunctionEvenOdd(epsilon)
 
+    if context is None:
+        context = memo.contextKey(model, xValues)
+
+    key: tuple = memo.solutionKey(context, epsilon, parity)
+    cached: Solution = memo.solutionCache.get(key)
+
+    if cached is not None:
+        return copySolution(xValues, cached, normalise, getQuadrature(model), key)
+
     # Solution results
-    solutionResult: NDArray = odeint(model.system, model.getInitialConditions(parity), xValues, args=(epsilon,))
+    solutionResult: NDArray
+    spliced: bool = itg.isSpliced(model, parity)
+    if spliced:
+        solutionResult = itg.integrateSpliced(model, xValues, np.array([epsilon]), parity)[:, 0]
+    elif itg.isBatched(model):
+        solutionResult = itg.integrateBatch(model, xValues, np.array([epsilon]), parity)[:, 0]
+    else:
+        solutionResult = itg.odeintSolve(model, xValues, epsilon, parity)
+
+    newSolution: Solution = createSolution(xValues, solutionResult, epsilon, parity, normalise, getQuadrature(model))
+
+    memoiseSolution(key, newSolution, not spliced)
+
+    return newSolution
+
+# Store a solution in the in-memory cache.
+def memoiseSolution(key: tuple, solution: Solution, endpoint: bool = True) -> None:
+    """`memoiseSolution` caches a read-only copy of the `solution` data under `key`. \n
+        With `endpoint` its last value also answers endpoint lookups, spliced solutions end at zero instead of the shooting endpoint.
+    """
+
+    if memo.solutionCache.maxSize <= 0:
+        return
+
+    cached: Solution = createSolution(None, solution.result, solution.epsilon, solution.type)
+    cached.normalised = solution.normalised
+
+    # Cached arrays are shared with every solution served from the cache, so they must never be modified
+    cached.result.flags.writeable = False
+    cached.normalised.flags.writeable = False
+
+    memo.solutionCache.put(key, cached)
+
+    # A full solution also answers later endpoint lookups for the same epsilon
+    if endpoint:
+        memo.solutionCache.put(("endpoint",) + key[1:], float(solution.result[-1]))
+
+# Serve a solution from the in-memory cache.
+def copySolution(xValues: NDArray, cached: Solution, normalise: bool, quadrature: str, key: tuple) -> Solution:
+    """`copySolution` creates a new solution object sharing the `cached` data, normalising it once if required."""
+
+    newSolution: Solution = createSolution(xValues, cached.result, cached.epsilon, cached.type)
+    newSolution.normalised = cached.normalised
+
+    if normalise and newSolution.normalised.size == 0:
+        newSolution.normalise(xValues, quadrature)
+        memoiseSolution(key, newSolution, False)
+
+    return newSolution
+
+# Determine the model normalisation quadrature.
+def getQuadrature(model: "simulation.ModelSystem") -> str:
+    """`getQuadrature` returns the normalisation quadrature requested by the `model`, defaulting to `trapezoid`."""
+
+    quadrature: str = "trapezoid" # Default quadrature, in the case that the model does not provide a specified quadrature
+    if hasattr(model, "quadrature") and model.quadrature != "":
+        quadrature = model.quadrature
+
+    return quadrature
+
+# Wraps computed model results into a solution.
+def createSolution(xValues: NDArray, solutionResult: NDArray, epsilon: float, parity: str = "even", normalise: bool = False, quadrature: str = "trapezoid") -> Solution:
+    """`createSolution` configures a new solution object from already computed `solutionResult` values."""
 
     # Configure new solution class object
-    newSolution: Solution = Solution("$\\epsilon$ = %.1f" % epsilon, solutionResult[:, 0])
+    newSolution: Solution = Solution("$\\epsilon$ = %.1f" % epsilon, solutionResult)
     newSolution.type = parity
     newSolution.epsilon = epsilon
 
     # Most of the time we want to get normalised results
     if normalise:
-        newSolution.normalise(xValues)
+        newSolution.normalise(xValues, quadrature)
 
     return newSolution
 
 # Normalise given values.
-def normaliseSolution(xValues: NDArray, yValues: NDArray) -> NDArray:
-    """`normaliseSolution` normalises the given function values by finding the approximate integral."""
-    
-    #Area with rectangles below the graph
-    lowerIntegral: float = integrateSolution(xValues, yValues, "lower")
-    
-    #Area with rectangles above the graph
-    upperIntegral: float = integrateSolution(xValues, yValues, "upper")
-    
-    #The average of the upper and lower bound integral is used for additional accuracy
-    approxIntegral : float = (lowerIntegral + upperIntegral)/2
+def normaliseSolution(xValues: NDArray, yValues: NDArray, quadrature: str = "trapezoid", out: NDArray = None, halfDomain: bool = True) -> NDArray:
+    """`normaliseSolution` normalises the given function values by finding the approximate integral of their square. \n
+        `quadrature` can be set to 'trapezoid' or 'simpson'. When `out` is given the normalised values are written into it.
+        `halfDomain` values cover x = 0 to L of a symmetric solution, otherwise `xValues` span the whole domain.
+    """
     
-    #The normalisation factor is given by sqrt(2 * integral value) (when evaluated for x = 0 to x = L)
-    normalisationFactor: float = math.sqrt(2 * approxIntegral) 
+    with ins.stage("normalise"):
+        approxIntegral: float = integrateSquared(xValues, yValues, quadrature)
+        
+        #The normalisation factor is given by sqrt(2 * integral value) (when evaluated for x = 0 to x = L)
+        normalisationFactor: float = math.sqrt(2 * approxIntegral if halfDomain else approxIntegral)
+
+        return np.divide(yValues, normalisationFactor, out=out)
+
+# Vectorized quadrature of the squared function.
+def integrateSquared(xValues: NDArray, yValues: NDArray, quadrature: str = "trapezoid") -> float:
+    """`integrateSquared` integrates the square of the function values in a single NumPy pass. \n
+        quadrature can be set to 'trapezoid' or 'simpson'
+    """
 
-    return yValues / normalisationFactor
+    if quadrature == "simpson":
+        from scipy.integrate import simpson
+
+        return float(simpson(yValues * yValues, x=xValues))
+
+    if quadrature != "trapezoid":
+        raise ValueError("Unknown quadrature '%s', expected trapezoid or simpson." % quadrature)
+
+    # Trapezoid weights: every point carries half of the two neighbouring intervals
+    # This equals the average of the lower and upper rectangle sums
+    dx: NDArray = np.abs(np.diff(xValues))
+    weights: NDArray = np.zeros(xValues.size)
+    weights[:-1] += dx
+    weights[1:] += dx
+
+    return float(np.einsum("i,i,i->", weights, yValues, yValues)) / 2
 
 # Simple integration method.
 def integrateSolution(xValues: NDArray, yValues: NDArray, type: str = "lower") -> float:
-    """`integrateSolution` integrates function using rectangular method. \n
+    """`integrateSolution` integrates the squared function using rectangular method. \n
         type can be set to 'upper' or 'lower'
     """
 
-    # Final integral value
-    integral: float = 0
-    
-    #Configure function type as upper or lower
-    if type == "lower":
-        x = 0
-    elif type == "upper":
+    #Configure function type as upper or lower, the offset determines which end of every rectangle gives its height
+    x: int = 0
+    if type == "upper":
         x = 1
 
     # Add up the rectangles
-    for i in range(xValues.size - 1):
-        dx = math.fabs(xValues[i + 1] - xValues[i])
-        dy = yValues[i + x]**2 #the x value determines if the upper or lower integral is calculated
-
-        integral += dy * dx
+    dx: NDArray = np.abs(np.diff(xValues))
+    dy: NDArray = yValues[x:yValues.size - 1 + x]**2
 
-    return integral
\ No newline at end of file
+    return float(np.dot(dy, dx))